@@ -0,0 +1,145 @@
+"""
+Benchmark of database engines.
+
+Runs operations performed by crash consumers directly against
+selected engine, so that engines can be compared without
+YouTrack and message queue overhead.
+
+Usage: python -m local.benchmark.database --help
+"""
+
+from __future__ import annotations
+from typing import Awaitable, Callable, List
+
+import argparse
+import asyncio
+import glob
+import os
+import tempfile
+import time
+import uuid
+
+from youtrack_reporter.app.settings import AppSettings, CollectionSettings, DatabaseSettings
+from youtrack_reporter.app.database.abstract import IDatabase
+from youtrack_reporter.app.database.instance import db_init
+from youtrack_reporter.app.database.orm import ORMConfig, ORMIssueDescription
+
+from .run import percentile, random_text
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--db",
+        choices=["memory", "sqlite", "arangodb"],
+        default="sqlite",
+        help="database engine. ArangoDB is configured with DB_* environment variables",
+    )
+    parser.add_argument("--db-path", help="SQLite database file, temporary by default")
+    parser.add_argument("--operations", type=int, default=2000, help="operations of each kind")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--output-size", type=int, default=4000, help="crash output length")
+    return parser.parse_args()
+
+
+async def measure(title: str, count: int, concurrency: int, operation: Callable[[int], Awaitable]):
+
+    latencies: List[float] = []
+    indices = iter(range(count))
+
+    async def worker():
+        for i in indices:
+            start = time.perf_counter()
+            await operation(i)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"  {title:<24} {count / elapsed:>10.1f} op/s"
+        f"   p50 {percentile(latencies, 0.50) * 1000:>7.2f} ms"
+        f"   p99 {percentile(latencies, 0.99) * 1000:>7.2f} ms"
+    )
+
+
+async def run(args, db: IDatabase):
+
+    # Unique prefix allows to run benchmark on non-empty database
+    prefix = uuid.uuid4().hex
+    crash_ids = [f"bench-{prefix}-{i}" for i in range(args.operations)]
+    description = ORMIssueDescription(
+        crash_info=random_text(80),
+        crash_url="https://example.com/crashes/1",
+        crash_type="crash",
+        crash_output=random_text(args.output_size),
+        project_name="benchmark",
+        fuzzer_name="fuzzer",
+        revision_name="r1",
+    )
+
+    config = await db.configs.insert(
+        ORMConfig(
+            update_rev="1",
+            url="https://youtrack.example.com",
+            token="token",
+            project="Benchmark",
+        )
+    )
+
+    async def reserve(i: int):
+        await db.issues.reserve(crash_ids[i], 300)
+
+    async def commit(i: int):
+        await db.issues.commit(crash_ids[i], f"0-{i}", description)
+
+    async def get_issue(i: int):
+        await db.issues.get(crash_ids[i])
+
+    async def update_duplicate_count(i: int):
+        await db.issues.update_duplicate_count(crash_ids[i], 2)
+
+    async def get_config(i: int):
+        await db.configs.get(config.id)
+
+    async def release(i: int):
+        await db.issues.reserve(crash_ids[i] + "-released", 300)
+        await db.issues.release(crash_ids[i] + "-released")
+
+    print(f"== {args.db}")
+    n, c = args.operations, args.concurrency
+    await measure("configs.get", n, c, get_config)
+    await measure("issues.reserve", n, c, reserve)
+    await measure("issues.commit", n, c, commit)
+    await measure("issues.get", n, c, get_issue)
+    await measure("issues.update_dup_count", n, c, update_duplicate_count)
+    await measure("issues.reserve+release", n, c, release)
+
+    await db.configs.delete(config.id)
+
+
+async def main():
+    args = parse_args()
+
+    temporary = args.db == "sqlite" and args.db_path is None
+    if temporary:
+        args.db_path = tempfile.mktemp(suffix=".sqlite", prefix="yt-bench-")
+
+    settings = AppSettings.construct(
+        collections=CollectionSettings(),
+        database=DatabaseSettings(engine=args.db, path=args.db_path),
+    )
+
+    db = await db_init(settings)
+    try:
+        await run(args, db)
+    finally:
+        await db.close()
+        if temporary:
+            for path in glob.glob(f"{args.db_path}*"):
+                os.remove(path)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
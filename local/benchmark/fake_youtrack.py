@@ -0,0 +1,100 @@
+from __future__ import annotations
+from typing import Dict
+from collections import Counter
+from aiohttp import web
+
+import asyncio
+import itertools
+import random
+
+
+class FakeYouTrack:
+
+    """
+    In-process YouTrack stand-in implementing endpoints used by reporter.
+    Latency and errors can be injected to simulate slow or failing instance.
+    """
+
+    issues: Dict[str, str]
+    requests: Counter
+
+    def __init__(
+        self,
+        project: str = "Benchmark",
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+    ):
+        self.project = project
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.issues = {}
+        self.requests = Counter()
+        self._ids = itertools.count(1)
+        self._runner = None
+        self.url = None
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        self.requests[f"{request.method} {request.match_info.route.resource.canonical}"] += 1
+
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+
+        if self.error_rate > 0 and random.random() < self.error_rate:
+            headers = {"Retry-After": "1"} if self.error_status == 429 else None
+            return web.Response(status=self.error_status, headers=headers)
+
+        return await handler(request)
+
+    async def _get_projects(self, request: web.Request):
+        return web.json_response([{"id": "0-0", "name": self.project}])
+
+    async def _create_issue(self, request: web.Request):
+        body = await request.json()
+        issue_id = f"0-{next(self._ids)}"
+        self.issues[issue_id] = body.get("description", "")
+        return web.json_response({"id": issue_id})
+
+    async def _update_issue(self, request: web.Request):
+        issue_id = request.match_info["id"]
+        if issue_id not in self.issues:
+            return web.Response(status=404)
+
+        body = await request.json()
+        self.issues[issue_id] = body.get("description", "")
+        return web.json_response({"id": issue_id})
+
+    async def _get_issue(self, request: web.Request):
+        issue_id = request.match_info["id"]
+        if issue_id not in self.issues:
+            return web.Response(status=404)
+        return web.json_response({"description": self.issues[issue_id]})
+
+    async def _delete_issue(self, request: web.Request):
+        if self.issues.pop(request.match_info["id"], None) is None:
+            return web.Response(status=404)
+        return web.json_response({})
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0):
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_get("/api/admin/projects", self._get_projects)
+        app.router.add_post("/api/issues", self._create_issue)
+        app.router.add_post("/api/issues/{id}", self._update_issue)
+        app.router.add_get("/api/issues/{id}", self._get_issue)
+        app.router.add_delete("/api/issues/{id}", self._delete_issue)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{port}"
+        return self
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
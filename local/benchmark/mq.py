@@ -0,0 +1,115 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Tuple
+
+import asyncio
+import logging
+import time
+
+from mqtransport.errors import ConsumeMessageError
+
+
+class MemoryProducer:
+
+    """Records produced messages instead of sending them"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.messages: List[Dict[str, Any]] = []
+
+    async def produce(self, **kwargs):
+        self.messages.append(kwargs)
+
+
+class MemoryProducers:
+    def __init__(self):
+        self.youtrack_report_undelivered = MemoryProducer("youtrack-reporter.reports.undelivered")
+        self.youtrack_integration_result = MemoryProducer("youtrack-reporter.integrations.result")
+        self.verify_youtrack = MemoryProducer("youtrack-reporter.internal.verify")
+
+
+class MemoryMQApp:
+    def __init__(self, state):
+        self.state = state
+
+
+class MemoryChannel:
+
+    """
+    Consuming channel backed by asyncio queue. Messages are handled by
+    a fixed number of workers. Messages rejected with ConsumeMessageError
+    are redelivered, as broker would do after visibility timeout.
+    """
+
+    def __init__(
+        self,
+        app: MemoryMQApp,
+        concurrency: int,
+        redelivery_delay: float = 0.05,
+        max_deliveries: int = 100,
+    ):
+        self._app = app
+        self._logger = logging.getLogger("bench.mq")
+        self._concurrency = concurrency
+        self._redelivery_delay = redelivery_delay
+        self._max_deliveries = max_deliveries
+        self._consumers = {}
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._workers: List[asyncio.Task] = []
+
+        self.latencies: List[float] = []
+        self.redelivered = 0
+        self.failed = 0
+        self.dead = 0
+
+    def add_consumer(self, consumer):
+        self._consumers[consumer.name] = consumer
+
+    def send(self, name: str, body: dict):
+        self._queue.put_nowait((name, body, time.perf_counter(), 1))
+
+    def start(self):
+        for _ in range(self._concurrency):
+            self._workers.append(asyncio.ensure_future(self._work()))
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+
+    async def join(self):
+        await self._queue.join()
+
+    def reset_stats(self):
+        self.latencies = []
+        self.redelivered = 0
+        self.failed = 0
+        self.dead = 0
+
+    async def _redeliver(self, item: Tuple[str, dict, float, int]):
+        await asyncio.sleep(self._redelivery_delay)
+        name, body, enqueued_at, deliveries = item
+        self._queue.put_nowait((name, body, enqueued_at, deliveries + 1))
+        self._queue.task_done()
+
+    async def _work(self):
+        while True:
+            item = await self._queue.get()
+            name, body, enqueued_at, deliveries = item
+            consumer = self._consumers[name]
+
+            try:
+                await consumer.consume(consumer.Model(**body), self._app)
+            except ConsumeMessageError:
+                if deliveries < self._max_deliveries:
+                    self.redelivered += 1
+                    asyncio.ensure_future(self._redeliver(item))
+                    continue
+                self.dead += 1
+            except Exception:
+                self._logger.exception("Unhandled error in consumer '%s'", name)
+                self.failed += 1
+            else:
+                self.latencies.append(time.perf_counter() - enqueued_at)
+
+            self._queue.task_done()
@@ -0,0 +1,248 @@
+"""
+End-to-end benchmark of crash consumers.
+
+Drives real MC_UniqueCrashFound/MC_DuplicateCrashFound consumers
+against in-process YouTrack, database and message queue stand-ins.
+
+Usage: python -m local.benchmark.run --help
+"""
+
+from __future__ import annotations
+from typing import List
+
+import argparse
+import asyncio
+import glob
+import logging
+import os
+import random
+import resource
+import string
+import tempfile
+import time
+
+from youtrack_reporter.app.settings import (
+    AppSettings,
+    CacheSettings,
+    CollectionSettings,
+    DatabaseSettings,
+    ReporterSettings,
+    YouTrackSettings,
+)
+from youtrack_reporter.app.youtrack import YouTrackAsyncAPI
+from youtrack_reporter.app.database.cache import ConfigCache
+from youtrack_reporter.app.database.batching import IssueBatcher
+from youtrack_reporter.app.database.instance import db_init
+from youtrack_reporter.app.database.orm import ORMConfig
+from youtrack_reporter.app.message_queue.state import MQAppState
+from youtrack_reporter.app.message_queue.scheduler import FairScheduler, LANE_DUPLICATE, LANE_UNIQUE
+from youtrack_reporter.app.message_queue.coalescing import MaxValueCoalescer
+from youtrack_reporter.app.message_queue.api_gateway import (
+    MC_DuplicateCrashFound,
+    MC_UniqueCrashFound,
+)
+
+from .fake_youtrack import FakeYouTrack
+from .mq import MemoryChannel, MemoryMQApp, MemoryProducers
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--integrations", type=int, default=10)
+    parser.add_argument("--crashes", type=int, default=100, help="unique crashes per integration")
+    parser.add_argument("--duplicates", type=int, default=10, help="duplicates per crash")
+    parser.add_argument("--output-size", type=int, default=4000, help="crash output length")
+    parser.add_argument("--workers", type=int, default=64, help="messages consumed concurrently")
+    parser.add_argument("--latency", type=float, default=0.005, help="YouTrack latency, seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="YouTrack error probability")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--duplicates-window", type=float, default=0.2)
+    parser.add_argument("--max-concurrency", type=int, default=64)
+    parser.add_argument("--max-concurrency-per-integration", type=int, default=8)
+    parser.add_argument("--rate-limit", type=float, default=0, help="0 disables rate limiter")
+    parser.add_argument(
+        "--db",
+        choices=["memory", "sqlite", "arangodb"],
+        default="memory",
+        help="database engine. ArangoDB is configured with DB_* environment variables",
+    )
+    parser.add_argument("--db-path", help="SQLite database file, temporary by default")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+
+def random_text(length: int):
+    return "".join(random.choices(string.ascii_letters + " \n", k=length))
+
+
+def create_database_settings(args) -> DatabaseSettings:
+    args.db_temporary = args.db == "sqlite" and args.db_path is None
+    if args.db_temporary:
+        args.db_path = tempfile.mktemp(suffix=".sqlite", prefix="yt-bench-")
+    return DatabaseSettings(engine=args.db, path=args.db_path)
+
+
+def create_settings(args) -> AppSettings:
+    # Only sections used by consumers are needed
+    return AppSettings.construct(
+        cache=CacheSettings(),
+        collections=CollectionSettings(),
+        database=create_database_settings(args),
+        youtrack=YouTrackSettings(rate_limit=args.rate_limit),
+        reporter=ReporterSettings(
+            duplicates_window=args.duplicates_window,
+            max_concurrency=args.max_concurrency,
+            max_concurrency_per_integration=args.max_concurrency_per_integration,
+        ),
+    )
+
+
+async def create_state(args, youtrack: FakeYouTrack):
+    settings = create_settings(args)
+
+    state = MQAppState()
+    state.settings = settings
+    state.db = await db_init(settings)
+    state.config_cache = ConfigCache(state.db.configs, settings.cache)
+    state.issue_batcher = IssueBatcher(
+        state.db.issues,
+        settings.database.batch_delay,
+        settings.database.batch_max_size,
+    )
+    state.youtrack_api = YouTrackAsyncAPI(settings)
+    state.duplicates = MaxValueCoalescer(settings.reporter.duplicates_window)
+    state.scheduler = FairScheduler(
+        settings.reporter.max_concurrency,
+        settings.reporter.max_concurrency_per_integration,
+        weights={
+            LANE_UNIQUE: settings.reporter.unique_weight,
+            LANE_DUPLICATE: settings.reporter.duplicate_weight,
+        },
+        slo={
+            LANE_UNIQUE: settings.reporter.unique_slo,
+            LANE_DUPLICATE: settings.reporter.duplicate_slo,
+        },
+    )
+    state.producers = MemoryProducers()
+
+    config_ids = []
+    for i in range(args.integrations):
+        config = ORMConfig(
+            update_rev="1",
+            url=youtrack.url,
+            token=f"token-{i}",
+            project=youtrack.project,
+        )
+        config = await state.db.configs.insert(config)
+        config_ids.append(config.id)
+
+    return state, config_ids
+
+
+async def run_phase(title: str, channel: MemoryChannel, state: MQAppState, messages, youtrack: FakeYouTrack):
+    channel.reset_stats()
+    youtrack.requests.clear()
+    undelivered = state.producers.youtrack_report_undelivered.messages
+    undelivered_before = len(undelivered)
+
+    start = time.perf_counter()
+    for name, body in messages:
+        channel.send(name, body)
+
+    await channel.join()
+    elapsed = time.perf_counter() - start
+
+    maxrss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"== {title}")
+    print(f"  messages:      {len(messages)}")
+    print(f"  elapsed:       {elapsed:.3f} s")
+    print(f"  throughput:    {len(messages) / elapsed:.1f} msg/s")
+    print(f"  latency p50:   {percentile(channel.latencies, 0.50) * 1000:.1f} ms")
+    print(f"  latency p99:   {percentile(channel.latencies, 0.99) * 1000:.1f} ms")
+    print(f"  redelivered:   {channel.redelivered}")
+    print(f"  failed/dead:   {channel.failed}/{channel.dead}")
+    print(f"  undelivered:   {len(undelivered) - undelivered_before}")
+    print(f"  max rss:       {maxrss_mb:.1f} MiB")
+    print(f"  youtrack requests:")
+    for endpoint, count in sorted(youtrack.requests.items()):
+        print(f"    {endpoint}: {count}")
+
+
+async def main():
+    args = parse_args()
+    random.seed(args.seed)
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger("YouTrack").setLevel(logging.CRITICAL)
+
+    youtrack = FakeYouTrack(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+    )
+    await youtrack.start()
+
+    state, config_ids = await create_state(args, youtrack)
+    app = MemoryMQApp(state)
+
+    channel = MemoryChannel(app, args.workers)
+    channel.add_consumer(MC_UniqueCrashFound())
+    channel.add_consumer(MC_DuplicateCrashFound())
+    channel.start()
+
+    crashes = [
+        (config_id, f"{config_id}-{n}")
+        for config_id in config_ids
+        for n in range(args.crashes)
+    ]
+
+    unique = [
+        (
+            MC_UniqueCrashFound.name,
+            dict(
+                config_id=config_id,
+                crash_id=crash_id,
+                crash_info=random_text(80),
+                crash_type="crash",
+                crash_output=random_text(args.output_size),
+                crash_url=f"https://example.com/crashes/{crash_id}",
+                project_name="benchmark",
+                fuzzer_name="fuzzer",
+                revision_name="r1",
+            ),
+        )
+        for config_id, crash_id in crashes
+    ]
+
+    duplicates = [
+        (
+            MC_DuplicateCrashFound.name,
+            dict(config_id=config_id, crash_id=crash_id, duplicate_count=count),
+        )
+        for config_id, crash_id in crashes
+        for count in range(1, args.duplicates + 1)
+    ]
+    random.shuffle(duplicates)
+
+    try:
+        await run_phase("unique crashes", channel, state, unique, youtrack)
+        await run_phase("duplicate crashes", channel, state, duplicates, youtrack)
+    finally:
+        await channel.stop()
+        await state.db.close()
+        if args.db_temporary:
+            for path in glob.glob(f"{args.db_path}*"):
+                os.remove(path)
+        await state.youtrack_api.__aexit__()
+        await youtrack.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,20 @@
+from youtrack_reporter.app.metrics import Counter, Registry
+
+
+def test_counter_exposition():
+    registry = Registry()
+    plain = registry.register(Counter("plain", "Plain counter", ["result"]))
+    suffixed = registry.register(Counter("suffixed_total", "Suffixed counter"))
+
+    plain.labels("ok").inc()
+    suffixed.labels().inc(2)
+
+    lines = registry.expose().splitlines()
+    assert lines == [
+        "# HELP plain Plain counter",
+        "# TYPE plain counter",
+        'plain_total{result="ok"} 1',
+        "# HELP suffixed Suffixed counter",
+        "# TYPE suffixed counter",
+        "suffixed_total 2",
+    ]
@@ -0,0 +1,133 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Dict, Optional
+
+import aiohttp
+
+if TYPE_CHECKING:
+    from types import SimpleNamespace
+    from youtrack_reporter.app.settings import YouTrackSettings
+
+
+class HostPoolStats:
+
+    """Connection usage of single YouTrack instance"""
+
+    in_flight: int
+    queued: int
+    max_queued: int
+    requests: int
+    created: int
+    reused: int
+
+    def __init__(self):
+        self.in_flight = 0
+        self.queued = 0
+        self.max_queued = 0
+        self.requests = 0
+        self.created = 0
+        self.reused = 0
+
+    def dict(self) -> Dict[str, int]:
+        return dict(
+            in_flight=self.in_flight,
+            queued=self.queued,
+            max_queued=self.max_queued,
+            requests=self.requests,
+            connections_created=self.created,
+            connections_reused=self.reused,
+        )
+
+
+class ConnectionPool:
+
+    """
+    Creates http client sessions with tuned connector.
+    Per-host limit prevents single slow YouTrack instance
+    from occupying all connections needed by the others.
+    Saturation is tracked via aiohttp tracing hooks.
+    """
+
+    _settings: YouTrackSettings
+    _hosts: Dict[str, HostPoolStats]
+
+    def __init__(self, settings: YouTrackSettings):
+        self._settings = settings
+        self._hosts = {}
+
+    def _host(self, url) -> HostPoolStats:
+        origin = str(url.origin())
+        try:
+            return self._hosts[origin]
+        except KeyError:
+            stats = self._hosts[origin] = HostPoolStats()
+            return stats
+
+    def _create_trace_config(self) -> aiohttp.TraceConfig:
+
+        async def on_request_start(session, ctx: SimpleNamespace, params):
+            ctx.host = self._host(params.url)
+            ctx.host.in_flight += 1
+            ctx.host.requests += 1
+
+        async def on_request_done(session, ctx: SimpleNamespace, params):
+            ctx.host.in_flight -= 1
+
+        async def on_queued_start(session, ctx: SimpleNamespace, params):
+            ctx.host.queued += 1
+            ctx.host.max_queued = max(ctx.host.max_queued, ctx.host.queued)
+
+        async def on_queued_end(session, ctx: SimpleNamespace, params):
+            ctx.host.queued -= 1
+
+        async def on_connection_created(session, ctx: SimpleNamespace, params):
+            ctx.host.created += 1
+
+        async def on_connection_reused(session, ctx: SimpleNamespace, params):
+            ctx.host.reused += 1
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_end.append(on_request_done)
+        trace_config.on_request_exception.append(on_request_done)
+        trace_config.on_connection_queued_start.append(on_queued_start)
+        trace_config.on_connection_queued_end.append(on_queued_end)
+        trace_config.on_connection_create_end.append(on_connection_created)
+        trace_config.on_connection_reuseconn.append(on_connection_reused)
+        return trace_config
+
+    def _create_connector(self) -> aiohttp.TCPConnector:
+        settings = self._settings
+        kwargs = dict(
+            limit=settings.connections_limit,
+            limit_per_host=settings.connections_limit_per_host,
+            use_dns_cache=settings.dns_cache_ttl > 0,
+            ttl_dns_cache=settings.dns_cache_ttl or None,
+            enable_cleanup_closed=True,
+        )
+
+        # aiohttp does not allow keep-alive timeout for closing connector
+        if settings.keepalive:
+            kwargs["keepalive_timeout"] = settings.keepalive_timeout
+        else:
+            kwargs["force_close"] = True
+
+        return aiohttp.TCPConnector(**kwargs)
+
+    def create_session(self, headers: Optional[Dict[str, str]] = None):
+        timeout = aiohttp.ClientTimeout(
+            total=self._settings.request_timeout,
+            connect=self._settings.connect_timeout,
+        )
+        return aiohttp.ClientSession(
+            headers=headers,
+            timeout=timeout,
+            connector=self._create_connector(),
+            trace_configs=[self._create_trace_config()],
+        )
+
+    def stats(self) -> dict:
+        return dict(
+            limit=self._settings.connections_limit,
+            limit_per_host=self._settings.connections_limit_per_host,
+            hosts={host: stats.dict() for host, stats in self._hosts.items()},
+        )
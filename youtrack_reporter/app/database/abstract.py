@@ -1,11 +1,12 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING, Dict, Optional, Tuple
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional, Tuple, Union
 
 from abc import abstractmethod, ABCMeta
 
 if TYPE_CHECKING:
     from youtrack_reporter.app.settings import AppSettings
-    from youtrack_reporter.app.database.orm import ORMConfig
+    from youtrack_reporter.app.database.errors import DatabaseError
+    from youtrack_reporter.app.database.orm import ORMConfig, ORMIssue, ORMIssueDescription
 
 
 class IConfigs(metaclass=ABCMeta):
@@ -18,22 +19,117 @@ class IConfigs(metaclass=ABCMeta):
         pass
 
     @abstractmethod
-    async def update(self, config: ORMConfig) -> Tuple[ORMConfig, ORMConfig]:
-        pass
+    async def update(
+        self,
+        config: ORMConfig,
+        expected_rev: Optional[str] = None,
+    ) -> Tuple[ORMConfig, ORMConfig]:
+        """
+        Update config. If `expected_rev` is given, config is updated only
+        if it still has that revision, otherwise `DBRevisionMismatchError` is raised
+        """
 
     @abstractmethod
-    async def delete(self, config_id: str) -> None:
-        pass
+    async def delete(self, config_id: str, expected_rev: Optional[str] = None) -> None:
+        """Delete config. `expected_rev` is checked the same way as by `update`"""
+
+    @abstractmethod
+    async def get_many(self, config_ids: List[str]) -> Dict[str, ORMConfig]:
+        """Get several configs at once. Missing ones are omitted"""
+
+    @abstractmethod
+    async def insert_many(self, configs: List[ORMConfig]) -> List[Union[ORMConfig, DatabaseError]]:
+        """
+        Insert several configs at once. Returns them with ids, in the same order.
+        If engine may insert only some of them, the others are returned as errors
+        """
+
+    @abstractmethod
+    async def update_many(self, configs: List[ORMConfig]) -> Dict[str, Tuple[ORMConfig, ORMConfig]]:
+        """
+        Update several configs at once.
+        Returns (old, new) pairs by config id. Missing ones are omitted
+        """
+
+    @abstractmethod
+    async def delete_many(self, config_ids: List[str]) -> List[str]:
+        """Delete several configs at once. Returns ids not found"""
+
+    @abstractmethod
+    async def get_page(
+        self,
+        limit: int,
+        after: Optional[str] = None,
+        url: Optional[str] = None,
+        project: Optional[str] = None,
+    ) -> List[ORMConfig]:
+        """
+        Get up to `limit` configs ordered by id, starting after config `after`.
+        Configs may be filtered by exact `url` and `project`
+        """
 
 class IIssues(metaclass=ABCMeta):
+    @abstractmethod
+    async def get(self, crash_id: str) -> ORMIssue:
+        pass
+
     @abstractmethod
     async def get_issue(self, crash_id: str) -> Optional[str]:
         pass
 
     @abstractmethod
-    async def insert(self, crash_id: str, issue_id: str) -> None:
+    async def get_issues(self, crash_ids: List[str]) -> Dict[str, ORMIssue]:
+        """Get records of several crashes at once. Missing ones are omitted"""
+
+    @abstractmethod
+    async def insert(
+        self,
+        crash_id: str,
+        issue_id: str,
+        description: Optional[ORMIssueDescription] = None,
+    ) -> None:
         pass
 
+    @abstractmethod
+    async def reserve(self, crash_id: str, lease: float) -> Optional[ORMIssue]:
+        """
+        Atomically reserve creation of issue for crash.
+        Returns None if reservation is acquired. Otherwise returns existing
+        record: created issue or reservation made by another consumer.
+        Reservations older than `lease` seconds are taken over.
+        """
+
+    @abstractmethod
+    async def commit(
+        self,
+        crash_id: str,
+        issue_id: str,
+        description: Optional[ORMIssueDescription] = None,
+    ) -> None:
+        """Complete reservation with created issue"""
+
+    @abstractmethod
+    async def commit_many(
+        self,
+        issues: List[Tuple[str, str, Optional[ORMIssueDescription]]],
+    ) -> List[str]:
+        """
+        Complete several reservations at once, each given as
+        (crash_id, issue_id, description). Returns crash ids not found
+        """
+
+    @abstractmethod
+    async def release(self, crash_id: str) -> None:
+        """Remove reservation if issue was not created"""
+
+    @abstractmethod
+    async def update_description(self, crash_id: str, description: ORMIssueDescription) -> None:
+        """Replace description parameters of created issue. Duplicate count is kept"""
+
+    @abstractmethod
+    async def update_duplicate_count(self, crash_id: str, duplicate_count: int) -> None:
+        """Raise stored duplicate count. Lower count never replaces higher one"""
+
 class IUnsentMessages(metaclass=ABCMeta):
 
     """
@@ -42,11 +138,33 @@ class IUnsentMessages(metaclass=ABCMeta):
 
     @abstractmethod
     async def save_unsent_messages(self, messages: Dict[str, list]):
-        pass
+        """Replace all stored messages. Prefer incremental methods below"""
 
     @abstractmethod
     async def load_unsent_messages(self) -> Dict[str, list]:
-        pass
+        """
+        Load messages grouped by queue in original order.
+        Each message has `key` of its record besides `name` and `body`
+        """
+
+    @abstractmethod
+    def iter_unsent_messages(self, batch_size: int) -> AsyncIterator[Tuple[str, list]]:
+        """
+        Iterate over stored messages page by page in (queue, order) order.
+        Yields queue name and up to `batch_size` messages of that queue,
+        in the same format as `load_unsent_messages`
+        """
+
+    @abstractmethod
+    async def append_unsent_messages(self, messages: Dict[str, dict]) -> None:
+        """
+        Store messages given by record key. Each message has
+        `queue`, `order`, `name` and `body`. Existing keys are overwritten
+        """
+
+    @abstractmethod
+    async def remove_unsent_messages(self, keys: List[str]) -> None:
+        """Remove messages which have been sent. Missing keys are ignored"""
 
 class IDatabase(metaclass=ABCMeta):
 
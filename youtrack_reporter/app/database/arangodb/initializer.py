@@ -3,6 +3,7 @@ from aioarangodb import ArangoClient
 
 from youtrack_reporter.app.settings import AppSettings, CollectionSettings
 
+from youtrack_reporter.app.startup import gather_all
 from ..errors import DatabaseError
 import logging
 
@@ -126,9 +127,33 @@ class ArangoDBInitializer(ArangoDBBaseInitializer):
             ]
         )
 
+    async def _create_all_indexes(self):
+        # Unsent messages are read page by page in (queue, order) order
+        col_messages = self._db[self._collections.unsent_messages]
+        await col_messages.add_persistent_index(["queue", "order"], name="queue_order")
+
+        # Configs are listed page by page in _key order, optionally filtered
+        col_configs = self._db[self._collections.configs]
+        await gather_all(
+            col_configs.add_persistent_index(["url", "project", "_key"], name="url_project"),
+            col_configs.add_persistent_index(["url", "_key"], name="url"),
+            col_configs.add_persistent_index(["project", "_key"], name="project"),
+        )
+
+    async def _create_collections_and_indexes(self):
+        await self._create_all_collections()
+        await self._create_all_indexes()
+
+    async def _check_permissions_and_create_collections(self):
+        # Both need only successful authentication, so run them concurrently
+        await gather_all(
+            self._check_user_permissions(),
+            self._create_collections_and_indexes(),
+        )
+
     def get_init_tasks(self):
-        yield from super().get_init_tasks()
-        yield "Create collections", self._create_all_collections()
+        yield "Authentication", self._verify_auth()
+        yield "Check permissions, create collections", self._check_permissions_and_create_collections()
 
     @staticmethod
     async def create(settings):
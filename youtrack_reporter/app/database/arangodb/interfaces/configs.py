@@ -1,10 +1,16 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
 
 from youtrack_reporter.app.database.arangodb.interfaces.base import DBBase
-from youtrack_reporter.app.database.errors import DBAlreadyExistsError, DBRecordNotFoundError
+from youtrack_reporter.app.database.errors import (
+    DatabaseError,
+    DBAlreadyExistsError,
+    DBRecordNotFoundError,
+    DBRevisionMismatchError,
+)
 from youtrack_reporter.app.database.orm import ORMConfig
 from youtrack_reporter.app.database.abstract import IConfigs
+from youtrack_reporter.app.metrics import measured_db
 from .util import (
     dbkey_to_id,
     id_to_dbkey,
@@ -14,6 +20,7 @@ from .util import (
 )
 
 if TYPE_CHECKING:
+    from aioarangodb.cursor import Cursor
     from aioarangodb.database import StandardDatabase
     from aioarangodb.collection import StandardCollection
     from youtrack_reporter.app.settings import CollectionSettings
@@ -32,6 +39,7 @@ class DBConfigs(DBBase, IConfigs):
         self._col_configs = db[collections.configs]
         super().__init__(db, collections)
 
+    @measured_db("configs.get")
     @maybe_unknown_error
     async def get(self, config_id: str) -> Optional[ORMConfig]:
         doc_dict = await self._col_configs.get(config_id)
@@ -39,6 +47,7 @@ class DBConfigs(DBBase, IConfigs):
             raise DBRecordNotFoundError()
         return ORMConfig.parse_obj(dbkey_to_id(doc_dict))
 
+    @measured_db("configs.insert")
     @maybe_unknown_error
     @maybe_already_exists(DBAlreadyExistsError)
     async def insert(self, config: ORMConfig) -> ORMConfig:
@@ -46,8 +55,47 @@ class DBConfigs(DBBase, IConfigs):
         res = await self._col_configs.insert(config.dict(exclude={'id'}))
         return ORMConfig(**dbkey_to_id({**res, **config.dict()}))
 
+    async def _raise_not_updated(self, config_id: str):
+        # Tells missing document from changed one
+        if await self._col_configs.has(config_id):
+            raise DBRevisionMismatchError()
+        raise DBRecordNotFoundError()
+
+    async def _update_if_rev(self, config: ORMConfig, expected_rev: str):
+        # fmt: off
+        query, variables = """
+            FOR doc IN @@collection
+                FILTER doc._key == @key AND doc.update_rev == @rev
+                UPDATE doc WITH @patch IN @@collection
+                RETURN { old: OLD, new: NEW }
+        """, {
+            "@collection": self._col_configs.name,
+            "key": config.id,
+            "rev": expected_rev,
+            "patch": config.dict(exclude={"id"}),
+        }
+        # fmt: on
+
+        cursor: Cursor = await self._db.aql.execute(query, bind_vars=variables)
+        results = [res async for res in cursor]
+        if not results:
+            await self._raise_not_updated(config.id)
+
+        return (
+            ORMConfig.parse_obj(dbkey_to_id(results[0]["old"])),
+            ORMConfig.parse_obj(dbkey_to_id(results[0]["new"])),
+        )
+
+    @measured_db("configs.update")
     @maybe_unknown_error
-    async def update(self, config: ORMConfig) -> Tuple[ORMConfig, ORMConfig]:
+    async def update(
+        self,
+        config: ORMConfig,
+        expected_rev: Optional[str] = None,
+    ) -> Tuple[ORMConfig, ORMConfig]:
+        if expected_rev is not None:
+            return await self._update_if_rev(config, expected_rev)
+
         doc_dict = id_to_dbkey(config.dict())
         res = await self._col_configs.update(
             doc_dict, 
@@ -63,8 +111,161 @@ class DBConfigs(DBBase, IConfigs):
             ORMConfig(**res['new'], id=res['id'])
         )
 
+    async def _delete_if_rev(self, config_id: str, expected_rev: str):
+        # fmt: off
+        query, variables = """
+            FOR doc IN @@collection
+                FILTER doc._key == @key AND doc.update_rev == @rev
+                REMOVE doc IN @@collection
+                RETURN OLD._key
+        """, {
+            "@collection": self._col_configs.name,
+            "key": config_id,
+            "rev": expected_rev,
+        }
+        # fmt: on
+
+        cursor: Cursor = await self._db.aql.execute(query, bind_vars=variables)
+        if not [key async for key in cursor]:
+            await self._raise_not_updated(config_id)
+
+    @measured_db("configs.delete")
     @maybe_unknown_error
     @maybe_not_found(DBRecordNotFoundError)
-    async def delete(self, config_id: str) -> None:
+    async def delete(self, config_id: str, expected_rev: Optional[str] = None) -> None:
+        if expected_rev is not None:
+            return await self._delete_if_rev(config_id, expected_rev)
+
         await self._col_configs.delete(config_id)
 
+
+    @measured_db("configs.get_many")
+    @maybe_unknown_error
+    async def get_many(self, config_ids: List[str]) -> Dict[str, ORMConfig]:
+        if not config_ids:
+            return {}
+
+        # fmt: off
+        query, variables = """
+            FOR doc IN DOCUMENT(@collection, @keys)
+                RETURN doc
+        """, {
+            "collection": self._col_configs.name,
+            "keys": config_ids,
+        }
+        # fmt: on
+
+        cursor: Cursor = await self._db.aql.execute(query, bind_vars=variables)
+        configs = [ORMConfig.parse_obj(dbkey_to_id(doc)) async for doc in cursor]
+        return {config.id: config for config in configs}
+
+    @measured_db("configs.insert_many")
+    @maybe_unknown_error
+    async def insert_many(self, configs: List[ORMConfig]) -> List[Union[ORMConfig, DatabaseError]]:
+        if not configs:
+            return []
+
+        docs = [config.dict(exclude={"id"}) for config in configs]
+        results = await self._col_configs.insert_many(docs, silent=False)
+
+        # Other documents are inserted anyway, so failures
+        # are reported in place instead of being raised
+        inserted = []
+        for doc, result in zip(docs, results):
+            if isinstance(result, Exception):
+                inserted.append(DatabaseError(result))
+            else:
+                inserted.append(ORMConfig(**doc, id=result["_key"]))
+
+        return inserted
+
+    @measured_db("configs.update_many")
+    @maybe_unknown_error
+    async def update_many(self, configs: List[ORMConfig]) -> Dict[str, Tuple[ORMConfig, ORMConfig]]:
+        if not configs:
+            return {}
+
+        # Missing documents are skipped
+        # fmt: off
+        query, variables = """
+            FOR item IN @items
+                UPDATE item IN @@collection
+                OPTIONS { ignoreErrors: true }
+                RETURN { old: OLD, new: NEW }
+        """, {
+            "@collection": self._col_configs.name,
+            "items": [id_to_dbkey(config.dict()) for config in configs],
+        }
+        # fmt: on
+
+        updated = {}
+        cursor: Cursor = await self._db.aql.execute(query, bind_vars=variables)
+        async for res in cursor:
+            if res["old"] is None:
+                continue
+            old = ORMConfig.parse_obj(dbkey_to_id(res["old"]))
+            new = ORMConfig.parse_obj(dbkey_to_id(res["new"]))
+            updated[old.id] = (old, new)
+
+        return updated
+
+    @measured_db("configs.delete_many")
+    @maybe_unknown_error
+    async def delete_many(self, config_ids: List[str]) -> List[str]:
+        if not config_ids:
+            return []
+
+        # fmt: off
+        query, variables = """
+            FOR key IN @keys
+                REMOVE key IN @@collection
+                OPTIONS { ignoreErrors: true }
+                RETURN OLD._key
+        """, {
+            "@collection": self._col_configs.name,
+            "keys": config_ids,
+        }
+        # fmt: on
+
+        cursor: Cursor = await self._db.aql.execute(query, bind_vars=variables)
+        deleted = {key async for key in cursor if key is not None}
+        return [config_id for config_id in config_ids if config_id not in deleted]
+
+    @measured_db("configs.get_page")
+    @maybe_unknown_error
+    async def get_page(
+        self,
+        limit: int,
+        after: Optional[str] = None,
+        url: Optional[str] = None,
+        project: Optional[str] = None,
+    ) -> List[ORMConfig]:
+
+        # Only given filters are added to the query, so that
+        # persistent index on (filters..., _key) serves it entirely
+        filters = []
+        variables = {
+            "@collection": self._col_configs.name,
+            "limit": limit,
+        }
+
+        if url is not None:
+            filters.append("FILTER doc.url == @url")
+            variables["url"] = url
+        if project is not None:
+            filters.append("FILTER doc.project == @project")
+            variables["project"] = project
+        if after is not None:
+            filters.append("FILTER doc._key > @after")
+            variables["after"] = after
+
+        query = f"""
+            FOR doc IN @@collection
+                {" ".join(filters)}
+                SORT doc._key
+                LIMIT @limit
+                RETURN doc
+        """
+
+        cursor: Cursor = await self._db.aql.execute(query, bind_vars=variables)
+        return [ORMConfig.parse_obj(dbkey_to_id(doc)) async for doc in cursor]
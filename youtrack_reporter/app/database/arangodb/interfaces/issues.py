@@ -1,9 +1,14 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+import time
 
 from youtrack_reporter.app.database.arangodb.interfaces.base import DBBase
 from youtrack_reporter.app.database.errors import DBAlreadyExistsError, DBRecordNotFoundError
 from youtrack_reporter.app.database.abstract import IIssues
+from youtrack_reporter.app.database.orm import ORMIssue, ORMIssueDescription
+from aioarangodb.errno import UNIQUE_CONSTRAINT_VIOLATED
+from aioarangodb.exceptions import DocumentInsertError
+from youtrack_reporter.app.metrics import measured_db
 from .util import (
     maybe_already_exists,
     maybe_not_found,
@@ -11,6 +16,7 @@ from .util import (
 )
 
 if TYPE_CHECKING:
+    from aioarangodb.cursor import Cursor
     from aioarangodb.database import StandardDatabase
     from aioarangodb.collection import StandardCollection
     from youtrack_reporter.app.settings import CollectionSettings
@@ -29,6 +35,26 @@ class DBIssues(DBBase, IIssues):
         self._col_issues = db[collections.issues]
         super().__init__(db, collections)
 
+    @staticmethod
+    def _to_orm(doc_dict: dict) -> ORMIssue:
+        return ORMIssue(
+            crash_id=doc_dict["_key"],
+            issue_id=doc_dict.get("issue_id"),
+            pending=doc_dict.get("pending", False),
+            reserved_at=doc_dict.get("reserved_at"),
+            duplicate_count=doc_dict.get("duplicate_count", 0),
+            description=doc_dict.get("description"),
+        )
+
+    @measured_db("issues.get")
+    @maybe_unknown_error
+    async def get(self, crash_id: str) -> ORMIssue:
+        doc_dict = await self._col_issues.get(crash_id)
+        if doc_dict is None:
+            raise DBRecordNotFoundError()
+        return self._to_orm(doc_dict)
+
+    @measured_db("issues.get_issue")
     @maybe_unknown_error
     async def get_issue(self, crash_id: str) -> Optional[str]:
         doc_dict = await self._col_issues.get(crash_id)
@@ -36,11 +62,197 @@ class DBIssues(DBBase, IIssues):
             raise DBRecordNotFoundError()
         return doc_dict['issue_id']
 
+    @measured_db("issues.get_issues")
+    @maybe_unknown_error
+    async def get_issues(self, crash_ids: List[str]) -> Dict[str, ORMIssue]:
+        if not crash_ids:
+            return {}
+
+        # fmt: off
+        query, variables = """
+            FOR doc IN DOCUMENT(@collection, @keys)
+                RETURN doc
+        """, {
+            "collection": self._col_issues.name,
+            "keys": crash_ids,
+        }
+        # fmt: on
+
+        cursor: Cursor = await self._db.aql.execute(query, bind_vars=variables)
+        return {doc["_key"]: self._to_orm(doc) async for doc in cursor}
+
+    @measured_db("issues.insert")
     @maybe_unknown_error
     @maybe_already_exists(DBAlreadyExistsError)
-    async def insert(self, crash_id: str, issue_id: str) -> None:
+    async def insert(
+        self,
+        crash_id: str,
+        issue_id: str,
+        description: Optional[ORMIssueDescription] = None,
+    ) -> None:
+        doc_dict = {
+            "_key": crash_id,
+            "issue_id": issue_id,
+            "duplicate_count": 0,
+            "description": description.dict() if description else None,
+        }
+        await self._col_issues.insert(doc_dict)
+
+    @measured_db("issues.reserve")
+    @maybe_unknown_error
+    async def reserve(self, crash_id: str, lease: float) -> Optional[ORMIssue]:
+        now = time.time()
         doc_dict = {
             "_key": crash_id,
-            "issue_id": issue_id
+            "issue_id": None,
+            "pending": True,
+            "reserved_at": now,
+        }
+
+        try:
+            await self._col_issues.insert(doc_dict)
+            return None
+        except DocumentInsertError as e:
+            if e.error_code != UNIQUE_CONSTRAINT_VIOLATED:
+                raise
+
+        # Take over reservation left by a dead consumer.
+        # Single document operation is atomic, so only one wins
+        # fmt: off
+        query, variables = """
+            FOR doc IN @@collection
+                FILTER doc._key == @key
+                FILTER doc.pending == true AND doc.reserved_at < @expired
+                UPDATE doc WITH { reserved_at: @now } IN @@collection
+                RETURN NEW
+        """, {
+            "@collection": self._col_issues.name,
+            "key": crash_id,
+            "expired": now - lease,
+            "now": now,
         }
-        await self._col_issues.insert(doc_dict)
\ No newline at end of file
+        # fmt: on
+
+        cursor: Cursor = await self._db.aql.execute(query, bind_vars=variables)
+        if [doc async for doc in cursor]:
+            return None
+
+        doc_dict = await self._col_issues.get(crash_id)
+        if doc_dict is None:
+            # Reservation has just been released. Let caller try again later
+            return ORMIssue(crash_id=crash_id, pending=True, reserved_at=now)
+
+        return self._to_orm(doc_dict)
+
+    @measured_db("issues.commit")
+    @maybe_unknown_error
+    @maybe_not_found(DBRecordNotFoundError)
+    async def commit(
+        self,
+        crash_id: str,
+        issue_id: str,
+        description: Optional[ORMIssueDescription] = None,
+    ) -> None:
+        doc_dict = {
+            "_key": crash_id,
+            "issue_id": issue_id,
+            "pending": False,
+            "duplicate_count": 0,
+            "description": description.dict() if description else None,
+        }
+        await self._col_issues.update(doc_dict)
+
+    @measured_db("issues.commit_many")
+    @maybe_unknown_error
+    async def commit_many(
+        self,
+        issues: List[Tuple[str, str, Optional[ORMIssueDescription]]],
+    ) -> List[str]:
+        if not issues:
+            return []
+
+        items = [
+            {
+                "_key": crash_id,
+                "issue_id": issue_id,
+                "description": description.dict() if description else None,
+            }
+            for crash_id, issue_id, description in issues
+        ]
+
+        # Missing documents are skipped, only updated keys are returned
+        # fmt: off
+        query, variables = """
+            FOR item IN @items
+                UPDATE item WITH {
+                    issue_id: item.issue_id,
+                    pending: false,
+                    duplicate_count: 0,
+                    description: item.description,
+                } IN @@collection
+                OPTIONS { ignoreErrors: true, mergeObjects: false }
+                RETURN NEW._key
+        """, {
+            "@collection": self._col_issues.name,
+            "items": items,
+        }
+        # fmt: on
+
+        cursor: Cursor = await self._db.aql.execute(query, bind_vars=variables)
+        committed = {key async for key in cursor}
+        return [item["_key"] for item in items if item["_key"] not in committed]
+
+    @measured_db("issues.release")
+    @maybe_unknown_error
+    async def release(self, crash_id: str) -> None:
+        # fmt: off
+        query, variables = """
+            FOR doc IN @@collection
+                FILTER doc._key == @key AND doc.pending == true
+                REMOVE doc IN @@collection
+        """, {
+            "@collection": self._col_issues.name,
+            "key": crash_id,
+        }
+        # fmt: on
+
+        await self._db.aql.execute(query, bind_vars=variables)
+
+    @measured_db("issues.update_description")
+    @maybe_unknown_error
+    async def update_description(self, crash_id: str, description: ORMIssueDescription) -> None:
+        # Description is replaced, not merged with the stored one
+        # fmt: off
+        query, variables = """
+            UPDATE @key WITH { description: @description } IN @@collection
+            OPTIONS { mergeObjects: false }
+        """, {
+            "@collection": self._col_issues.name,
+            "key": crash_id,
+            "description": description.dict(),
+        }
+        # fmt: on
+
+        await self._db.aql.execute(query, bind_vars=variables)
+
+    @measured_db("issues.update_duplicate_count")
+    @maybe_unknown_error
+    async def update_duplicate_count(self, crash_id: str, duplicate_count: int) -> None:
+        # fmt: off
+        query, variables = """
+            FOR doc IN @@collection
+                FILTER doc._key == @key
+                UPDATE doc WITH {
+                    duplicate_count: MAX([doc.duplicate_count, @count]),
+                } IN @@collection
+                RETURN 1
+        """, {
+            "@collection": self._col_issues.name,
+            "key": crash_id,
+            "count": duplicate_count,
+        }
+        # fmt: on
+
+        cursor: Cursor = await self._db.aql.execute(query, bind_vars=variables)
+        if not [row async for row in cursor]:
+            raise DBRecordNotFoundError()
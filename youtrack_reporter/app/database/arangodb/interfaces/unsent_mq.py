@@ -1,9 +1,11 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING, Dict
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional, Tuple
+from itertools import groupby
 
 from ...abstract import IUnsentMessages
 
 from .base import DBBase
+from youtrack_reporter.app.metrics import measured_db
 from .util import maybe_unknown_error
 
 if TYPE_CHECKING:
@@ -19,11 +21,15 @@ class DBUnsentMessages(DBBase, IUnsentMessages):
     _db: StandardDatabase
     _col_messages: StandardCollection
 
+    # Documents fetched from server per round trip
+    _batch_size: int = 1000
+
     def __init__(self, db: StandardDatabase, collections: CollectionSettings):
         self._col_messages = db[collections.unsent_messages]
         self._db = db
         super().__init__(db, collections)
 
+    @measured_db("unsent_mq.save_unsent_messages")
     @maybe_unknown_error
     async def save_unsent_messages(self, unsent_messages: Dict[str, list]):
 
@@ -46,41 +52,122 @@ class DBUnsentMessages(DBBase, IUnsentMessages):
             if docs:
                 await self._col_messages.insert_many(docs)
 
+    @measured_db("unsent_mq.load_unsent_messages")
     @maybe_unknown_error
     async def load_unsent_messages(self) -> Dict[str, list]:
 
+        # Streaming cursor doesn't build the whole result on server
         # fmt: off
         query, variables = """
             FOR msg in @@collection
-                SORT msg.order
-                COLLECT queue = msg.queue INTO groupedByQueue
-                RETURN groupedByQueue[*].msg
+                SORT msg.queue, msg.order
+                RETURN msg
         """, {
             "@collection": self._col_messages.name,
         }
         # fmt: on
 
+        cursor: Cursor = await self._db.aql.execute(
+            query,
+            bind_vars=variables,
+            batch_size=self._batch_size,
+            stream=True,
+        )
+
         unsent_messages: Dict[str, list] = {}
-        cursor: Cursor = await self._db.aql.execute(query, bind_vars=variables)
-        grouped_by_queue = [doc async for doc in cursor]
+        async for message in cursor:
+            mq_message = {
+                "key": message["_key"],
+                "name": message["name"],
+                "body": message["body"],
+            }
+            unsent_messages.setdefault(message["queue"], []).append(mq_message)
 
-        for grouped_messages in grouped_by_queue:
-            for message in grouped_messages:
+        return unsent_messages
 
-                mq_message = {
-                    "name": message["name"],
-                    "body": message["body"],
-                }
+    @measured_db("unsent_mq.fetch_unsent_messages")
+    @maybe_unknown_error
+    async def _fetch_page(self, after: Optional[Tuple[str, int]], limit: int) -> List[dict]:
 
-                queue = message["queue"]
+        variables = {
+            "@collection": self._col_messages.name,
+            "limit": limit,
+        }
 
-                try:
-                    messages = unsent_messages[queue]
-                    messages.append(mq_message)
+        # Keyset pagination over (queue, order) index.
+        # Unlike OFFSET, cost of a page doesn't grow with its position
+        page_filter = ""
+        if after is not None:
+            page_filter = """
+                FILTER msg.queue > @queue
+                    OR (msg.queue == @queue AND msg.order > @order)
+            """
+            variables.update(queue=after[0], order=after[1])
 
-                except KeyError:
-                    messages = list()
-                    messages.append(mq_message)
-                    unsent_messages[queue] = messages
+        # fmt: off
+        query = f"""
+            FOR msg IN @@collection
+                {page_filter}
+                SORT msg.queue, msg.order
+                LIMIT @limit
+                RETURN msg
+        """
+        # fmt: on
 
-        return unsent_messages
+        cursor: Cursor = await self._db.aql.execute(
+            query,
+            bind_vars=variables,
+            batch_size=limit,
+        )
+        return [doc async for doc in cursor]
+
+    async def iter_unsent_messages(self, batch_size: int) -> AsyncIterator[Tuple[str, list]]:
+
+        after = None
+        while True:
+            docs = await self._fetch_page(after, batch_size)
+            if not docs:
+                break
+
+            for queue_name, group in groupby(docs, key=lambda doc: doc["queue"]):
+                yield queue_name, [
+                    {
+                        "key": doc["_key"],
+                        "name": doc["name"],
+                        "body": doc["body"],
+                    }
+                    for doc in group
+                ]
+
+            if len(docs) < batch_size:
+                break
+
+            after = (docs[-1]["queue"], docs[-1]["order"])
+
+    @measured_db("unsent_mq.append_unsent_messages")
+    @maybe_unknown_error
+    async def append_unsent_messages(self, messages: Dict[str, dict]) -> None:
+        if not messages:
+            return
+
+        docs = [{**message, "_key": key} for key, message in messages.items()]
+        await self._col_messages.insert_many(docs, overwrite=True, silent=True)
+
+    @measured_db("unsent_mq.remove_unsent_messages")
+    @maybe_unknown_error
+    async def remove_unsent_messages(self, keys: List[str]) -> None:
+        if not keys:
+            return
+
+        # fmt: off
+        query, variables = """
+            FOR key IN @keys
+                REMOVE key IN @@collection
+                OPTIONS { ignoreErrors: true }
+        """, {
+            "@collection": self._col_messages.name,
+            "keys": keys,
+        }
+        # fmt: on
+
+        await self._db.aql.execute(query, bind_vars=variables)
@@ -0,0 +1,138 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, Generic, List, Optional, Tuple, TypeVar
+
+import asyncio
+
+from .errors import DBRecordNotFoundError
+
+if TYPE_CHECKING:
+    from .abstract import IIssues
+    from .orm import ORMIssue, ORMIssueDescription
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Returns result or exception for each item
+FlushFunc = Callable[[List[T]], Awaitable[List[R]]]
+
+
+class MicroBatch(Generic[T, R]):
+
+    """
+    Groups items submitted by concurrent callers during `delay`
+    seconds or until `max_size` items are collected, and processes
+    them with single call of flush function. Each submitter receives
+    its own result. If flush fails, all submitters receive its error.
+    """
+
+    _flush: FlushFunc
+    _delay: float
+    _max_size: int
+    _items: List[Tuple[T, asyncio.Future]]
+    _timer: Optional[asyncio.TimerHandle]
+
+    submitted: int
+    batches: int
+
+    def __init__(self, flush: FlushFunc, delay: float, max_size: int):
+        self._flush = flush
+        self._delay = delay
+        self._max_size = max_size
+        self._items = []
+        self._timer = None
+        self.submitted = 0
+        self.batches = 0
+
+    async def submit(self, item: T) -> R:
+
+        future = asyncio.get_running_loop().create_future()
+        self._items.append((item, future))
+        self.submitted += 1
+
+        if len(self._items) >= self._max_size:
+            self._flush_now()
+        elif self._timer is None:
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_later(self._delay, self._flush_now)
+
+        return await future
+
+    def _flush_now(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        items, self._items = self._items, []
+        asyncio.ensure_future(self._run(items))
+
+    async def _run(self, items: List[Tuple[T, asyncio.Future]]):
+
+        self.batches += 1
+        try:
+            results = await self._flush([item for item, _ in items])
+        except Exception as e:
+            results = [e] * len(items)
+        except BaseException:
+            # Cancelled (e.g. at shutdown): submitters must not wait forever
+            for _, future in items:
+                future.cancel()
+            raise
+
+        for (_, future), result in zip(items, results):
+            # Submitter may have been cancelled meanwhile
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, float]:
+        return dict(
+            pending=len(self._items),
+            submitted=self.submitted,
+            batches=self.batches,
+        )
+
+
+class IssueBatcher:
+
+    """
+    Merges lookups and writes of issues made by concurrent
+    consumers into batch database requests. During crash storms
+    this replaces a round trip per message with a round trip per batch.
+    """
+
+    _issues: IIssues
+    _get: MicroBatch[str, ORMIssue]
+    _commit: MicroBatch[Tuple[str, str, Optional[ORMIssueDescription]], None]
+
+    def __init__(self, issues: IIssues, delay: float, max_size: int):
+        self._issues = issues
+        self._get = MicroBatch(self._get_many, delay, max_size)
+        self._commit = MicroBatch(self._commit_many, delay, max_size)
+
+    async def _get_many(self, crash_ids: List[str]):
+        issues = await self._issues.get_issues(list(set(crash_ids)))
+        return [issues.get(crash_id) or DBRecordNotFoundError() for crash_id in crash_ids]
+
+    async def _commit_many(self, items: List[Tuple[str, str, Optional[ORMIssueDescription]]]):
+        missing = set(await self._issues.commit_many(items))
+        return [DBRecordNotFoundError() if crash_id in missing else None for crash_id, _, _ in items]
+
+    async def get(self, crash_id: str) -> ORMIssue:
+        return await self._get.submit(crash_id)
+
+    async def commit(
+        self,
+        crash_id: str,
+        issue_id: str,
+        description: Optional[ORMIssueDescription] = None,
+    ) -> None:
+        await self._commit.submit((crash_id, issue_id, description))
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return dict(
+            get=self._get.stats(),
+            commit=self._commit.stats(),
+        )
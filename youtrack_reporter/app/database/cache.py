@@ -0,0 +1,110 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+from collections import OrderedDict
+
+import logging
+import time
+
+if TYPE_CHECKING:
+    from youtrack_reporter.app.settings import CacheSettings
+    from youtrack_reporter.app.database.abstract import IConfigs
+    from youtrack_reporter.app.database.orm import ORMConfig
+
+
+class ConfigCache:
+
+    """
+    Read-through LRU cache of configs with limited lifetime of entries.
+    Used by message consumers to avoid database lookup on every crash.
+    """
+
+    _logger: logging.Logger
+    _configs: IConfigs
+    _entries: "OrderedDict[str, Tuple[float, ORMConfig]]"
+    _max_size: int
+    _ttl: float
+    _generation: int
+
+    hits: int
+    misses: int
+
+    def __init__(self, configs: IConfigs, settings: CacheSettings):
+        self._logger = logging.getLogger("db.cache")
+        self._configs = configs
+        self._entries = OrderedDict()
+        self._max_size = settings.config_max_size
+        self._ttl = settings.config_ttl
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, config_id: str) -> Optional[ORMConfig]:
+        entry = self._entries.get(config_id)
+        if entry is None:
+            return None
+
+        expires_at, config = entry
+        if expires_at <= time.monotonic():
+            del self._entries[config_id]
+            return None
+
+        self._entries.move_to_end(config_id)
+        return config
+
+    async def get(self, config_id: str) -> ORMConfig:
+        config = self._lookup(config_id)
+        if config is not None:
+            self.hits += 1
+            return config.copy()
+
+        self.misses += 1
+        generation = self._generation
+        config = await self._configs.get(config_id)
+
+        # Config might have been changed while we were waiting for database.
+        # In that case result can be outdated, so do not store it
+        if generation == self._generation:
+            self.put(config)
+
+        return config.copy()
+
+    def put(self, config: ORMConfig):
+        if self._max_size <= 0:
+            return
+
+        expires_at = time.monotonic() + self._ttl
+        self._entries[config.id] = (expires_at, config.copy())
+        self._entries.move_to_end(config.id)
+
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, config_id: str, update_rev: Optional[str] = None):
+
+        """
+        Drop cached config. If `update_rev` is provided,
+        config is dropped only when cached revision differs from it.
+        """
+
+        self._generation += 1
+        entry = self._entries.get(config_id)
+        if entry is None:
+            return
+
+        _, config = entry
+        if update_rev is None or config.update_rev != update_rev:
+            self._logger.debug("Config '%s' invalidated", config_id)
+            del self._entries[config_id]
+
+    def clear(self):
+        self._generation += 1
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        return dict(
+            size=len(self._entries),
+            max_size=self._max_size,
+            ttl=self._ttl,
+            hits=self.hits,
+            misses=self.misses,
+        )
@@ -10,5 +10,9 @@ class DBRecordNotFoundError(DatabaseError):
     pass
 
 
+class DBRevisionMismatchError(DatabaseError):
+    """Record has revision other than expected one"""
+
+
 class DBFuzzerNotFoundError(DBRecordNotFoundError):
     pass
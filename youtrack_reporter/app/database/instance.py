@@ -1,7 +1,6 @@
 from __future__ import annotations
 from typing import TYPE_CHECKING
 
-from .arangodb.database import ArangoDB
 import logging
 
 if TYPE_CHECKING:
@@ -14,9 +13,20 @@ async def db_init(settings: AppSettings) -> IDatabase:
     logger = logging.getLogger("db")
     db_engine = settings.database.engine.lower()
 
+    # Drivers are imported on demand: unused ones
+    # shouldn't slow down startup or be installed at all
     if db_engine == "arangodb":
         logger.info("Using ArangoDB driver")
+        from .arangodb.database import ArangoDB
         db = await ArangoDB.create(settings)
+    elif db_engine == "memory":
+        logger.info("Using in-memory database")
+        from .memory.database import MemoryDB
+        db = await MemoryDB.create(settings)
+    elif db_engine == "sqlite":
+        logger.info("Using SQLite driver")
+        from .sqlite.database import SQLiteDB
+        db = await SQLiteDB.create(settings)
     else:
         raise ValueError(f"Invalid database engine '{db_engine}'")
 
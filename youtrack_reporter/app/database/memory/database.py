@@ -0,0 +1,97 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Optional
+
+import asyncio
+import logging
+
+from .storage import MemoryStorage
+from .interfaces.configs import MemoryConfigs
+from .interfaces.issues import MemoryIssues
+from .interfaces.unsent_mq import MemoryUnsentMessages
+from ..abstract import IDatabase
+
+if TYPE_CHECKING:
+    from youtrack_reporter.app.settings import AppSettings
+    from ..abstract import IConfigs, IIssues, IUnsentMessages
+
+
+class MemoryDB(IDatabase):
+
+    """
+    Database kept in process memory. Suitable for tests, benchmarks
+    and single-node deployments. If snapshot path is configured, data
+    is restored at startup and saved periodically and on close.
+    """
+
+    _db_configs: IConfigs
+    _db_issues: IIssues
+    _db_unsent_mq: IUnsentMessages
+
+    _logger: logging.Logger
+    _storage: MemoryStorage
+    _snapshot_path: Optional[str]
+    _snapshot_task: Optional[asyncio.Task]
+    _is_closed: bool
+
+    @property
+    def unsent_mq(self):
+        return self._db_unsent_mq
+
+    @property
+    def configs(self):
+        return self._db_configs
+
+    @property
+    def issues(self) -> IIssues:
+        return self._db_issues
+
+    @property
+    def storage(self):
+        return self._storage
+
+    async def _init(self, settings: Optional[AppSettings]):
+
+        self._logger = logging.getLogger("db")
+        self._storage = MemoryStorage()
+        self._snapshot_task = None
+        self._snapshot_path = None
+        self._is_closed = False
+
+        if settings is not None:
+            self._snapshot_path = settings.database.snapshot_path
+            self._storage.load_snapshot(self._snapshot_path)
+
+            interval = settings.database.snapshot_interval
+            if self._snapshot_path and interval > 0:
+                self._snapshot_task = asyncio.ensure_future(self._snapshot_loop(interval))
+
+        self._db_configs = MemoryConfigs(self._storage)
+        self._db_issues = MemoryIssues(self._storage)
+        self._db_unsent_mq = MemoryUnsentMessages(self._storage)
+
+    async def _snapshot_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self._storage.save_snapshot(self._snapshot_path)
+            except OSError as e:
+                self._logger.error("Failed to save snapshot. Reason - %s", e)
+
+    @staticmethod
+    async def create(settings: Optional[AppSettings] = None):
+        _self = MemoryDB()
+        await _self._init(settings)
+        return _self
+
+    async def close(self):
+
+        if self._is_closed:
+            self._logger.warning(f"Database is already closed")
+            return
+
+        if self._snapshot_task is not None:
+            self._snapshot_task.cancel()
+            self._snapshot_task = None
+
+        await self._storage.save_snapshot(self._snapshot_path)
+        self._is_closed = True
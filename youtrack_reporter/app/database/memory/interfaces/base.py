@@ -0,0 +1,13 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from youtrack_reporter.app.database.memory.storage import MemoryStorage
+
+
+class MemoryBase:
+
+    _storage: MemoryStorage
+
+    def __init__(self, storage: MemoryStorage):
+        self._storage = storage
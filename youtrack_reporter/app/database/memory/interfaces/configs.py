@@ -0,0 +1,119 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
+from bisect import bisect_right
+
+from youtrack_reporter.app.database.memory.interfaces.base import MemoryBase
+from youtrack_reporter.app.database.errors import DatabaseError, DBRecordNotFoundError, DBRevisionMismatchError
+from youtrack_reporter.app.database.orm import ORMConfig
+from youtrack_reporter.app.metrics import measured_db
+from youtrack_reporter.app.database.abstract import IConfigs
+
+if TYPE_CHECKING:
+    from youtrack_reporter.app.database.memory.storage import MemoryStorage
+
+
+class MemoryConfigs(MemoryBase, IConfigs):
+
+    @measured_db("configs.get")
+    async def get(self, config_id: str) -> Optional[ORMConfig]:
+        doc_dict = self._storage.configs.get(config_id)
+        if doc_dict is None:
+            raise DBRecordNotFoundError()
+        return ORMConfig(**doc_dict, id=config_id)
+
+    @measured_db("configs.insert")
+    async def insert(self, config: ORMConfig) -> ORMConfig:
+        config_id = self._storage.next_config_id()
+        doc_dict = config.dict(exclude={"id"})
+        self._storage.add_config(config_id, doc_dict)
+        return ORMConfig(**doc_dict, id=config_id)
+
+    def _check_rev(self, config_id: str, expected_rev: Optional[str]) -> dict:
+        doc_dict = self._storage.configs.get(config_id)
+        if doc_dict is None:
+            raise DBRecordNotFoundError()
+        if expected_rev is not None and doc_dict["update_rev"] != expected_rev:
+            raise DBRevisionMismatchError()
+        return doc_dict
+
+    @measured_db("configs.update")
+    async def update(
+        self,
+        config: ORMConfig,
+        expected_rev: Optional[str] = None,
+    ) -> Tuple[ORMConfig, ORMConfig]:
+        old = self._check_rev(config.id, expected_rev)
+
+        new = {**old, **config.dict(exclude={"id"})}
+        self._storage.configs[config.id] = new
+
+        return (
+            ORMConfig(**old, id=config.id),
+            ORMConfig(**new, id=config.id),
+        )
+
+    @measured_db("configs.delete")
+    async def delete(self, config_id: str, expected_rev: Optional[str] = None) -> None:
+        self._check_rev(config_id, expected_rev)
+        self._storage.pop_config(config_id)
+
+    @measured_db("configs.get_many")
+    async def get_many(self, config_ids: List[str]) -> Dict[str, ORMConfig]:
+        configs = self._storage.configs
+        return {
+            config_id: ORMConfig(**configs[config_id], id=config_id)
+            for config_id in config_ids
+            if config_id in configs
+        }
+
+    @measured_db("configs.insert_many")
+    async def insert_many(self, configs: List[ORMConfig]) -> List[Union[ORMConfig, DatabaseError]]:
+        return [await self.insert(config) for config in configs]
+
+    @measured_db("configs.update_many")
+    async def update_many(self, configs: List[ORMConfig]) -> Dict[str, Tuple[ORMConfig, ORMConfig]]:
+        updated = {}
+        for config in configs:
+            if config.id in self._storage.configs:
+                updated[config.id] = await self.update(config)
+        return updated
+
+    @measured_db("configs.delete_many")
+    async def delete_many(self, config_ids: List[str]) -> List[str]:
+        return [
+            config_id for config_id in config_ids
+            if self._storage.pop_config(config_id) is None
+        ]
+
+    @measured_db("configs.get_page")
+    async def get_page(
+        self,
+        limit: int,
+        after: Optional[str] = None,
+        url: Optional[str] = None,
+        project: Optional[str] = None,
+    ) -> List[ORMConfig]:
+
+        # Ids are increasing numbers. Page starts right after
+        # cursor, found in sorted ids by binary search
+        try:
+            after_id = 0 if after is None else int(after)
+        except ValueError:
+            raise DBRecordNotFoundError()
+
+        keys = self._storage.config_keys
+        configs = self._storage.configs
+
+        page = []
+        for i in range(bisect_right(keys, after_id), len(keys)):
+            if len(page) >= limit:
+                break
+            config_id = str(keys[i])
+            doc_dict = configs[config_id]
+            if url is not None and doc_dict["url"] != url:
+                continue
+            if project is not None and doc_dict["project"] != project:
+                continue
+            page.append(ORMConfig(**doc_dict, id=config_id))
+
+        return page
@@ -0,0 +1,118 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+import time
+
+from youtrack_reporter.app.database.memory.interfaces.base import MemoryBase
+from youtrack_reporter.app.database.errors import DBAlreadyExistsError, DBRecordNotFoundError
+from youtrack_reporter.app.metrics import measured_db
+from youtrack_reporter.app.database.abstract import IIssues
+from youtrack_reporter.app.database.orm import ORMIssue, ORMIssueDescription
+
+if TYPE_CHECKING:
+    from youtrack_reporter.app.database.memory.storage import MemoryStorage
+
+
+class MemoryIssues(MemoryBase, IIssues):
+
+    @staticmethod
+    def _to_orm(crash_id: str, doc_dict: dict) -> ORMIssue:
+        return ORMIssue(crash_id=crash_id, **doc_dict)
+
+    def _get_doc(self, crash_id: str) -> dict:
+        doc_dict = self._storage.issues.get(crash_id)
+        if doc_dict is None:
+            raise DBRecordNotFoundError()
+        return doc_dict
+
+    @measured_db("issues.get")
+    async def get(self, crash_id: str) -> ORMIssue:
+        return self._to_orm(crash_id, self._get_doc(crash_id))
+
+    @measured_db("issues.get_issue")
+    async def get_issue(self, crash_id: str) -> Optional[str]:
+        return self._get_doc(crash_id)["issue_id"]
+
+    @measured_db("issues.get_issues")
+    async def get_issues(self, crash_ids: List[str]) -> Dict[str, ORMIssue]:
+        issues = {}
+        for crash_id in crash_ids:
+            doc_dict = self._storage.issues.get(crash_id)
+            if doc_dict is not None:
+                issues[crash_id] = self._to_orm(crash_id, doc_dict)
+        return issues
+
+    @measured_db("issues.insert")
+    async def insert(
+        self,
+        crash_id: str,
+        issue_id: str,
+        description: Optional[ORMIssueDescription] = None,
+    ) -> None:
+        if crash_id in self._storage.issues:
+            raise DBAlreadyExistsError()
+
+        self._storage.issues[crash_id] = {
+            "issue_id": issue_id,
+            "duplicate_count": 0,
+            "description": description.dict() if description else None,
+        }
+
+    @measured_db("issues.reserve")
+    async def reserve(self, crash_id: str, lease: float) -> Optional[ORMIssue]:
+        now = time.time()
+        doc_dict = self._storage.issues.get(crash_id)
+
+        if doc_dict is not None:
+            expired = doc_dict.get("pending") and doc_dict["reserved_at"] < now - lease
+            if not expired:
+                return self._to_orm(crash_id, doc_dict)
+
+        self._storage.issues[crash_id] = {
+            "issue_id": None,
+            "pending": True,
+            "reserved_at": now,
+        }
+        return None
+
+    @measured_db("issues.commit")
+    async def commit(
+        self,
+        crash_id: str,
+        issue_id: str,
+        description: Optional[ORMIssueDescription] = None,
+    ) -> None:
+        doc_dict = self._get_doc(crash_id)
+        doc_dict.update(
+            issue_id=issue_id,
+            pending=False,
+            duplicate_count=0,
+            description=description.dict() if description else None,
+        )
+
+    @measured_db("issues.commit_many")
+    async def commit_many(
+        self,
+        issues: List[Tuple[str, str, Optional[ORMIssueDescription]]],
+    ) -> List[str]:
+        missing = []
+        for crash_id, issue_id, description in issues:
+            try:
+                await self.commit(crash_id, issue_id, description)
+            except DBRecordNotFoundError:
+                missing.append(crash_id)
+        return missing
+
+    @measured_db("issues.release")
+    async def release(self, crash_id: str) -> None:
+        doc_dict = self._storage.issues.get(crash_id)
+        if doc_dict is not None and doc_dict.get("pending"):
+            del self._storage.issues[crash_id]
+
+    @measured_db("issues.update_description")
+    async def update_description(self, crash_id: str, description: ORMIssueDescription) -> None:
+        self._get_doc(crash_id)["description"] = description.dict()
+
+    @measured_db("issues.update_duplicate_count")
+    async def update_duplicate_count(self, crash_id: str, duplicate_count: int) -> None:
+        doc_dict = self._get_doc(crash_id)
+        doc_dict["duplicate_count"] = max(doc_dict["duplicate_count"], duplicate_count)
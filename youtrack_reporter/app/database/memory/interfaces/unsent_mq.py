@@ -0,0 +1,67 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Tuple
+
+from youtrack_reporter.app.database.memory.interfaces.base import MemoryBase
+from youtrack_reporter.app.metrics import measured_db
+from youtrack_reporter.app.database.abstract import IUnsentMessages
+
+if TYPE_CHECKING:
+    from youtrack_reporter.app.database.memory.storage import MemoryStorage
+
+
+class MemoryUnsentMessages(MemoryBase, IUnsentMessages):
+
+    @measured_db("unsent_mq.save_unsent_messages")
+    async def save_unsent_messages(self, unsent_messages: Dict[str, list]):
+        self._storage.unsent_messages = {
+            f"{queue_name}-{i}": {
+                "queue": queue_name,
+                "order": i,
+                "name": message["name"],
+                "body": message["body"],
+            }
+            for queue_name, messages in unsent_messages.items()
+            for i, message in enumerate(messages)
+        }
+
+    @measured_db("unsent_mq.load_unsent_messages")
+    async def load_unsent_messages(self) -> Dict[str, list]:
+        unsent_messages: Dict[str, list] = {}
+        async for queue_name, messages in self.iter_unsent_messages(1024):
+            unsent_messages.setdefault(queue_name, []).extend(messages)
+        return unsent_messages
+
+    async def iter_unsent_messages(self, batch_size: int) -> AsyncIterator[Tuple[str, list]]:
+
+        entries = sorted(
+            self._storage.unsent_messages.items(),
+            key=lambda item: (item[1]["queue"], item[1]["order"]),
+        )
+
+        page: list = []
+        page_queue = None
+
+        for key, message in entries:
+            if page and (message["queue"] != page_queue or len(page) >= batch_size):
+                yield page_queue, page
+                page = []
+
+            page_queue = message["queue"]
+            page.append({
+                "key": key,
+                "name": message["name"],
+                "body": message["body"],
+            })
+
+        if page:
+            yield page_queue, page
+
+    @measured_db("unsent_mq.append_unsent_messages")
+    async def append_unsent_messages(self, messages: Dict[str, dict]) -> None:
+        for key, message in messages.items():
+            self._storage.unsent_messages[key] = dict(message)
+
+    @measured_db("unsent_mq.remove_unsent_messages")
+    async def remove_unsent_messages(self, keys: List[str]) -> None:
+        for key in keys:
+            self._storage.unsent_messages.pop(key, None)
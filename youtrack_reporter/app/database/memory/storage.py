@@ -0,0 +1,111 @@
+from __future__ import annotations
+from typing import Dict, List, Optional
+from bisect import bisect_left, insort
+
+import asyncio
+import json
+import logging
+import os
+
+
+class MemoryStorage:
+
+    """
+    Documents of all collections kept in process memory.
+    Can be saved to and restored from a json snapshot.
+    """
+
+    _logger: logging.Logger
+
+    _saving: Optional[asyncio.Future]
+
+    configs: Dict[str, dict]
+    # Sorted numeric ids of configs, used for keyset pagination
+    config_keys: List[int]
+    issues: Dict[str, dict]
+    unsent_messages: Dict[str, dict]
+    last_config_id: int
+
+    def __init__(self):
+        self._logger = logging.getLogger("db.memory")
+        self._saving = None
+        self.configs = {}
+        self.config_keys = []
+        self.issues = {}
+        self.unsent_messages = {}
+        self.last_config_id = 0
+
+    def next_config_id(self) -> str:
+        self.last_config_id += 1
+        return str(self.last_config_id)
+
+    def add_config(self, config_id: str, doc_dict: dict):
+        if config_id not in self.configs:
+            insort(self.config_keys, int(config_id))
+        self.configs[config_id] = doc_dict
+
+    def pop_config(self, config_id: str) -> Optional[dict]:
+        doc_dict = self.configs.pop(config_id, None)
+        if doc_dict is not None:
+            key = int(config_id)
+            del self.config_keys[bisect_left(self.config_keys, key)]
+        return doc_dict
+
+    def dump(self) -> dict:
+        return dict(
+            configs=self.configs,
+            issues=self.issues,
+            unsent_messages=self.unsent_messages,
+            last_config_id=self.last_config_id,
+        )
+
+    def restore(self, data: dict):
+        self.configs = data.get("configs", {})
+        self.config_keys = sorted(int(config_id) for config_id in self.configs)
+        self.issues = data.get("issues", {})
+        self.unsent_messages = data.get("unsent_messages", {})
+        self.last_config_id = data.get("last_config_id", 0)
+
+    def load_snapshot(self, path: Optional[str]):
+        if not path or not os.path.exists(path):
+            return
+
+        with open(path) as f:
+            self.restore(json.load(f))
+
+        self._logger.info(
+            "Snapshot '%s' loaded: %d configs, %d issues",
+            path,
+            len(self.configs),
+            len(self.issues),
+        )
+
+    @staticmethod
+    def _write_snapshot(path: str, data: str):
+        # Write to temporary file first, so that
+        # crash during saving doesn't corrupt snapshot
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(tmp_path, path)
+
+    async def save_snapshot(self, path: Optional[str]):
+        if not path:
+            return
+
+        # Previous write may still run in executor, even if its
+        # caller was cancelled. Writes must not overlap
+        if self._saving is not None and not self._saving.done():
+            await asyncio.wait([self._saving])
+
+        # Serialized in event loop to get consistent state,
+        # disk is accessed in executor not to block consumers
+        data = json.dumps(self.dump())
+        loop = asyncio.get_running_loop()
+        self._saving = loop.run_in_executor(None, self._write_snapshot, path, data)
+
+        await self._saving
+        self._logger.debug("Snapshot '%s' saved", path)
@@ -18,4 +18,36 @@ class ORMConfig(BaseModel):
     '''Name of project in YouTrack, where issues would be created'''
 
     project_id: Optional[str]
-    '''Project id inside client's YouTrack'''
\ No newline at end of file
+    '''Project id inside client's YouTrack'''
+
+class ORMIssueDescription(BaseModel):
+    """Parameters used to render description of issue"""
+
+    crash_info: str
+    crash_url: str
+    crash_type: str
+    crash_output: str
+    project_name: str
+    fuzzer_name: str
+    revision_name: str
+    crash_output_attached: bool = False
+    '''`crash_output` is a summary, full output is attached to issue'''
+
+class ORMIssue(BaseModel):
+    crash_id: str
+    '''Unique id of crash'''
+
+    issue_id: Optional[str]
+    '''Id of issue inside client's YouTrack. Missing while issue is being created'''
+
+    pending: bool = False
+    '''Issue creation is reserved by some consumer, but not completed yet'''
+
+    reserved_at: Optional[float]
+    '''Unix time when issue creation was reserved'''
+
+    duplicate_count: int = 0
+    '''Count of duplicates last written to the issue'''
+
+    description: Optional[ORMIssueDescription]
+    '''Description parameters. Missing for issues created by older versions'''
@@ -0,0 +1,102 @@
+from __future__ import annotations
+from typing import Any, Callable, Optional, TypeVar
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import asyncio
+import logging
+import sqlite3
+
+T = TypeVar("T")
+
+
+class SQLiteConnection:
+
+    """
+    Asynchronous wrapper of sqlite connection. All calls are executed
+    one by one in a dedicated thread, which owns the connection, so that
+    event loop is never blocked by disk I/O.
+    """
+
+    _logger: logging.Logger
+    _path: str
+    _timeout: float
+    _conn: Optional[sqlite3.Connection]
+    _executor: Optional[ThreadPoolExecutor]
+
+    def __init__(self, path: str, timeout: float = 5):
+        self._logger = logging.getLogger("db.sqlite")
+        self._path = path
+        self._timeout = timeout
+        self._conn = None
+        self._executor = None
+
+    def _connect(self):
+
+        conn = sqlite3.connect(
+            self._path,
+            timeout=self._timeout,
+            # Transactions are controlled explicitly
+            isolation_level=None,
+            # Statements are compiled once and reused by sql text
+            cached_statements=256,
+        )
+
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+
+        return conn
+
+    async def open(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        try:
+            self._conn = await self._submit(self._connect)
+        except:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            raise
+
+        self._logger.info("Database '%s' opened", self._path)
+
+    async def _submit(self, func: Callable[..., T], *args) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """Call `func(connection, *args)` in the database thread"""
+        return await self._submit(func, self._conn, *args)
+
+    async def close(self):
+        if self._executor is None:
+            return
+
+        if self._conn is not None:
+            await self._submit(self._conn.close)
+            self._conn = None
+
+        self._executor.shutdown(wait=True)
+        self._executor = None
+
+    @property
+    def is_open(self):
+        return self._conn is not None
+
+
+@contextmanager
+def transaction(conn: sqlite3.Connection):
+
+    """
+    Write transaction. Lock is taken at start,
+    so concurrent writers wait instead of failing on commit
+    """
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except:
+        conn.execute("ROLLBACK")
+        raise
+    else:
+        conn.execute("COMMIT")
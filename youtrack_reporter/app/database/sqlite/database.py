@@ -0,0 +1,79 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Optional
+import logging
+
+from .connection import SQLiteConnection
+from .initializer import SQLiteInitializer
+from .interfaces.configs import DBConfigs
+from .interfaces.issues import DBIssues
+from .interfaces.unsent_mq import DBUnsentMessages
+from ..abstract import IDatabase
+
+
+if TYPE_CHECKING:
+    from youtrack_reporter.app.settings import AppSettings
+    from ..abstract import IConfigs, IIssues, IUnsentMessages
+
+
+class SQLiteDB(IDatabase):
+
+    """
+    Embedded database stored in a single file. Suitable for
+    single-node deployments, where running ArangoDB is too heavy
+    """
+
+    _db_configs: IConfigs
+    _db_issues: IIssues
+    _db_unsent_mq: IUnsentMessages
+
+    _logger: logging.Logger
+    _conn: Optional[SQLiteConnection]
+
+    @property
+    def unsent_mq(self):
+        return self._db_unsent_mq
+
+    @property
+    def configs(self):
+        return self._db_configs
+
+    @property
+    def issues(self) -> IIssues:
+        return self._db_issues
+
+    async def _init(self, settings: AppSettings):
+
+        self._conn = None
+        self._logger = logging.getLogger("db")
+
+        conn = SQLiteConnection(settings.database.path, settings.database.busy_timeout)
+        await conn.open()
+
+        try:
+            await SQLiteInitializer(conn, settings.collections).do_init()
+        except:
+            await conn.close()
+            raise
+
+        self._conn = conn
+        self._db_configs = DBConfigs(conn, settings.collections)
+        self._db_issues = DBIssues(conn, settings.collections)
+        self._db_unsent_mq = DBUnsentMessages(conn, settings.collections)
+
+    @staticmethod
+    async def create(settings):
+        _self = SQLiteDB()
+        await _self._init(settings)
+        return _self
+
+    async def close(self):
+
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+        else:
+            self._logger.warning(f"Database connection is already closed")
+
+    def __del__(self):
+        if getattr(self, "_conn", None) is not None:
+            self._logger.error("Database connection has not been closed")
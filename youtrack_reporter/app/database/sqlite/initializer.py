@@ -0,0 +1,92 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+import logging
+import sqlite3
+
+from .connection import transaction
+from .interfaces.util import quote
+
+if TYPE_CHECKING:
+    from youtrack_reporter.app.settings import CollectionSettings
+    from .connection import SQLiteConnection
+
+
+class SQLiteInitializer:
+
+    """Creates tables and indexes if they don't exist"""
+
+    _conn: SQLiteConnection
+    _collections: CollectionSettings
+    _logger: logging.Logger
+
+    def __init__(self, conn: SQLiteConnection, collections: CollectionSettings):
+        self._logger = logging.getLogger("db.init")
+        self._collections = collections
+        self._conn = conn
+
+    def _schema(self):
+
+        configs = quote(self._collections.configs)
+        issues = quote(self._collections.issues)
+        unsent_messages = quote(self._collections.unsent_messages)
+
+        # Ids of deleted configs must not be reused, hence AUTOINCREMENT
+        yield f"""
+            CREATE TABLE IF NOT EXISTS {configs} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                update_rev TEXT NOT NULL,
+                url TEXT NOT NULL,
+                token TEXT NOT NULL,
+                project TEXT NOT NULL,
+                project_id TEXT
+            )
+        """
+
+        # Configs are listed page by page in id order, optionally filtered.
+        # Index entries end with rowid, so they are already in that order
+        for name, columns in (
+            ("url_project", "url, project"),
+            ("url", "url"),
+            ("project", "project"),
+        ):
+            yield f"""
+                CREATE INDEX IF NOT EXISTS {quote(self._collections.configs + "_" + name)}
+                ON {configs} ({columns})
+            """
+
+        # Table is clustered by crash_id, lookups don't need extra index
+        yield f"""
+            CREATE TABLE IF NOT EXISTS {issues} (
+                crash_id TEXT PRIMARY KEY,
+                issue_id TEXT,
+                pending INTEGER NOT NULL DEFAULT 0,
+                reserved_at REAL,
+                duplicate_count INTEGER NOT NULL DEFAULT 0,
+                description TEXT
+            ) WITHOUT ROWID
+        """
+
+        yield f"""
+            CREATE TABLE IF NOT EXISTS {unsent_messages} (
+                key TEXT PRIMARY KEY,
+                queue TEXT NOT NULL,
+                "order" INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                body TEXT NOT NULL
+            ) WITHOUT ROWID
+        """
+
+        yield f"""
+            CREATE INDEX IF NOT EXISTS {quote(self._collections.unsent_messages + "_order")}
+            ON {unsent_messages} (queue, "order")
+        """
+
+    def _create_tables(self, conn: sqlite3.Connection):
+        with transaction(conn):
+            for statement in self._schema():
+                conn.execute(statement)
+
+    async def do_init(self):
+        self._logger.info("Initializing database with tables...")
+        await self._conn.run(self._create_tables)
+        self._logger.info("Initializing database... OK")
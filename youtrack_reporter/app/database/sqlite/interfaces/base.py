@@ -0,0 +1,16 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from youtrack_reporter.app.settings import CollectionSettings
+    from youtrack_reporter.app.database.sqlite.connection import SQLiteConnection
+
+
+class DBBase:
+
+    _conn: SQLiteConnection
+    _collections: CollectionSettings
+
+    def __init__(self, conn: SQLiteConnection, collections: CollectionSettings):
+        self._collections = collections
+        self._conn = conn
@@ -0,0 +1,223 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
+import json
+
+from youtrack_reporter.app.database.sqlite.interfaces.base import DBBase
+from youtrack_reporter.app.database.sqlite.connection import transaction
+from youtrack_reporter.app.database.errors import (
+    DatabaseError,
+    DBAlreadyExistsError,
+    DBRecordNotFoundError,
+    DBRevisionMismatchError,
+)
+from youtrack_reporter.app.database.orm import ORMConfig
+from youtrack_reporter.app.database.abstract import IConfigs
+from youtrack_reporter.app.metrics import measured_db
+from .util import (
+    maybe_already_exists,
+    maybe_unknown_error,
+    quote,
+)
+
+if TYPE_CHECKING:
+    import sqlite3
+    from youtrack_reporter.app.settings import CollectionSettings
+    from youtrack_reporter.app.database.sqlite.connection import SQLiteConnection
+
+
+FIELDS = ("update_rev", "url", "token", "project", "project_id")
+
+
+def _to_rowid(config_id: str) -> int:
+    try:
+        return int(config_id)
+    except (TypeError, ValueError):
+        raise DBRecordNotFoundError()
+
+
+class DBConfigs(DBBase, IConfigs):
+
+    def __init__(
+        self,
+        conn: SQLiteConnection,
+        collections: CollectionSettings,
+    ):
+        super().__init__(conn, collections)
+
+        table = quote(collections.configs)
+        columns = ", ".join(FIELDS)
+        params = ", ".join("?" for _ in FIELDS)
+        assignments = ", ".join(f"{name} = ?" for name in FIELDS)
+
+        self._sql_get = f"SELECT {columns} FROM {table} WHERE id = ?"
+        self._sql_get_many = (
+            f"SELECT id, {columns} FROM {table} "
+            f"WHERE id IN (SELECT value FROM json_each(?))"
+        )
+        self._sql_page = f"SELECT id, {columns} FROM {table} WHERE id > ?"
+        self._sql_insert = f"INSERT INTO {table} ({columns}) VALUES ({params})"
+        self._sql_update = f"UPDATE {table} SET {assignments} WHERE id = ?"
+        self._sql_delete = f"DELETE FROM {table} WHERE id = ?"
+        self._sql_delete_rev = f"DELETE FROM {table} WHERE id = ? AND update_rev = ?"
+
+    @staticmethod
+    def _to_orm(config_id: str, row: sqlite3.Row) -> ORMConfig:
+        return ORMConfig(**dict(zip(FIELDS, row)), id=config_id)
+
+    def _get(self, conn: sqlite3.Connection, config_id: str) -> ORMConfig:
+        row = conn.execute(self._sql_get, (_to_rowid(config_id),)).fetchone()
+        if row is None:
+            raise DBRecordNotFoundError()
+        return self._to_orm(config_id, row)
+
+    @measured_db("configs.get")
+    @maybe_unknown_error
+    async def get(self, config_id: str) -> Optional[ORMConfig]:
+        return await self._conn.run(self._get, config_id)
+
+    def _insert(self, conn: sqlite3.Connection, config: ORMConfig) -> ORMConfig:
+        doc_dict = config.dict(exclude={"id"})
+        cursor = conn.execute(self._sql_insert, [doc_dict[name] for name in FIELDS])
+        return ORMConfig(**doc_dict, id=str(cursor.lastrowid))
+
+    @measured_db("configs.insert")
+    @maybe_unknown_error
+    @maybe_already_exists(DBAlreadyExistsError)
+    async def insert(self, config: ORMConfig) -> ORMConfig:
+        return await self._conn.run(self._insert, config)
+
+    def _update(self, conn: sqlite3.Connection, config: ORMConfig, expected_rev: Optional[str] = None):
+        with transaction(conn):
+            old = self._get(conn, config.id)
+            if expected_rev is not None and old.update_rev != expected_rev:
+                raise DBRevisionMismatchError()
+            new = ORMConfig(**{**old.dict(), **config.dict()})
+            conn.execute(
+                self._sql_update,
+                [*(new.dict()[name] for name in FIELDS), _to_rowid(config.id)],
+            )
+        return old, new
+
+    @measured_db("configs.update")
+    @maybe_unknown_error
+    async def update(
+        self,
+        config: ORMConfig,
+        expected_rev: Optional[str] = None,
+    ) -> Tuple[ORMConfig, ORMConfig]:
+        return await self._conn.run(self._update, config, expected_rev)
+
+    def _delete(self, conn: sqlite3.Connection, config_id: str, expected_rev: Optional[str] = None):
+        if expected_rev is None:
+            cursor = conn.execute(self._sql_delete, (_to_rowid(config_id),))
+        else:
+            params = (_to_rowid(config_id), expected_rev)
+            cursor = conn.execute(self._sql_delete_rev, params)
+
+        if cursor.rowcount == 0:
+            # Tells missing record from changed one
+            self._get(conn, config_id)
+            raise DBRevisionMismatchError()
+
+    @measured_db("configs.delete")
+    @maybe_unknown_error
+    async def delete(self, config_id: str, expected_rev: Optional[str] = None) -> None:
+        await self._conn.run(self._delete, config_id, expected_rev)
+
+    def _get_many(self, conn: sqlite3.Connection, config_ids: List[str]):
+        rowids = []
+        for config_id in config_ids:
+            try:
+                rowids.append(_to_rowid(config_id))
+            except DBRecordNotFoundError:
+                pass
+
+        rows = conn.execute(self._sql_get_many, (json.dumps(rowids),))
+        return {str(row[0]): self._to_orm(str(row[0]), row[1:]) for row in rows}
+
+    @measured_db("configs.get_many")
+    @maybe_unknown_error
+    async def get_many(self, config_ids: List[str]) -> Dict[str, ORMConfig]:
+        if not config_ids:
+            return {}
+        return await self._conn.run(self._get_many, config_ids)
+
+    def _insert_many(self, conn: sqlite3.Connection, configs: List[ORMConfig]):
+        with transaction(conn):
+            return [self._insert(conn, config) for config in configs]
+
+    @measured_db("configs.insert_many")
+    @maybe_unknown_error
+    @maybe_already_exists(DBAlreadyExistsError)
+    async def insert_many(self, configs: List[ORMConfig]) -> List[Union[ORMConfig, DatabaseError]]:
+        if not configs:
+            return []
+        return await self._conn.run(self._insert_many, configs)
+
+    def _update_many(self, conn: sqlite3.Connection, configs: List[ORMConfig]):
+        updated = {}
+        with transaction(conn):
+            for config in configs:
+                try:
+                    old = self._get(conn, config.id)
+                except DBRecordNotFoundError:
+                    continue
+
+                new = ORMConfig(**{**old.dict(), **config.dict()})
+                conn.execute(
+                    self._sql_update,
+                    [*(new.dict()[name] for name in FIELDS), _to_rowid(config.id)],
+                )
+                updated[config.id] = (old, new)
+
+        return updated
+
+    @measured_db("configs.update_many")
+    @maybe_unknown_error
+    async def update_many(self, configs: List[ORMConfig]) -> Dict[str, Tuple[ORMConfig, ORMConfig]]:
+        if not configs:
+            return {}
+        return await self._conn.run(self._update_many, configs)
+
+    def _delete_many(self, conn: sqlite3.Connection, config_ids: List[str]):
+        missing = []
+        with transaction(conn):
+            for config_id in config_ids:
+                try:
+                    self._delete(conn, config_id)
+                except DBRecordNotFoundError:
+                    missing.append(config_id)
+        return missing
+
+    @measured_db("configs.delete_many")
+    @maybe_unknown_error
+    async def delete_many(self, config_ids: List[str]) -> List[str]:
+        if not config_ids:
+            return []
+        return await self._conn.run(self._delete_many, config_ids)
+
+    def _get_page(self, conn: sqlite3.Connection, limit: int, after: int, url, project):
+        sql = self._sql_page
+        params = [after]
+
+        if url is not None:
+            sql += " AND url = ?"
+            params.append(url)
+        if project is not None:
+            sql += " AND project = ?"
+            params.append(project)
+
+        rows = conn.execute(sql + " ORDER BY id LIMIT ?", (*params, limit))
+        return [self._to_orm(str(row[0]), row[1:]) for row in rows]
+
+    @measured_db("configs.get_page")
+    @maybe_unknown_error
+    async def get_page(
+        self,
+        limit: int,
+        after: Optional[str] = None,
+        url: Optional[str] = None,
+        project: Optional[str] = None,
+    ) -> List[ORMConfig]:
+        after_rowid = 0 if after is None else _to_rowid(after)
+        return await self._conn.run(self._get_page, limit, after_rowid, url, project)
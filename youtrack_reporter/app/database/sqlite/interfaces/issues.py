@@ -0,0 +1,203 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+import json
+import time
+
+from youtrack_reporter.app.database.sqlite.interfaces.base import DBBase
+from youtrack_reporter.app.database.sqlite.connection import transaction
+from youtrack_reporter.app.database.errors import DBAlreadyExistsError, DBRecordNotFoundError
+from youtrack_reporter.app.database.abstract import IIssues
+from youtrack_reporter.app.database.orm import ORMIssue, ORMIssueDescription
+from youtrack_reporter.app.metrics import measured_db
+from .util import (
+    maybe_already_exists,
+    maybe_unknown_error,
+    quote,
+)
+
+if TYPE_CHECKING:
+    import sqlite3
+    from youtrack_reporter.app.settings import CollectionSettings
+    from youtrack_reporter.app.database.sqlite.connection import SQLiteConnection
+
+
+def _dump_description(description: Optional[ORMIssueDescription]) -> Optional[str]:
+    return description.json() if description else None
+
+
+class DBIssues(DBBase, IIssues):
+
+    def __init__(
+        self,
+        conn: SQLiteConnection,
+        collections: CollectionSettings,
+    ):
+        super().__init__(conn, collections)
+        table = quote(collections.issues)
+
+        # fmt: off
+        self._sql_get = f"""
+            SELECT crash_id, issue_id, pending, reserved_at, duplicate_count, description
+            FROM {table} WHERE crash_id = ?
+        """
+        self._sql_get_issue = f"SELECT issue_id FROM {table} WHERE crash_id = ?"
+        # Keys are passed as json array, so that the same
+        # prepared statement serves batches of any size
+        self._sql_get_many = f"""
+            SELECT crash_id, issue_id, pending, reserved_at, duplicate_count, description
+            FROM {table} WHERE crash_id IN (SELECT value FROM json_each(?))
+        """
+        self._sql_insert = f"""
+            INSERT INTO {table} (crash_id, issue_id, description)
+            VALUES (?, ?, ?)
+        """
+        # Reservation left by a dead consumer is taken over.
+        # Conflicting row is updated only if reservation is expired
+        self._sql_reserve = f"""
+            INSERT INTO {table} (crash_id, pending, reserved_at)
+            VALUES (?, 1, ?)
+            ON CONFLICT (crash_id) DO UPDATE SET reserved_at = excluded.reserved_at
+            WHERE pending = 1 AND reserved_at < ?
+        """
+        self._sql_commit = f"""
+            UPDATE {table}
+            SET issue_id = ?, pending = 0, duplicate_count = 0, description = ?
+            WHERE crash_id = ?
+        """
+        self._sql_release = f"DELETE FROM {table} WHERE crash_id = ? AND pending = 1"
+        self._sql_update_description = f"""
+            UPDATE {table} SET description = ? WHERE crash_id = ?
+        """
+        self._sql_update_duplicate_count = f"""
+            UPDATE {table} SET duplicate_count = MAX(duplicate_count, ?) WHERE crash_id = ?
+        """
+        # fmt: on
+
+    @staticmethod
+    def _to_orm(row: sqlite3.Row) -> ORMIssue:
+        description = row["description"]
+        return ORMIssue(
+            crash_id=row["crash_id"],
+            issue_id=row["issue_id"],
+            pending=bool(row["pending"]),
+            reserved_at=row["reserved_at"],
+            duplicate_count=row["duplicate_count"],
+            description=json.loads(description) if description else None,
+        )
+
+    def _get(self, conn: sqlite3.Connection, crash_id: str) -> ORMIssue:
+        row = conn.execute(self._sql_get, (crash_id,)).fetchone()
+        if row is None:
+            raise DBRecordNotFoundError()
+        return self._to_orm(row)
+
+    @measured_db("issues.get")
+    @maybe_unknown_error
+    async def get(self, crash_id: str) -> ORMIssue:
+        return await self._conn.run(self._get, crash_id)
+
+    def _get_issue(self, conn: sqlite3.Connection, crash_id: str) -> Optional[str]:
+        row = conn.execute(self._sql_get_issue, (crash_id,)).fetchone()
+        if row is None:
+            raise DBRecordNotFoundError()
+        return row["issue_id"]
+
+    @measured_db("issues.get_issue")
+    @maybe_unknown_error
+    async def get_issue(self, crash_id: str) -> Optional[str]:
+        return await self._conn.run(self._get_issue, crash_id)
+
+    def _get_many(self, conn: sqlite3.Connection, crash_ids: List[str]):
+        rows = conn.execute(self._sql_get_many, (json.dumps(crash_ids),))
+        return {row["crash_id"]: self._to_orm(row) for row in rows}
+
+    @measured_db("issues.get_issues")
+    @maybe_unknown_error
+    async def get_issues(self, crash_ids: List[str]) -> Dict[str, ORMIssue]:
+        if not crash_ids:
+            return {}
+        return await self._conn.run(self._get_many, crash_ids)
+
+    def _insert(self, conn: sqlite3.Connection, *params):
+        conn.execute(self._sql_insert, params)
+
+    @measured_db("issues.insert")
+    @maybe_unknown_error
+    @maybe_already_exists(DBAlreadyExistsError)
+    async def insert(
+        self,
+        crash_id: str,
+        issue_id: str,
+        description: Optional[ORMIssueDescription] = None,
+    ) -> None:
+        params = (crash_id, issue_id, _dump_description(description))
+        await self._conn.run(self._insert, *params)
+
+    def _reserve(self, conn: sqlite3.Connection, crash_id: str, lease: float):
+        now = time.time()
+        with transaction(conn):
+            cursor = conn.execute(self._sql_reserve, (crash_id, now, now - lease))
+            if cursor.rowcount > 0:
+                return None
+            return self._get(conn, crash_id)
+
+    @measured_db("issues.reserve")
+    @maybe_unknown_error
+    async def reserve(self, crash_id: str, lease: float) -> Optional[ORMIssue]:
+        return await self._conn.run(self._reserve, crash_id, lease)
+
+    def _execute_existing(self, conn: sqlite3.Connection, sql: str, *params):
+        cursor = conn.execute(sql, params)
+        if cursor.rowcount == 0:
+            raise DBRecordNotFoundError()
+
+    @measured_db("issues.commit")
+    @maybe_unknown_error
+    async def commit(
+        self,
+        crash_id: str,
+        issue_id: str,
+        description: Optional[ORMIssueDescription] = None,
+    ) -> None:
+        params = (issue_id, _dump_description(description), crash_id)
+        await self._conn.run(self._execute_existing, self._sql_commit, *params)
+
+    def _commit_many(self, conn: sqlite3.Connection, issues):
+        missing = []
+        with transaction(conn):
+            for crash_id, issue_id, description in issues:
+                params = (issue_id, _dump_description(description), crash_id)
+                cursor = conn.execute(self._sql_commit, params)
+                if cursor.rowcount == 0:
+                    missing.append(crash_id)
+        return missing
+
+    @measured_db("issues.commit_many")
+    @maybe_unknown_error
+    async def commit_many(
+        self,
+        issues: List[Tuple[str, str, Optional[ORMIssueDescription]]],
+    ) -> List[str]:
+        if not issues:
+            return []
+        return await self._conn.run(self._commit_many, issues)
+
+    def _release(self, conn: sqlite3.Connection, crash_id: str):
+        conn.execute(self._sql_release, (crash_id,))
+
+    @measured_db("issues.release")
+    @maybe_unknown_error
+    async def release(self, crash_id: str) -> None:
+        await self._conn.run(self._release, crash_id)
+
+    @measured_db("issues.update_description")
+    @maybe_unknown_error
+    async def update_description(self, crash_id: str, description: ORMIssueDescription) -> None:
+        params = (_dump_description(description), crash_id)
+        await self._conn.run(self._execute_existing, self._sql_update_description, *params)
+
+    @measured_db("issues.update_duplicate_count")
+    @maybe_unknown_error
+    async def update_duplicate_count(self, crash_id: str, duplicate_count: int) -> None:
+        params = (duplicate_count, crash_id)
+        await self._conn.run(self._execute_existing, self._sql_update_duplicate_count, *params)
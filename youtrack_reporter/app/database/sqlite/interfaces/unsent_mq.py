@@ -0,0 +1,143 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional, Tuple
+from itertools import groupby
+import json
+
+from ...abstract import IUnsentMessages
+
+from .base import DBBase
+from ..connection import transaction
+from youtrack_reporter.app.metrics import measured_db
+from .util import maybe_unknown_error, quote
+
+if TYPE_CHECKING:
+    import sqlite3
+    from youtrack_reporter.app.settings import CollectionSettings
+    from ..connection import SQLiteConnection
+
+
+class DBUnsentMessages(DBBase, IUnsentMessages):
+
+    def __init__(self, conn: SQLiteConnection, collections: CollectionSettings):
+        super().__init__(conn, collections)
+        table = quote(collections.unsent_messages)
+
+        self._sql_truncate = f"DELETE FROM {table}"
+        self._sql_upsert = f"""
+            INSERT OR REPLACE INTO {table} (key, queue, "order", name, body)
+            VALUES (?, ?, ?, ?, ?)
+        """
+        self._sql_remove = f"DELETE FROM {table} WHERE key = ?"
+        self._sql_load = f'SELECT key, queue, name, body FROM {table} ORDER BY queue, "order"'
+        self._sql_first_page = f"""
+            SELECT key, queue, "order", name, body FROM {table}
+            ORDER BY queue, "order" LIMIT ?
+        """
+        # Keyset pagination over (queue, order) index.
+        # Unlike OFFSET, cost of a page doesn't grow with its position
+        self._sql_next_page = f"""
+            SELECT key, queue, "order", name, body FROM {table}
+            WHERE (queue, "order") > (?, ?)
+            ORDER BY queue, "order" LIMIT ?
+        """
+
+    def _upsert(self, conn: sqlite3.Connection, messages: Dict[str, dict]):
+        rows = [
+            (key, m["queue"], m["order"], m["name"], json.dumps(m["body"]))
+            for key, m in messages.items()
+        ]
+        conn.executemany(self._sql_upsert, rows)
+
+    def _save(self, conn: sqlite3.Connection, unsent_messages: Dict[str, list]):
+
+        messages = {}
+        for queue_name, queue_messages in unsent_messages.items():
+            for i, message in enumerate(queue_messages):
+                assert "name" in message
+                assert "body" in message
+                messages[f"{queue_name}-{i}"] = {
+                    "queue": queue_name,
+                    "order": i,
+                    "name": message["name"],
+                    "body": message["body"],
+                }
+
+        with transaction(conn):
+            conn.execute(self._sql_truncate)
+            self._upsert(conn, messages)
+
+    @measured_db("unsent_mq.save_unsent_messages")
+    @maybe_unknown_error
+    async def save_unsent_messages(self, unsent_messages: Dict[str, list]):
+        await self._conn.run(self._save, unsent_messages)
+
+    def _load(self, conn: sqlite3.Connection) -> Dict[str, list]:
+
+        unsent_messages: Dict[str, list] = {}
+        for row in conn.execute(self._sql_load):
+            mq_message = {
+                "key": row["key"],
+                "name": row["name"],
+                "body": json.loads(row["body"]),
+            }
+            unsent_messages.setdefault(row["queue"], []).append(mq_message)
+
+        return unsent_messages
+
+    @measured_db("unsent_mq.load_unsent_messages")
+    @maybe_unknown_error
+    async def load_unsent_messages(self) -> Dict[str, list]:
+        return await self._conn.run(self._load)
+
+    def _fetch_page(self, conn: sqlite3.Connection, after: Optional[Tuple[str, int]], limit: int):
+        if after is None:
+            return conn.execute(self._sql_first_page, (limit,)).fetchall()
+        return conn.execute(self._sql_next_page, (*after, limit)).fetchall()
+
+    async def iter_unsent_messages(self, batch_size: int) -> AsyncIterator[Tuple[str, list]]:
+
+        after = None
+        while True:
+            rows = await self._fetch(after, batch_size)
+            if not rows:
+                break
+
+            for queue_name, group in groupby(rows, key=lambda row: row["queue"]):
+                yield queue_name, [
+                    {
+                        "key": row["key"],
+                        "name": row["name"],
+                        "body": json.loads(row["body"]),
+                    }
+                    for row in group
+                ]
+
+            if len(rows) < batch_size:
+                break
+
+            after = (rows[-1]["queue"], rows[-1]["order"])
+
+    @measured_db("unsent_mq.fetch_unsent_messages")
+    @maybe_unknown_error
+    async def _fetch(self, after: Optional[Tuple[str, int]], limit: int):
+        return await self._conn.run(self._fetch_page, after, limit)
+
+    def _append(self, conn: sqlite3.Connection, messages: Dict[str, dict]):
+        with transaction(conn):
+            self._upsert(conn, messages)
+
+    @measured_db("unsent_mq.append_unsent_messages")
+    @maybe_unknown_error
+    async def append_unsent_messages(self, messages: Dict[str, dict]) -> None:
+        if messages:
+            await self._conn.run(self._append, messages)
+
+    def _remove(self, conn: sqlite3.Connection, keys: List[str]):
+        with transaction(conn):
+            conn.executemany(self._sql_remove, ((key,) for key in keys))
+
+    @measured_db("unsent_mq.remove_unsent_messages")
+    @maybe_unknown_error
+    async def remove_unsent_messages(self, keys: List[str]) -> None:
+        if keys:
+            await self._conn.run(self._remove, keys)
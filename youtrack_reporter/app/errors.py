@@ -13,6 +13,12 @@ class ProjectNotFound(YouTrackError):
         self.message = f"No project \"{self.project}\" found"
         super().__init__(self.message)
 
+class UserBanned(YouTrackError):
+    def __init__(self, user: str):
+        self.user = user
+        self.message = f"User \"{self.user}\" owning the token is banned"
+        super().__init__(self.message)
+
 class TooManyProjectsFound(YouTrackError):
     def __init__(self, project: str):
         self.project = project
@@ -33,4 +39,15 @@ class ProjectResponseDoesNotMatches(YouTrackError):
     pass
 
 class IssueResponseDoesNotMatches(YouTrackError):
-    pass
\ No newline at end of file
+    pass
+
+class YouTrackConnectionError(YouTrackError):
+    def __init__(self, reason: str):
+        self.message = f"Failed to connect to YouTrack: {reason}"
+        super().__init__(self.message)
+
+class CircuitOpenError(YouTrackError):
+    def __init__(self, host: str):
+        self.host = host
+        self.message = f"YouTrack \"{host}\" is unavailable. Requests are suspended"
+        super().__init__(self.message)
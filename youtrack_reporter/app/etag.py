@@ -0,0 +1,50 @@
+"""
+Entity tags of integration resources. Tag is derived from `update_rev`
+of config and can be converted back, so that `If-Match` can be checked
+by database atomically with the update.
+"""
+
+from __future__ import annotations
+from typing import List, Optional
+
+import base64
+import binascii
+
+
+def config_etag(update_rev: str) -> str:
+    # Revision is set by client, so it's encoded to be safe in header
+    encoded = base64.urlsafe_b64encode(update_rev.encode()).decode()
+    return f'"{encoded.rstrip("=")}"'
+
+
+def parse_etags(header: str) -> Optional[List[str]]:
+    """Tags listed in `If-Match` or `If-None-Match`. None means `*`"""
+    if header.strip() == "*":
+        return None
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def etag_rev(tag: str) -> Optional[str]:
+    """Revision of strong tag made by `config_etag`, None for other tags"""
+    if len(tag) < 2 or not (tag.startswith('"') and tag.endswith('"')):
+        return None
+
+    encoded = tag[1:-1]
+    try:
+        padding = "=" * (-len(encoded) % 4)
+        return base64.urlsafe_b64decode(encoded + padding).decode()
+    except (binascii.Error, UnicodeError):
+        return None
+
+
+def none_match(header: Optional[str], etag: str) -> bool:
+    """Whether `If-None-Match` condition holds, so full response is needed"""
+    if header is None:
+        return True
+
+    tags = parse_etags(header)
+    if tags is None:
+        return False
+
+    # Weak comparison: `W/` prefix is ignored
+    return all((tag[2:] if tag.startswith("W/") else tag) != etag for tag in tags)
@@ -0,0 +1,110 @@
+from __future__ import annotations
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+import asyncio
+import time
+
+
+class AsyncMemo:
+
+    """
+    Memoizes results of coroutines for a limited time.
+    Concurrent calls with the same key share single computation.
+    Failures are not memoized. Computation is cancelled
+    when all of its waiters are cancelled.
+    """
+
+    _entries: Dict[Hashable, Tuple[float, Any]]
+    _pending: Dict[Hashable, asyncio.Task]
+    _waiters: Dict[asyncio.Task, int]
+    _max_size: int
+    _ttl: float
+
+    hits: int
+    misses: int
+
+    def __init__(self, ttl: float, max_size: int = 1024):
+        self._entries = {}
+        self._pending = {}
+        self._waiters = {}
+        self._max_size = max_size
+        self._ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: Hashable, factory: Callable[[], Awaitable[Any]]):
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self.hits += 1
+                return value
+            del self._entries[key]
+
+        task = self._pending.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._resolve(key, factory))
+            self._pending[key] = task
+        else:
+            self.hits += 1
+
+        # Cancellation of one waiter must not affect the others
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._waiters[task] == 1 and not task.done():
+                # Nobody needs the result anymore. New callers must
+                # not join computation which is being cancelled
+                task.cancel()
+                if self._pending.get(key) is task:
+                    del self._pending[key]
+            raise
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+
+    async def _resolve(self, key: Hashable, factory: Callable[[], Awaitable[Any]]):
+        task = asyncio.current_task()
+        try:
+            value = await factory()
+        finally:
+            is_actual = self._pending.get(key) is task
+            if is_actual:
+                del self._pending[key]
+
+        # Key may have been invalidated while computation was in progress
+        if is_actual:
+            self._store(key, value)
+
+        return value
+
+    def _store(self, key: Hashable, value: Any):
+        if self._max_size <= 0:
+            return
+
+        self._entries.pop(key, None)
+        self._entries[key] = (time.monotonic() + self._ttl, value)
+
+        while len(self._entries) > self._max_size:
+            del self._entries[next(iter(self._entries))]
+
+    def invalidate(self, key: Hashable):
+        self._entries.pop(key, None)
+        self._pending.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+        self._pending.clear()
+
+    def stats(self) -> Dict[str, float]:
+        return dict(
+            size=len(self._entries),
+            pending=len(self._pending),
+            max_size=self._max_size,
+            ttl=self._ttl,
+            hits=self.hits,
+            misses=self.misses,
+        )
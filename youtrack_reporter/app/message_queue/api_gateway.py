@@ -1,4 +1,6 @@
 import re
+import gzip
+import asyncio
 from typing import TYPE_CHECKING, Optional
 
 from mqtransport.participants import Consumer, Producer
@@ -7,9 +9,13 @@ from pydantic import BaseModel, AnyHttpUrl, ConstrainedStr
 
 from mqtransport.errors import ConsumeMessageError
 
-from youtrack_reporter.app.errors import YouTrackError
+from youtrack_reporter.app.errors import CircuitOpenError, YouTrackError
+from youtrack_reporter.app.metrics import measured_consumer
+from youtrack_reporter.app.message_queue.participants import MeasuredProducer
+from youtrack_reporter.app.message_queue.scheduler import LANE_DUPLICATE, LANE_UNIQUE
 from youtrack_reporter.app.youtrack import YTIssue
-from youtrack_reporter.app.database.errors import DatabaseError
+from youtrack_reporter.app.database.errors import DatabaseError, DBRecordNotFoundError
+from youtrack_reporter.app.database.orm import ORMIssue, ORMIssueDescription
 
 if TYPE_CHECKING:
     from .state import MQAppState
@@ -28,6 +34,39 @@ class CrashInfoStr(ConstrainedStr):
     min_length = 1
     curtail_length = 1000
 
+CRASH_OUTPUT_FILENAME = "crash-output.txt.gz"
+
+def render_description(params: ORMIssueDescription, duplicate_count: int) -> str:
+    if params.crash_output_attached:
+        output = (
+            f"*Output summary*: ```{params.crash_output}```\n"
+            f"        *Full output*: attached as {CRASH_OUTPUT_FILENAME}"
+        )
+    else:
+        output = f"*Full output*: ```{params.crash_output}```"
+
+    return f'''
+        *Crash info*: {params.crash_info}
+        *Crash link*: {params.crash_url}
+        *Project name*: {params.project_name}
+        *Fuzzer name*: {params.fuzzer_name}
+        *Revision*: {params.revision_name}
+        *Duplicates*: {duplicate_count}
+        {output}
+        '''
+
+def summarize_output(crash_output: str, size: int) -> str:
+    """Beginning of output cut at line boundary, if possible"""
+    if len(crash_output) <= size:
+        return crash_output
+
+    summary = crash_output[:size]
+    end = summary.rfind("\n")
+    if end > 0:
+        summary = summary[:end]
+
+    return summary + "\n..."
+
 class MC_DuplicateCrashFound(Consumer):
 
     """Send notification to youtrack that duplicate of crash is found"""
@@ -45,11 +84,12 @@ class MC_DuplicateCrashFound(Consumer):
         duplicate_count: int
         """ Count of similar crashes found (at least) """
 
+    @measured_consumer("MC_DuplicateCrashFound")
     async def consume(self, msg: Model, app: MQApp):
         state: MQAppState = app.state
 
         try:
-            config = await state.db.configs.get(msg.config_id)
+            config = await state.config_cache.get(msg.config_id)
         except DatabaseError as e:
             self.logger.error(f"Can't find youtrack config with id: {msg.config_id}")
             await state.producers.youtrack_report_undelivered.produce(
@@ -59,7 +99,7 @@ class MC_DuplicateCrashFound(Consumer):
             return
         
         try:
-            issue_id = await state.db.issues.get_issue(msg.crash_id)
+            stored_issue: ORMIssue = await state.issue_batcher.get(msg.crash_id)
         except DatabaseError as e:
             self._logger.error("Can't update non-created issue!")
             await state.producers.youtrack_report_undelivered.produce(
@@ -68,17 +108,51 @@ class MC_DuplicateCrashFound(Consumer):
             )
             return
         
-        issue: YTIssue = YTIssue(id=issue_id)
-        
+        if stored_issue.pending:
+            # Unique crash is still being reported. Retry later
+            raise ConsumeMessageError()
+
+        issue: YTIssue = YTIssue(id=stored_issue.issue_id)
+
+        async def update_duplicate_count(duplicate_count: int):
+            if duplicate_count <= stored_issue.duplicate_count:
+                return
+
+            async with state.scheduler.slot(msg.config_id, LANE_DUPLICATE):
+
+                # Count may have been raised by another flush since message
+                # arrived. It is read again, so that lower count isn't written
+                current: ORMIssue = await state.issue_batcher.get(msg.crash_id)
+                if duplicate_count <= current.duplicate_count:
+                    return
+
+                if current.description is not None:
+                    # Render description locally instead of downloading it
+                    description = render_description(current.description, duplicate_count)
+                else:
+                    # Issue was created before description parameters were stored
+                    description = await state.youtrack_api.get_issue_description(config, issue)
+                    description = re.sub(
+                        r"\*Duplicates\*: [0-9]+", 
+                        f"*Duplicates*: {duplicate_count}",
+                        description
+                    )
+
+                await state.youtrack_api.update_issue(config, issue, description)
+                await state.db.issues.update_duplicate_count(msg.crash_id, duplicate_count)
+
         try:
-            description = await state.youtrack_api.get_issue_description(config, issue)
-            print(description)
-            description = re.sub(
-                r"\*Duplicates\*: [0-9]+", 
-                f"*Duplicates*: {msg.duplicate_count}",
-                description
+            # Only the highest count matters, so updates of
+            # the same crash are merged into one YouTrack write
+            await state.duplicates.submit(
+                msg.crash_id,
+                msg.duplicate_count,
+                update_duplicate_count,
             )
-            await state.youtrack_api.update_issue(config, issue, description)
+        except CircuitOpenError as e:
+            # YouTrack is down. Leave message in queue to retry later
+            self._logger.warning(str(e))
+            raise ConsumeMessageError() from e
         except YouTrackError as e:
             await state.producers.youtrack_report_undelivered.produce(
                 config_id=msg.config_id,
@@ -122,11 +196,12 @@ class MC_UniqueCrashFound(Consumer):
         revision_name: LabelStr
         """ Name of fuzzer revision. Used for grouping YT issues """
 
+    @measured_consumer("MC_UniqueCrashFound")
     async def consume(self, msg: Model, app: MQApp):
         state: MQAppState = app.state
 
         try:
-            config = await state.db.configs.get(msg.config_id)
+            config = await state.config_cache.get(msg.config_id)
         except DatabaseError as e:
             self.logger.error(f"Can't find youtrack config with id: {msg.config_id}")
             await state.producers.youtrack_report_undelivered.produce(
@@ -145,31 +220,151 @@ class MC_UniqueCrashFound(Consumer):
                           msg.project_name, msg.fuzzer_name,
                           msg.revision_name)
 
-        description = f'''
-        *Crash info*: {msg.crash_info}
-        *Crash link*: {msg.crash_url}
-        *Project name*: {msg.project_name}
-        *Fuzzer name*: {msg.fuzzer_name}
-        *Revision*: {msg.revision_name}
-        *Duplicates*: 0
-        *Full output*: ```{msg.crash_output}```
-        '''
+        reporter = state.settings.reporter
+        attach_output = (
+            reporter.attach_crash_output
+            and len(msg.crash_output) > reporter.crash_output_summary_size
+        )
+
+        # With attachment, only summary is stored and rendered, so
+        # later duplicate updates send short description
+        params = ORMIssueDescription(
+            crash_info=msg.crash_info,
+            crash_url=msg.crash_url,
+            crash_type=msg.crash_type,
+            crash_output=(
+                summarize_output(msg.crash_output, reporter.crash_output_summary_size)
+                if attach_output else msg.crash_output
+            ),
+            project_name=msg.project_name,
+            fuzzer_name=msg.fuzzer_name,
+            revision_name=msg.revision_name,
+            crash_output_attached=attach_output,
+        )
 
         try:
-            issue: YTIssue = await state.youtrack_api.create_issue(
-                config=config,
-                summary=msg.crash_info[:255],
-                description=description
-            )
-            await state.db.issues.insert(msg.crash_id, issue.id)
+            async with state.scheduler.slot(msg.config_id, LANE_UNIQUE):
+
+                # Reserved only when slot is taken, so reservation
+                # doesn't expire while message waits in scheduler
+                lease = reporter.reservation_lease
+                existing: Optional[ORMIssue] = await state.db.issues.reserve(msg.crash_id, lease)
+
+                if existing is not None:
+                    if existing.pending:
+                        # Issue is being created by another consumer. If it fails, the
+                        # reservation will be released or expire, so retry later
+                        self._logger.info("Issue for crash '%s' is being created", msg.crash_id)
+                        raise ConsumeMessageError()
+
+                    self._logger.info("Issue for crash '%s' already exists", msg.crash_id)
+                    return
+
+                try:
+                    issue: YTIssue = await state.youtrack_api.create_issue(
+                        config=config,
+                        summary=msg.crash_info[:255],
+                        description=render_description(params, 0)
+                    )
+                except BaseException:
+                    # Including cancellation: let another consumer retry
+                    await state.db.issues.release(msg.crash_id)
+                    raise
+
+                await self._commit(state, msg.crash_id, issue, params)
+
+                if attach_output:
+                    await self._attach_output(state, config, issue, msg, params)
+        except CircuitOpenError as e:
+            # YouTrack is down. Leave message in queue to retry later
+            self._logger.warning(str(e))
+            raise ConsumeMessageError() from e
         except YouTrackError as e:
             await state.producers.youtrack_report_undelivered.produce(
                 config_id=msg.config_id,
                 error=str(e)
             )
 
+    async def _commit(
+        self,
+        state: "MQAppState",
+        crash_id: str,
+        issue: YTIssue,
+        params: ORMIssueDescription,
+    ):
+
+        # Issue already exists in YouTrack. Until it is stored, duplicates
+        # are retried, and once reservation expires, the crash is reported
+        # again. So transient database failures are waited out here
+        reporter = state.settings.reporter
+        delay = reporter.commit_backoff
+        attempt = 1
+
+        while True:
+            try:
+                await state.issue_batcher.commit(crash_id, issue.id, params)
+                return
+            except DBRecordNotFoundError:
+                raise
+            except DatabaseError:
+                if attempt >= reporter.commit_attempts:
+                    self._logger.exception(
+                        "Failed to store issue '%s' of crash '%s'", issue.id, crash_id
+                    )
+                    raise
+
+                self._logger.warning(
+                    "Failed to store issue '%s' of crash '%s', retry in %.1f s",
+                    issue.id, crash_id, delay, exc_info=True,
+                )
+
+            await asyncio.sleep(delay)
+            delay *= 2
+            attempt += 1
+
+    async def _attach_output(
+        self,
+        state: "MQAppState",
+        config,
+        issue: YTIssue,
+        msg: Model,
+        params: ORMIssueDescription,
+    ):
+
+        # Issue is already committed, so failure here must not cause
+        # retry of message. Instead, full output is put to description
+        data = gzip.compress(msg.crash_output.encode(), compresslevel=6)
+        try:
+            await state.youtrack_api.add_attachment(
+                config, issue, CRASH_OUTPUT_FILENAME, data, "application/gzip",
+            )
+            return
+        except YouTrackError:
+            self._logger.exception("Failed to attach output of crash '%s'", msg.crash_id)
+
+        params = params.copy(update=dict(
+            crash_output=msg.crash_output,
+            crash_output_attached=False,
+        ))
+
+        # Stored first, so duplicate updates made from now on render
+        # description without attachment. If update of issue below
+        # fails, the next of them fixes description
+        try:
+            await state.db.issues.update_description(msg.crash_id, params)
+        except DatabaseError:
+            self._logger.exception("Failed to store description of crash '%s'", msg.crash_id)
+
+        try:
+            # Duplicates may have been counted during upload
+            stored_issue: ORMIssue = await state.db.issues.get(msg.crash_id)
+            description = render_description(params, stored_issue.duplicate_count)
+            await state.youtrack_api.update_issue(config, issue, description)
+        except (DatabaseError, YouTrackError):
+            self._logger.exception("Failed to put output of crash '%s' to description", msg.crash_id)
+
 
-class MP_YTIntegrationResult(Producer):
+class MP_YTIntegrationResult(MeasuredProducer):
     name = "youtrack-reporter.integrations.result"
 
     class Model(BaseModel):
@@ -182,7 +377,7 @@ class MP_YTIntegrationResult(Producer):
         update_rev: str
         """ Update revision. Used to filter outdated messages """
 
-class MP_YTReportUndelivered(Producer):
+class MP_YTReportUndelivered(MeasuredProducer):
     name = "youtrack-reporter.reports.undelivered"
 
     class Model(BaseModel):
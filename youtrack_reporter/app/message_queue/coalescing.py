@@ -0,0 +1,118 @@
+from __future__ import annotations
+from typing import Awaitable, Callable, Dict, Hashable, Optional
+
+import asyncio
+import logging
+
+FlushFunc = Callable[[int], Awaitable[None]]
+
+
+class _PendingUpdate:
+    value: int
+    flush: FlushFunc
+    future: asyncio.Future
+    merged: int
+
+    def __init__(self, value: int, flush: FlushFunc):
+        self.value = value
+        self.flush = flush
+        self.future = asyncio.get_running_loop().create_future()
+        self.merged = 0
+
+
+class MaxValueCoalescer:
+
+    """
+    Collects values submitted with the same key during time window
+    and flushes only the maximum of them. Submitters are resumed
+    when flush is done, so messages can be acknowledged after that.
+    Flushes of the same key never run concurrently.
+    """
+
+    _logger: logging.Logger
+    _window: float
+    _pending: Dict[Hashable, _PendingUpdate]
+    _flushing: Dict[Hashable, asyncio.Task]
+
+    submitted: int
+    flushed: int
+
+    def __init__(self, window: float):
+        self._logger = logging.getLogger("mq.coalescer")
+        self._window = window
+        self._pending = {}
+        self._flushing = {}
+        self.submitted = 0
+        self.flushed = 0
+
+    async def submit(self, key: Hashable, value: int, flush: FlushFunc):
+
+        """
+        Schedule flush of value. The latest flush function is used,
+        because it is created with the most recent configuration.
+        Raises exception occurred during flush.
+        """
+
+        self.submitted += 1
+        if self._window <= 0:
+            self.flushed += 1
+            await flush(value)
+            return
+
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = _PendingUpdate(value, flush)
+            self._pending[key] = pending
+            asyncio.ensure_future(self._flush_later(key, pending))
+        else:
+            pending.value = max(pending.value, value)
+            pending.flush = flush
+            pending.merged += 1
+
+        await asyncio.shield(pending.future)
+
+    async def _flush_later(self, key: Hashable, pending: _PendingUpdate):
+
+        task: Optional[asyncio.Task] = None
+        try:
+            await asyncio.sleep(self._window)
+            del self._pending[key]
+
+            previous: Optional[asyncio.Task] = self._flushing.get(key)
+            if previous is not None:
+                await asyncio.wait([previous])
+
+            task = asyncio.ensure_future(pending.flush(pending.value))
+            self._flushing[key] = task
+
+            await task
+            pending.future.set_result(None)
+        except Exception as e:
+            pending.future.set_exception(e)
+            # Exception is delivered to submitters. Mark it as retrieved
+            # to avoid warnings when all of them are gone
+            pending.future.exception()
+        except BaseException:
+            # Cancelled (e.g. at shutdown): submitters must not wait forever
+            if self._pending.get(key) is pending:
+                del self._pending[key]
+            if not pending.future.done():
+                pending.future.cancel()
+            raise
+        finally:
+            if task is not None:
+                self.flushed += 1
+                if self._flushing.get(key) is task:
+                    del self._flushing[key]
+
+        if pending.merged > 0:
+            self._logger.debug("Coalesced %d updates of '%s'", pending.merged + 1, key)
+
+    def stats(self) -> Dict[str, float]:
+        return dict(
+            window=self._window,
+            pending=len(self._pending),
+            flushing=len(self._flushing),
+            submitted=self.submitted,
+            flushed=self.flushed,
+        )
@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Dict, Optional
 
 from mqtransport import SQSApp
 
@@ -9,6 +9,12 @@ from youtrack_reporter.app.message_queue.api_gateway import MC_DuplicateCrashFou
 from youtrack_reporter.app.message_queue.api_gateway import MP_YTReportUndelivered, MP_YTIntegrationResult
 
 from youtrack_reporter.app.message_queue.internal import MP_VerifyYT, MC_VerifyYT
+from youtrack_reporter.app.message_queue.sharding import (
+    MC_RouteDuplicateCrash,
+    MC_RouteUniqueCrash,
+    ShardMap,
+    ShardProducers,
+)
 from youtrack_reporter.app.message_queue.state import MQAppState
 
 if TYPE_CHECKING:
@@ -23,15 +29,21 @@ class Producers:
 
     verify_youtrack: MP_VerifyYT
 
+    # Shard -> producers to its queue. Used in partitioned mode
+    shards: Dict[int, ShardProducers]
+
 
 class MQAppInitializer:
 
     _settings: AppSettings
     _app: MQApp
     _in_channel: ConsumingChannel
+    _in_duplicates_channel: Optional[ConsumingChannel]
+    _dlq: ProducingChannel
     _ich_internal: ConsumingChannel
     _och_internal: ProducingChannel
     _och_api_gateway: ProducingChannel
+    _shard_map: Optional[ShardMap]
 
     @property
     def app(self):
@@ -40,6 +52,7 @@ class MQAppInitializer:
     def __init__(self, settings: AppSettings):
         self._settings = settings
         self._app = None
+        self._shard_map = None
 
     async def do_init(self):
 
@@ -75,6 +88,15 @@ class MQAppInitializer:
         dlq = await self._app.create_producing_channel(queues.dlq)
         ich.use_dead_letter_queue(dlq)
         self._in_channel = ich
+        self._dlq = dlq
+
+        # Duplicates are read from their own queue if configured,
+        # so that unique crashes are not fetched behind them
+        self._in_duplicates_channel = None
+        if queues.youtrack_reporter_duplicates:
+            ich = await self._app.create_consuming_channel(queues.youtrack_reporter_duplicates)
+            ich.use_dead_letter_queue(dlq)
+            self._in_duplicates_channel = ich
 
     async def _create_other_channels(self):
         queues = self._settings.message_queue.queues
@@ -101,8 +123,19 @@ class MQAppInitializer:
         och = self._och_api_gateway
 
         # Incoming messages
-        ich.add_consumer(MC_UniqueCrashFound())
-        ich.add_consumer(MC_DuplicateCrashFound())
+        if self._shard_map is None:
+            unique_consumer = MC_UniqueCrashFound
+            duplicate_consumer = MC_DuplicateCrashFound
+        else:
+            unique_consumer = MC_RouteUniqueCrash
+            duplicate_consumer = MC_RouteDuplicateCrash
+
+        ich.add_consumer(unique_consumer())
+        ich.add_consumer(duplicate_consumer())
+
+        # Common queue still accepts duplicates sent by older senders
+        if self._in_duplicates_channel is not None:
+            self._in_duplicates_channel.add_consumer(duplicate_consumer())
 
         # Outcoming messages
         producers.youtrack_report_undelivered = MP_YTReportUndelivered()
@@ -111,12 +144,40 @@ class MQAppInitializer:
         och.add_producer(producers.youtrack_report_undelivered)
         och.add_producer(producers.youtrack_integration_result)
 
+    async def _setup_shard_communication(self, producers: Producers):
+
+        # Crashes of every shard may be forwarded to its queue,
+        # but only queues of owned shards are consumed. Shard has
+        # single queue, so its duplicates are not separated from
+        # unique crashes as in the common duplicates queue
+        producers.shards = {}
+        for shard in range(self._shard_map.shards):
+            queue_name = self._shard_map.queue_name(shard)
+            och = await self._app.create_producing_channel(queue_name)
+            shard_producers = producers.shards[shard] = ShardProducers()
+            och.add_producer(shard_producers.unique_crash)
+            och.add_producer(shard_producers.duplicate_crash)
+
+        for shard in sorted(self._shard_map.owned):
+            queue_name = self._shard_map.queue_name(shard)
+            ich = await self._app.create_consuming_channel(queue_name)
+            ich.use_dead_letter_queue(self._dlq)
+            ich.add_consumer(MC_UniqueCrashFound())
+            ich.add_consumer(MC_DuplicateCrashFound())
+
     async def _configure_channels(self):
         await self._create_own_channel()
         await self._create_other_channels()
 
         state: MQAppState = self.app.state
         state.producers = Producers()
+        state.shard_map = None
+
+        if self._settings.sharding.enabled:
+            queue_prefix = self._settings.message_queue.queues.youtrack_reporter
+            self._shard_map = ShardMap(self._settings.sharding, queue_prefix)
+            state.shard_map = self._shard_map
+            await self._setup_shard_communication(state.producers)
 
         self._setup_api_gateway_communication(state.producers)
         self._setup_internal_communication(state.producers)
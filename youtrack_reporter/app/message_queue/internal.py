@@ -5,13 +5,18 @@ from mqtransport import MQApp
 from mqtransport.participants import Consumer, Producer
 from mqtransport.errors import ConsumeMessageError
 from youtrack_reporter.app.youtrack import YouTrackError
+from youtrack_reporter.app.errors import CircuitOpenError
+from youtrack_reporter.app.database.errors import DBRecordNotFoundError, DBRevisionMismatchError
+from youtrack_reporter.app.metrics import measured_consumer
+from youtrack_reporter.app.message_queue.participants import MeasuredProducer
+from youtrack_reporter.app.message_queue.revisions import SupersededRevision
 
 from youtrack_reporter.app.message_queue.state import MQAppState
 
 if TYPE_CHECKING:
     from youtrack_reporter.app.database.orm import ORMConfig
 
-class MP_VerifyYT(Producer):
+class MP_VerifyYT(MeasuredProducer):
     name = "youtrack-reporter.internal.verify"
     class Model(BaseModel):
         config_id: str
@@ -23,31 +28,57 @@ class MC_VerifyYT(Consumer):
         config_id: str
         update_rev: str
 
+    @measured_consumer("MC_VerifyYT")
     async def consume(self, msg: Model, app: MQApp):
         state: MQAppState = app.state
-        config: ORMConfig = await state.db.configs.get(msg.config_id)
 
-        if config is None:
-            self._logger.error("Config to verify was not found!")
-            raise ConsumeMessageError()
-        
+        if state.revisions.is_stale(msg.config_id, msg.update_rev):
+            # Config was updated or deleted since. Skip database lookup
+            return
+
+        try:
+            config: ORMConfig = await state.db.configs.get(msg.config_id)
+        except DBRecordNotFoundError:
+            # Config was deleted, nothing to verify
+            self._logger.debug("Config '%s' to verify was not found", msg.config_id)
+            return
+
+        # Drop cached copy if it belongs to another revision
+        state.config_cache.invalidate(config.id, config.update_rev)
+
         if config.update_rev != msg.update_rev:
             # If it is not last request for validation, return
             return
         
         try:
             # Here we need config = func(config) because we store id 
-            # of yt project inside config when validating creds
-            config = await state.youtrack_api.validate_credentials(config)
+            # of yt project inside config when validating creds.
+            # Verification is skipped if credentials were verified recently
+            config = await state.revisions.run(
+                config.id,
+                config.update_rev,
+                lambda: state.youtrack_api.validate_credentials(config),
+            )
             # Now we have config.project_id
             # And we have to store it in the database
-            await state.db.configs.update(config)
-            
+            # Newer revision written meanwhile must not be overwritten
+            await state.db.configs.update(config, expected_rev=config.update_rev)
+            state.config_cache.put(config)
+
             await state.producers.youtrack_integration_result.produce(
                 config_id=config.id,
                 update_rev=config.update_rev,
                 error=None
             )
+        except SupersededRevision as e:
+            self._logger.debug(str(e))
+        except DBRevisionMismatchError:
+            # Newer revision is verified by its own message
+            self._logger.debug("Config '%s' was updated during verification", config.id)
+        except CircuitOpenError as e:
+            # YouTrack is down. Leave message in queue to retry later
+            self._logger.warning(str(e))
+            raise ConsumeMessageError() from e
         except YouTrackError as e:
             await state.producers.youtrack_integration_result.produce(
                 config_id=config.id,
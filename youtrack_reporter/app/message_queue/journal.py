@@ -0,0 +1,181 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Dict, Optional
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+
+if TYPE_CHECKING:
+    from mqtransport import MQApp
+    from youtrack_reporter.app.database.abstract import IUnsentMessages
+
+
+def _digest(queue_name: str, message: dict) -> str:
+    data = json.dumps([queue_name, message["name"], message["body"]], sort_keys=True)
+    return hashlib.sha1(data.encode()).hexdigest()
+
+
+class UnsentMessagesJournal:
+
+    """
+    Keeps unsent messages of MQ app in database incrementally.
+    Periodically compares messages waiting in MQ app with stored ones,
+    stores the new ones and removes the sent ones. So that messages
+    survive crash of the process, and shutdown writes only the changes
+    made since the last sync instead of the whole backlog.
+
+    MQ transport doesn't report failed sends, so periodic sync relies
+    on `export_unsent_messages` not altering state of running app.
+    Non-positive interval disables it.
+    """
+
+    _logger: logging.Logger
+    _db: IUnsentMessages
+    _interval: float
+    _batch_size: int
+    _task: Optional[asyncio.Task]
+
+    # Message identity -> record key
+    _stored: Dict[str, str]
+    _last_order: int
+
+    replaying: bool
+    replayed: int
+    replay_duration: Optional[float]
+
+    def __init__(self, db: IUnsentMessages, interval: float, batch_size: int):
+        self._logger = logging.getLogger("mq.journal")
+        self._db = db
+        self._interval = interval
+        self._batch_size = batch_size
+        self.replaying = False
+        self.replayed = 0
+        self.replay_duration = None
+        self._task = None
+        self._stored = {}
+        self._last_order = 0
+
+    @staticmethod
+    def _identities(queue_name: str, messages: list, seen: Optional[Dict[str, int]] = None):
+        # Equal messages may be waiting in the same queue,
+        # so identity includes number of occurrence
+        seen = {} if seen is None else seen
+        for message in messages:
+            digest = _digest(queue_name, message)
+            n = seen[digest] = seen.get(digest, -1) + 1
+            yield digest, f"{digest}-{n}", message
+
+    def _next_order(self) -> int:
+        # Microseconds since epoch keep order across restarts
+        self._last_order = max(self._last_order + 1, time.time_ns() // 1000)
+        return self._last_order
+
+    async def replay(self, mq_app: MQApp):
+
+        """
+        Import stored messages to MQ app page by page, so that
+        memory used doesn't depend on size of the backlog
+        """
+
+        self.replaying = True
+        started_at = time.monotonic()
+        seen: Dict[str, Dict[str, int]] = {}
+
+        try:
+            async for queue_name, messages in self._db.iter_unsent_messages(self._batch_size):
+                mq_app.import_unsent_messages({
+                    queue_name: [
+                        {"name": message["name"], "body": message["body"]}
+                        for message in messages
+                    ]
+                })
+
+                queue_seen = seen.setdefault(queue_name, {})
+                for _, identity, message in self._identities(queue_name, messages, queue_seen):
+                    self._stored[identity] = message["key"]
+
+                self.replayed += len(messages)
+
+        finally:
+            self.replaying = False
+            self.replay_duration = time.monotonic() - started_at
+
+        self._logger.info("Replayed %d unsent messages in %.3fs", self.replayed, self.replay_duration)
+
+    async def sync(self, mq_app: MQApp):
+
+        unsent_messages = mq_app.export_unsent_messages()
+
+        # Record key -> message
+        new: Dict[str, dict] = {}
+        new_keys: Dict[str, str] = {}
+        current = set()
+
+        for queue_name, messages in unsent_messages.items():
+            for digest, identity, message in self._identities(queue_name, messages):
+                current.add(identity)
+                if identity not in self._stored:
+                    order = self._next_order()
+                    key = new_keys[identity] = f"{digest}-{order}"
+                    new[key] = {
+                        "queue": queue_name,
+                        "order": order,
+                        "name": message["name"],
+                        "body": message["body"],
+                    }
+
+        sent = [identity for identity in self._stored if identity not in current]
+
+        # Store new messages first: losing acknowledgement
+        # causes duplicate, but losing message can't be undone
+        await self._db.append_unsent_messages(new)
+        self._stored.update(new_keys)
+
+        await self._db.remove_unsent_messages([self._stored[i] for i in sent])
+        for identity in sent:
+            del self._stored[identity]
+
+        if new or sent:
+            self._logger.debug("Unsent messages: %d stored, %d removed", len(new), len(sent))
+
+    async def _run(self, mq_app: MQApp):
+
+        # Sync must not run during replay: identities of messages
+        # imported later would clash with ones of new messages
+        try:
+            await self.replay(mq_app)
+        except Exception:
+            # Not imported messages are kept in database until restart
+            self._logger.exception("Failed to replay unsent messages")
+
+        if self._interval <= 0:
+            return
+
+        while True:
+            await asyncio.sleep(self._interval)
+            try:
+                await self.sync(mq_app)
+            except Exception:
+                self._logger.exception("Failed to sync unsent messages")
+
+    def start(self, mq_app: MQApp):
+        """Start replay of stored messages followed by periodic sync"""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run(mq_app))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> Dict[str, float]:
+        return dict(
+            interval=self._interval,
+            replaying=self.replaying,
+            replayed=self.replayed,
+            replay_duration=self.replay_duration,
+            stored=len(self._stored),
+        )
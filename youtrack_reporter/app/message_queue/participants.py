@@ -0,0 +1,35 @@
+from typing import List
+
+import asyncio
+import time
+
+from mqtransport.participants import Producer
+
+from youtrack_reporter.app import metrics
+
+
+class MeasuredProducer(Producer):
+
+    """Producer which reports count and latency of produced messages"""
+
+    async def produce(self, *args, **kwargs):
+        start = time.perf_counter()
+        result = "ok"
+        try:
+            return await super().produce(*args, **kwargs)
+        except BaseException as e:
+            result = type(e).__name__
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            metrics.PRODUCE_DURATION.labels(self.name).observe(duration)
+            metrics.PRODUCED_MESSAGES.labels(self.name, result).inc()
+
+    async def produce_many(self, messages: List[dict]):
+
+        """
+        Produce several messages concurrently, so that
+        channel can send them to broker in batches
+        """
+
+        await asyncio.gather(*(self.produce(**message) for message in messages))
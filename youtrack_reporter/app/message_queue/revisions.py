@@ -0,0 +1,165 @@
+from __future__ import annotations
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+from collections import OrderedDict
+
+import asyncio
+import itertools
+import logging
+
+# Revisions remembered per config. Messages of older ones
+# are still dropped, but after database lookup
+_MAX_REVISIONS_PER_CONFIG = 16
+
+# Marks config deleted: every revision of it is stale
+_DELETED = object()
+
+
+class SupersededRevision(Exception):
+    def __init__(self, config_id: str, update_rev: str):
+        self.config_id = config_id
+        self.update_rev = update_rev
+        super().__init__(f"Revision '{update_rev}' of config '{config_id}' is superseded")
+
+
+class RevisionIndex:
+
+    """
+    Revisions of configs replaced by writes of HTTP handlers.
+    Lets verification of outdated revision be dropped before any I/O,
+    and cancels verification in progress when its revision is replaced.
+
+    Handlers may finish in other order than database applied their
+    writes, so revision is considered outdated only when database
+    reported it as replaced by write. Each write gets a sequence number,
+    so that later write of the same revision makes it actual again.
+    Index is local to replica and limited in size: if revision is
+    unknown, it is considered actual and database decides.
+    """
+
+    _logger: logging.Logger
+    # Config id -> revision -> (write sequence, whether replaced)
+    _revisions: "OrderedDict[str, Any]"
+    _running: Dict[str, Dict[asyncio.Task, str]]
+    _superseded: Set[asyncio.Task]
+    _sequence: "itertools.count[int]"
+    _max_size: int
+
+    skipped: int
+    cancelled: int
+
+    def __init__(self, max_size: int):
+        self._logger = logging.getLogger("mq.revisions")
+        self._revisions = OrderedDict()
+        self._running = {}
+        self._superseded = set()
+        self._sequence = itertools.count()
+        self._max_size = max_size
+        self.skipped = 0
+        self.cancelled = 0
+
+    def _cancel(self, config_id: str, update_rev: Optional[str] = None):
+        for task, running_rev in self._running.get(config_id, {}).items():
+            if update_rev in (None, running_rev) and not task.done():
+                self._superseded.add(task)
+                task.cancel()
+                self.cancelled += 1
+
+    def _config_revisions(self, config_id: str) -> Optional["OrderedDict[str, Tuple[int, bool]]"]:
+        if self._max_size <= 0:
+            return None
+
+        revisions = self._revisions.pop(config_id, None)
+        if revisions is None:
+            revisions = OrderedDict()
+        self._revisions[config_id] = revisions
+
+        while len(self._revisions) > self._max_size:
+            del self._revisions[next(iter(self._revisions))]
+
+        return revisions
+
+    @staticmethod
+    def _record(revisions, update_rev: str, seq: int, replaced: bool):
+        known = revisions.get(update_rev)
+        if known is not None and known[0] > seq:
+            return
+
+        revisions.pop(update_rev, None)
+        revisions[update_rev] = (seq, replaced)
+        while len(revisions) > _MAX_REVISIONS_PER_CONFIG:
+            del revisions[next(iter(revisions))]
+
+    def publish(self, config_id: str, new_rev: str, old_rev: Optional[str] = None):
+        """
+        Config was written by database with `new_rev`.
+        `old_rev` is revision replaced by update, as returned by database
+        """
+
+        replaced = old_rev is not None and old_rev != new_rev
+        if replaced:
+            self._cancel(config_id, old_rev)
+
+        revisions = self._config_revisions(config_id)
+        if revisions is None or revisions is _DELETED:
+            return
+
+        seq = next(self._sequence)
+        if replaced:
+            self._record(revisions, old_rev, seq, True)
+        self._record(revisions, new_rev, seq, False)
+
+    def forget(self, config_id: str):
+        """Config was deleted"""
+
+        self._cancel(config_id)
+        if self._config_revisions(config_id) is not None:
+            self._revisions[config_id] = _DELETED
+
+    def is_stale(self, config_id: str, update_rev: str) -> bool:
+        revisions = self._revisions.get(config_id)
+        if revisions is None:
+            return False
+
+        if revisions is not _DELETED:
+            known = revisions.get(update_rev)
+            if known is None or not known[1]:
+                return False
+
+        self.skipped += 1
+        return True
+
+    async def run(self, config_id: str, update_rev: str, func: Callable[[], Awaitable[Any]]):
+
+        """
+        Run `func` unless revision is stale. Raises `SupersededRevision`
+        if revision is replaced or config is deleted before `func` is done
+        """
+
+        if self.is_stale(config_id, update_rev):
+            raise SupersededRevision(config_id, update_rev)
+
+        task = asyncio.ensure_future(func())
+        running = self._running.setdefault(config_id, {})
+        running[task] = update_rev
+
+        try:
+            return await task
+        except asyncio.CancelledError:
+            if task in self._superseded:
+                self._logger.debug("Verification of config '%s' is cancelled: revision is replaced", config_id)
+                raise SupersededRevision(config_id, update_rev) from None
+            raise
+        finally:
+            self._superseded.discard(task)
+            del running[task]
+            if not running:
+                del self._running[config_id]
+
+    def stats(self) -> Dict[str, Optional[int]]:
+        return dict(
+            size=len(self._revisions),
+            max_size=self._max_size,
+            running=sum(len(tasks) for tasks in self._running.values()),
+            skipped=self.skipped,
+            cancelled=self.cancelled,
+        )
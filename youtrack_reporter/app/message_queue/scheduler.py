@@ -0,0 +1,297 @@
+from __future__ import annotations
+from typing import Deque, Dict, Optional, Set
+from contextlib import asynccontextmanager
+from collections import deque
+
+import asyncio
+import time
+
+from youtrack_reporter.app import metrics
+
+LANE_UNIQUE = "unique"
+LANE_DUPLICATE = "duplicate"
+
+
+class _Integration:
+    waiters: Dict[str, Deque[asyncio.Future]]
+    in_flight: int
+
+    def __init__(self):
+        self.waiters = {}
+        self.in_flight = 0
+
+    @property
+    def queued(self) -> int:
+        return sum(len(waiters) for waiters in self.waiters.values())
+
+
+class _Lane:
+    name: str
+    weight: int
+    slo: Optional[float]
+    ready: Deque[str]
+    current: int
+    in_flight: int
+    dispatched: int
+    slo_violations: int
+
+    def __init__(self, name: str, weight: int, slo: Optional[float]):
+        if weight < 1:
+            raise ValueError(f"Weight of lane '{name}' must be positive")
+
+        self.name = name
+        self.weight = weight
+        self.slo = slo
+        self.ready = deque()
+        self.current = 0
+        self.in_flight = 0
+        self.dispatched = 0
+        self.slo_violations = 0
+
+
+class FairScheduler:
+
+    """
+    Limits count of reports processed concurrently.
+    Besides global limit, each integration has its own one.
+    Reports are queued in lanes, and free slots are given to lanes
+    in proportion to their weights, so that cheap but numerous reports
+    don't delay important ones. Inside of lane, slots are given to
+    waiting integrations in round-robin order, so noisy integration
+    can not starve the others.
+    """
+
+    _max_concurrency: int
+    _max_per_integration: int
+    _integrations: Dict[str, _Integration]
+    _lanes: Dict[str, _Lane]
+    _in_flight: int
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_per_integration: int,
+        weights: Optional[Dict[str, int]] = None,
+        slo: Optional[Dict[str, float]] = None,
+    ):
+        weights = weights or {"default": 1}
+        slo = slo or {}
+
+        self._max_concurrency = max_concurrency
+        self._max_per_integration = max_per_integration
+        self._integrations = {}
+        self._lanes = {
+            name: _Lane(name, weight, slo.get(name))
+            for name, weight in weights.items()
+        }
+        self._in_flight = 0
+
+    @asynccontextmanager
+    async def slot(self, key: str, lane: Optional[str] = None):
+
+        """
+        Wait for free slot of integration `key` in `lane`.
+        Time from request to release is observed as lane latency
+        """
+
+        lane = self._get_lane(lane)
+        start = time.perf_counter()
+
+        await self._acquire(key, lane)
+        try:
+            yield
+        finally:
+            self._release(key, lane)
+            self._observe(lane, time.perf_counter() - start)
+
+    def _get_lane(self, name: Optional[str]) -> _Lane:
+        if name is None:
+            return next(iter(self._lanes.values()))
+        try:
+            return self._lanes[name]
+        except KeyError:
+            raise ValueError(f"Unknown lane '{name}'")
+
+    def _observe(self, lane: _Lane, latency: float):
+        metrics.LANE_LATENCY.labels(lane.name).observe(latency)
+        if lane.slo is not None and latency > lane.slo:
+            lane.slo_violations += 1
+            metrics.LANE_SLO_VIOLATIONS.labels(lane.name).inc()
+
+    def _get_integration(self, key: str):
+        try:
+            return self._integrations[key]
+        except KeyError:
+            integration = self._integrations[key] = _Integration()
+            return integration
+
+    def _take(self, integration: _Integration, lane: _Lane):
+        integration.in_flight += 1
+        lane.in_flight += 1
+        lane.dispatched += 1
+        self._in_flight += 1
+
+    async def _acquire(self, key: str, lane: _Lane):
+        integration = self._get_integration(key)
+
+        if (
+            not integration.queued
+            and self._in_flight < self._max_concurrency
+            and integration.in_flight < self._max_per_integration
+        ):
+            self._take(integration, lane)
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        waiters = integration.waiters.setdefault(lane.name, deque())
+        if not waiters:
+            lane.ready.append(key)
+        waiters.append(waiter)
+
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Slot was given right before cancellation
+                self._release(key, lane)
+            else:
+                self._discard_waiter(key, integration, lane, waiter)
+            raise
+
+    def _drop_waiters(self, key: str, integration: _Integration, lane: _Lane):
+        # Integration leaves lane with its last waiter, so it can't
+        # be put to `lane.ready` twice
+        del integration.waiters[lane.name]
+        try:
+            lane.ready.remove(key)
+        except ValueError:
+            pass
+        self._forget_if_idle(key, integration)
+
+    def _discard_waiter(self, key: str, integration: _Integration, lane: _Lane, waiter: asyncio.Future):
+        waiters = integration.waiters.get(lane.name)
+        if waiters is None:
+            return
+
+        # Waiter may have been skipped by dispatch already
+        try:
+            waiters.remove(waiter)
+        except ValueError:
+            pass
+
+        if not waiters:
+            self._drop_waiters(key, integration, lane)
+
+    def _release(self, key: str, lane: _Lane):
+        integration = self._integrations[key]
+        integration.in_flight -= 1
+        lane.in_flight -= 1
+        self._in_flight -= 1
+        self._dispatch()
+        self._forget_if_idle(key, integration)
+
+    def _forget_if_idle(self, key: str, integration: _Integration):
+        if integration.in_flight == 0 and not integration.queued:
+            self._integrations.pop(key, None)
+
+    def _pick_lane(self, blocked: Set[str]) -> Optional[_Lane]:
+
+        # Smooth weighted round-robin: lane with the highest
+        # current weight wins and is charged with the total weight
+        eligible = [
+            lane for lane in self._lanes.values()
+            if lane.ready and lane.name not in blocked
+        ]
+
+        if not eligible:
+            return None
+
+        for lane in eligible:
+            lane.current += lane.weight
+
+        chosen = max(eligible, key=lambda lane: lane.current)
+        chosen.current -= sum(lane.weight for lane in eligible)
+        return chosen
+
+    def _dispatch_lane(self, lane: _Lane) -> bool:
+
+        """Give slot to the next integration of lane. False if none can take it"""
+
+        skipped = 0
+        while lane.ready:
+
+            # Every ready integration has reached its own limit
+            if skipped >= len(lane.ready):
+                return False
+
+            key = lane.ready.popleft()
+            integration = self._integrations.get(key)
+            waiters = integration.waiters.get(lane.name) if integration else None
+
+            # Like asyncio.Semaphore, skip waiters cancelled
+            # but not yet resumed to remove themselves
+            while waiters and waiters[0].done():
+                waiters.popleft()
+
+            if not waiters:
+                if integration is not None and waiters is not None:
+                    self._drop_waiters(key, integration, lane)
+                continue
+
+            if integration.in_flight >= self._max_per_integration:
+                lane.ready.append(key)
+                skipped += 1
+                continue
+
+            waiter = waiters.popleft()
+            waiter.set_result(None)
+            self._take(integration, lane)
+
+            # Cancelled waiters are left for the next dispatch
+            if waiters:
+                lane.ready.append(key)
+            else:
+                del integration.waiters[lane.name]
+
+            return True
+
+        return False
+
+    def _dispatch(self):
+
+        blocked: Set[str] = set()
+        while self._in_flight < self._max_concurrency:
+            lane = self._pick_lane(blocked)
+            if lane is None:
+                break
+            if not self._dispatch_lane(lane):
+                blocked.add(lane.name)
+
+    def stats(self) -> dict:
+        return dict(
+            max_concurrency=self._max_concurrency,
+            max_per_integration=self._max_per_integration,
+            in_flight=self._in_flight,
+            queued=sum(i.queued for i in self._integrations.values()),
+            lanes={
+                name: dict(
+                    weight=lane.weight,
+                    slo=lane.slo,
+                    queued=sum(
+                        len(i.waiters.get(name, ()))
+                        for i in self._integrations.values()
+                    ),
+                    in_flight=lane.in_flight,
+                    dispatched=lane.dispatched,
+                    slo_violations=lane.slo_violations,
+                )
+                for name, lane in self._lanes.items()
+            },
+            integrations={
+                key: dict(
+                    queued=integration.queued,
+                    in_flight=integration.in_flight,
+                )
+                for key, integration in self._integrations.items()
+            },
+        )
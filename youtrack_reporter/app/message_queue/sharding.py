@@ -0,0 +1,175 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Dict, List, Set
+from bisect import bisect_right
+
+import hashlib
+
+from mqtransport import MQApp
+
+from youtrack_reporter.app.metrics import measured_consumer
+from youtrack_reporter.app.message_queue.participants import MeasuredProducer
+from youtrack_reporter.app.message_queue.api_gateway import (
+    MC_DuplicateCrashFound,
+    MC_UniqueCrashFound,
+)
+
+if TYPE_CHECKING:
+    from youtrack_reporter.app.settings import ShardingSettings
+    from .state import MQAppState
+
+
+def _hash(value: str) -> int:
+    digest = hashlib.blake2b(value.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+class HashRing:
+
+    """
+    Consistent hashing of keys to shards. Each shard is placed on the
+    ring several times, so keys are spread evenly, and changing count
+    of shards moves only a small part of keys
+    """
+
+    _points: List[int]
+    _shards: List[int]
+
+    def __init__(self, shards: int, virtual_nodes: int):
+        ring = sorted(
+            (_hash(f"shard-{shard}-{node}"), shard)
+            for shard in range(shards)
+            for node in range(virtual_nodes)
+        )
+        self._points = [point for point, _ in ring]
+        self._shards = [shard for _, shard in ring]
+
+    def get(self, key: str) -> int:
+        i = bisect_right(self._points, _hash(key)) % len(self._points)
+        return self._shards[i]
+
+
+def rendezvous_owner(shard: int, replicas: int) -> int:
+    """Replica owning shard. Adding replica moves only shards it takes"""
+    return max(range(replicas), key=lambda replica: _hash(f"{shard}:{replica}"))
+
+
+class ShardMap:
+
+    """
+    Maps integrations to shards and shards to replicas. Crashes of
+    the same integration are always processed by the same replica,
+    so its caches and duplicate coalescing see all of them.
+    Map is rebalanced by changing count of replicas, or explicitly,
+    by listing owned shards of each replica.
+    """
+
+    _ring: HashRing
+    _queue_prefix: str
+
+    shards: int
+    replica: int
+    replicas: int
+    owned: Set[int]
+
+    def __init__(self, settings: ShardingSettings, queue_prefix: str):
+
+        if settings.shards < 1:
+            raise ValueError("Count of shards must be positive")
+
+        if not 0 <= settings.replica < settings.replicas:
+            raise ValueError(f"Replica must be in range [0, {settings.replicas})")
+
+        self._ring = HashRing(settings.shards, settings.virtual_nodes)
+        self._queue_prefix = queue_prefix
+
+        self.shards = settings.shards
+        self.replica = settings.replica
+        self.replicas = settings.replicas
+
+        if settings.owned_shards:
+            self.owned = {int(shard) for shard in settings.owned_shards.split(",")}
+            if not self.owned <= set(range(self.shards)):
+                raise ValueError(f"Owned shards must be in range [0, {self.shards})")
+        else:
+            self.owned = {
+                shard
+                for shard in range(self.shards)
+                if rendezvous_owner(shard, self.replicas) == self.replica
+            }
+
+    def shard_for(self, config_id: str) -> int:
+        return self._ring.get(config_id)
+
+    def owns(self, shard: int) -> bool:
+        return shard in self.owned
+
+    def queue_name(self, shard: int) -> str:
+        return f"{self._queue_prefix}-shard-{shard}"
+
+    def stats(self) -> Dict:
+        return dict(
+            shards=self.shards,
+            replica=self.replica,
+            replicas=self.replicas,
+            owned=sorted(self.owned),
+            queues={shard: self.queue_name(shard) for shard in sorted(self.owned)},
+        )
+
+
+class MP_UniqueCrashFound(MeasuredProducer):
+    name = MC_UniqueCrashFound.name
+    Model = MC_UniqueCrashFound.Model
+
+
+class MP_DuplicateCrashFound(MeasuredProducer):
+    name = MC_DuplicateCrashFound.name
+    Model = MC_DuplicateCrashFound.Model
+
+
+class ShardProducers:
+    unique_crash: MP_UniqueCrashFound
+    duplicate_crash: MP_DuplicateCrashFound
+
+    def __init__(self):
+        self.unique_crash = MP_UniqueCrashFound()
+        self.duplicate_crash = MP_DuplicateCrashFound()
+
+
+class MC_RouteUniqueCrash(MC_UniqueCrashFound):
+
+    """Forward unique crash to queue of its shard, unless shard is owned"""
+
+    async def consume(self, msg: MC_UniqueCrashFound.Model, app: MQApp):
+        state: MQAppState = app.state
+        shard = state.shard_map.shard_for(msg.config_id)
+
+        # Each message is measured once: either processed or forwarded
+        if state.shard_map.owns(shard):
+            return await super().consume(msg, app)
+
+        await self._forward(msg, state, shard)
+
+    @measured_consumer("MC_RouteUniqueCrash")
+    async def _forward(self, msg: MC_UniqueCrashFound.Model, state: MQAppState, shard: int):
+        producer = state.producers.shards[shard].unique_crash
+        await producer.produce(**msg.dict())
+
+
+class MC_RouteDuplicateCrash(MC_DuplicateCrashFound):
+
+    """Forward duplicate crash to queue of its shard, unless shard is owned"""
+
+    async def consume(self, msg: MC_DuplicateCrashFound.Model, app: MQApp):
+        state: MQAppState = app.state
+        shard = state.shard_map.shard_for(msg.config_id)
+
+        # Each message is measured once: either processed or forwarded
+        if state.shard_map.owns(shard):
+            return await super().consume(msg, app)
+
+        await self._forward(msg, state, shard)
+
+    @measured_consumer("MC_RouteDuplicateCrash")
+    async def _forward(self, msg: MC_DuplicateCrashFound.Model, state: MQAppState, shard: int):
+        producer = state.producers.shards[shard].duplicate_crash
+        await producer.produce(**msg.dict())
@@ -1,16 +1,30 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 if TYPE_CHECKING:
     from ..youtrack import YouTrackAsyncAPI
     from youtrack_reporter.app.settings import AppSettings
     from youtrack_reporter.app.database.abstract import IDatabase
+    from youtrack_reporter.app.database.cache import ConfigCache
+    from youtrack_reporter.app.database.batching import IssueBatcher
     from youtrack_reporter.app.message_queue.instance import Producers
+    from youtrack_reporter.app.message_queue.coalescing import MaxValueCoalescer
+    from youtrack_reporter.app.message_queue.scheduler import FairScheduler
+    from youtrack_reporter.app.message_queue.journal import UnsentMessagesJournal
+    from youtrack_reporter.app.message_queue.sharding import ShardMap
+    from youtrack_reporter.app.message_queue.revisions import RevisionIndex
 
 
 
 class MQAppState:
     youtrack_api: YouTrackAsyncAPI
     db: IDatabase
+    config_cache: ConfigCache
+    issue_batcher: IssueBatcher
     settings: AppSettings
-    producers: Producers
\ No newline at end of file
+    producers: Producers
+    duplicates: MaxValueCoalescer
+    scheduler: FairScheduler
+    unsent_journal: UnsentMessagesJournal
+    shard_map: Optional[ShardMap]
+    revisions: RevisionIndex
\ No newline at end of file
@@ -0,0 +1,345 @@
+"""
+Minimal prometheus metrics. Service runs in a single event loop thread,
+so metrics are updated without any locks.
+"""
+
+from __future__ import annotations
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+from bisect import bisect_left
+
+import functools
+import time
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+    0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+
+    def escape(value: str):
+        return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+    pairs = [f'{name}="{escape(str(value))}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    type: str = ""
+
+    name: str
+    documentation: str
+    label_names: Tuple[str, ...]
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._children = {}
+
+    def labels(self, *values):
+        values = tuple(str(v) for v in values)
+        try:
+            return self._children[values]
+        except KeyError:
+            if len(values) != len(self.label_names):
+                raise ValueError(f"Metric '{self.name}' expects labels {self.label_names}")
+            child = self._children[values] = self._create_child()
+            return child
+
+    def _create_child(self):
+        raise NotImplementedError()
+
+    def _samples(self) -> Iterator[str]:
+        raise NotImplementedError()
+
+    def expose(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.type}"
+        yield from self._samples()
+
+
+class _CounterChild:
+    value: float
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        # Family is named without suffix, samples are named with it
+        if name.endswith("_total"):
+            name = name[:-len("_total")]
+        super().__init__(name, documentation, label_names)
+
+    def _create_child(self):
+        return _CounterChild()
+
+    def _samples(self):
+        for values, child in self._children.items():
+            labels = _format_labels(self.label_names, values)
+            yield f"{self.name}_total{labels} {_format_value(child.value)}"
+
+
+class _GaugeChild:
+    value: float
+
+    def __init__(self):
+        self.value = 0
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def _create_child(self):
+        return _GaugeChild()
+
+    def _samples(self):
+        for values, child in self._children.items():
+            labels = _format_labels(self.label_names, values)
+            yield f"{self.name}{labels} {_format_value(child.value)}"
+
+
+class _HistogramChild:
+    buckets: Tuple[float, ...]
+    counts: List[int]
+    sum: float
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    buckets: Tuple[float, ...]
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def _create_child(self):
+        return _HistogramChild(self.buckets)
+
+    def _samples(self):
+        names = self.label_names + ("le",)
+        for values, child in self._children.items():
+            cumulative = 0
+            bounds = self.buckets + (float("inf"),)
+            for bound, count in zip(bounds, child.counts):
+                cumulative += count
+                labels = _format_labels(names, values + (_format_value(bound),))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+
+            labels = _format_labels(self.label_names, values)
+            yield f"{self.name}_sum{labels} {_format_value(child.sum)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Registry:
+
+    _metrics: Dict[str, _Metric]
+    _collectors: List[Callable[[], None]]
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+
+    def register(self, metric: _Metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric '{metric.name}' is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]):
+        """Collector is called before exposition to refresh gauges"""
+        self._collectors.append(collector)
+
+    def expose(self) -> str:
+        for collector in self._collectors:
+            collector()
+
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.expose())
+
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+def counter(name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, label_names))
+
+
+def gauge(name: str, documentation: str, label_names: Sequence[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, label_names))
+
+
+def histogram(name: str, documentation: str, label_names: Sequence[str] = (), **kwargs) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, label_names, **kwargs))
+
+
+########################################
+# Service metrics
+########################################
+
+CONSUMED_MESSAGES = counter(
+    "youtrack_reporter_consumed_messages",
+    "Messages processed by consumers",
+    ["consumer", "result"],
+)
+
+CONSUME_DURATION = histogram(
+    "youtrack_reporter_consume_duration_seconds",
+    "Time spent processing message by consumer",
+    ["consumer"],
+)
+
+YOUTRACK_REQUESTS = counter(
+    "youtrack_reporter_youtrack_requests",
+    "Requests sent to YouTrack",
+    ["operation", "status"],
+)
+
+YOUTRACK_REQUEST_DURATION = histogram(
+    "youtrack_reporter_youtrack_request_duration_seconds",
+    "YouTrack request latency including retries",
+    ["operation"],
+)
+
+DB_OPERATIONS = counter(
+    "youtrack_reporter_db_operations",
+    "Database operations performed",
+    ["operation", "result"],
+)
+
+DB_OPERATION_DURATION = histogram(
+    "youtrack_reporter_db_operation_duration_seconds",
+    "Database operation latency",
+    ["operation"],
+)
+
+PRODUCED_MESSAGES = counter(
+    "youtrack_reporter_produced_messages",
+    "Messages produced to message queue",
+    ["producer", "result"],
+)
+
+PRODUCE_DURATION = histogram(
+    "youtrack_reporter_produce_duration_seconds",
+    "Time spent producing message",
+    ["producer"],
+)
+
+CONFIG_CACHE_LOOKUPS = counter(
+    "youtrack_reporter_config_cache_lookups",
+    "Config cache lookups since start",
+    ["result"],
+)
+
+SCHEDULED_REPORTS = gauge(
+    "youtrack_reporter_scheduled_reports",
+    "Reports waiting for or holding scheduler slot",
+    ["state"],
+)
+
+LANE_LATENCY = histogram(
+    "youtrack_reporter_lane_latency_seconds",
+    "Time from scheduler slot request to its release by lane",
+    ["lane"],
+    buckets=DEFAULT_BUCKETS + (120.0, 300.0, 600.0),
+)
+
+LANE_SLO_VIOLATIONS = counter(
+    "youtrack_reporter_lane_slo_violations",
+    "Reports which latency exceeded SLO of their lane",
+    ["lane"],
+)
+
+LANE_REPORTS = gauge(
+    "youtrack_reporter_lane_reports",
+    "Reports waiting for or holding scheduler slot by lane",
+    ["lane", "state"],
+)
+
+
+def measured(total: Counter, duration: Histogram, name: str):
+
+    """
+    Decorator of coroutine function, which counts calls by result
+    (`ok` or exception class name) and observes their duration
+    """
+
+    counted = {}
+    observed = duration.labels(name)
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result = "ok"
+            try:
+                return await func(*args, **kwargs)
+            except BaseException as e:
+                result = type(e).__name__
+                raise
+            finally:
+                observed.observe(time.perf_counter() - start)
+                try:
+                    child = counted[result]
+                except KeyError:
+                    child = counted[result] = total.labels(name, result)
+                child.inc()
+
+        return wrapper
+
+    return decorator
+
+
+def measured_db(operation: str):
+    return measured(DB_OPERATIONS, DB_OPERATION_DURATION, operation)
+
+
+def measured_consumer(name: str):
+    return measured(CONSUMED_MESSAGES, CONSUME_DURATION, name)
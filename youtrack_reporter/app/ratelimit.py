@@ -0,0 +1,160 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Dict, Optional
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+
+import asyncio
+import logging
+import time
+
+if TYPE_CHECKING:
+    from yarl import URL
+    from youtrack_reporter.app.settings import YouTrackSettings
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+
+    """Parse 'Retry-After' header, which is either seconds or http date"""
+
+    if not value:
+        return None
+
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0)
+
+
+class TokenBucket:
+
+    """
+    Token bucket with adaptive rate. Rate is decreased multiplicatively
+    when server is throttling requests and restored additively on success.
+    Tokens are reserved in advance, so waiters are served in FIFO order.
+    """
+
+    max_rate: float
+    min_rate: float
+    rate: float
+    burst: float
+    tokens: float
+    blocked_until: float
+    throttled: int
+
+    _decrease: float
+    _recovery: float
+    _updated: float
+
+    def __init__(self, settings: YouTrackSettings):
+        self.max_rate = settings.rate_limit
+        self.min_rate = min(settings.rate_limit_min, settings.rate_limit)
+        self.rate = self.max_rate
+        self.burst = max(settings.rate_limit_burst, 1)
+        self.tokens = self.burst
+        self.blocked_until = 0.0
+        self.throttled = 0
+
+        self._decrease = settings.rate_limit_decrease
+        self._recovery = settings.rate_limit_recovery
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens -= 1
+
+        delay = max(-self.tokens / self.rate, self.blocked_until - now, 0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def on_success(self):
+        self.rate = min(self.max_rate, self.rate + self._recovery)
+
+    def on_throttled(self, retry_after: Optional[float]):
+        now = time.monotonic()
+        self._refill(now)
+
+        self.throttled += 1
+        self.rate = max(self.min_rate, self.rate * self._decrease)
+        self.tokens = min(self.tokens, 0)
+
+        if retry_after is not None:
+            self.blocked_until = max(self.blocked_until, now + retry_after)
+
+    def stats(self) -> Dict[str, float]:
+        return dict(
+            max_rate=self.max_rate,
+            rate=round(self.rate, 3),
+            burst=self.burst,
+            tokens=round(self.tokens, 3),
+            blocked_for=round(max(self.blocked_until - time.monotonic(), 0), 3),
+            throttled=self.throttled,
+        )
+
+
+class RateLimiter:
+
+    """Keeps token bucket for each YouTrack instance"""
+
+    _logger: logging.Logger
+    _settings: YouTrackSettings
+    _buckets: Dict[str, TokenBucket]
+
+    THROTTLING_STATUSES = (429, 503)
+
+    def __init__(self, settings: YouTrackSettings):
+        self._logger = logging.getLogger("YouTrack.limiter")
+        self._settings = settings
+        self._buckets = {}
+
+    @property
+    def enabled(self):
+        return self._settings.rate_limit > 0
+
+    def bucket(self, url: URL) -> TokenBucket:
+        origin = str(url.origin())
+        try:
+            return self._buckets[origin]
+        except KeyError:
+            bucket = self._buckets[origin] = TokenBucket(self._settings)
+            return bucket
+
+    async def acquire(self, url: URL):
+        if self.enabled:
+            await self.bucket(url).acquire()
+
+    def feedback(self, url: URL, status: int, retry_after: Optional[str]):
+        if not self.enabled:
+            return
+
+        bucket = self.bucket(url)
+        if status in self.THROTTLING_STATUSES:
+            bucket.on_throttled(parse_retry_after(retry_after))
+            self._logger.warning(
+                "YouTrack '%s' is throttling requests. Rate decreased to %.2f req/s",
+                url.origin(),
+                bucket.rate,
+            )
+        elif status < 500:
+            bucket.on_success()
+
+    def stats(self) -> dict:
+        return dict(
+            enabled=self.enabled,
+            hosts={host: bucket.stats() for host, bucket in self._buckets.items()},
+        )
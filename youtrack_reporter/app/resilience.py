@@ -0,0 +1,200 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Dict
+
+import logging
+import random
+import time
+
+from .errors import CircuitOpenError
+
+if TYPE_CHECKING:
+    from yarl import URL
+    from youtrack_reporter.app.settings import YouTrackSettings
+
+
+class CircuitBreaker:
+
+    """
+    Stops sending requests to YouTrack instance which fails permanently.
+    After `reset_timeout` single probe request is allowed (half-open state).
+    Circuit is closed again if probe succeeds.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    state: str
+    failures: int
+    opened: int
+
+    _threshold: int
+    _reset_timeout: float
+    _opened_at: float
+    _probing: bool
+
+    def __init__(self, threshold: int, reset_timeout: float):
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened = 0
+        self._threshold = threshold
+        self._reset_timeout = reset_timeout
+        self._opened_at = 0.0
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self._reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            self._probing = False
+
+        # Half-open: only one probe request at a time
+        if self._probing:
+            return False
+
+        self._probing = True
+        return True
+
+    def on_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def on_abort(self):
+        """Request was cancelled before its result became known"""
+        self._probing = False
+
+    def on_failure(self):
+        self.failures += 1
+        self._probing = False
+
+        if self.state == self.HALF_OPEN or self.failures >= self._threshold:
+            if self.state != self.OPEN:
+                self.opened += 1
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        return dict(
+            state=self.state,
+            failures=self.failures,
+            opened=self.opened,
+        )
+
+
+class RetryBudget:
+
+    """
+    Limits retries to a fraction of requests,
+    so retries can not multiply load of failing instance
+    """
+
+    _ratio: float
+    _max_tokens: float
+    tokens: float
+
+    def __init__(self, ratio: float, max_tokens: float = 10):
+        self._ratio = ratio
+        self._max_tokens = max_tokens
+        self.tokens = max_tokens
+
+    def on_request(self):
+        self.tokens = min(self._max_tokens, self.tokens + self._ratio)
+
+    def try_withdraw(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class HostGuard:
+    breaker: CircuitBreaker
+    budget: RetryBudget
+    retries: int
+
+    def __init__(self, settings: YouTrackSettings):
+        self.breaker = CircuitBreaker(
+            settings.circuit_failure_threshold,
+            settings.circuit_reset_timeout,
+        )
+        self.budget = RetryBudget(settings.retry_budget_ratio)
+        self.retries = 0
+
+    def stats(self) -> dict:
+        return dict(
+            **self.breaker.stats(),
+            retries=self.retries,
+            retry_budget=round(self.budget.tokens, 3),
+        )
+
+
+class Resilience:
+
+    """Retry policy and circuit breakers of YouTrack instances"""
+
+    _logger: logging.Logger
+    _settings: YouTrackSettings
+    _hosts: Dict[str, HostGuard]
+
+    def __init__(self, settings: YouTrackSettings):
+        self._logger = logging.getLogger("YouTrack.resilience")
+        self._settings = settings
+        self._hosts = {}
+
+    def _guard(self, url: URL) -> HostGuard:
+        origin = str(url.origin())
+        try:
+            return self._hosts[origin]
+        except KeyError:
+            guard = self._hosts[origin] = HostGuard(self._settings)
+            return guard
+
+    def before_request(self, url: URL, attempt: int):
+
+        """Raises `CircuitOpenError` if instance is considered unavailable"""
+
+        guard = self._guard(url)
+        if not guard.breaker.allow():
+            raise CircuitOpenError(str(url.origin()))
+
+        if attempt == 0:
+            guard.budget.on_request()
+
+    def on_success(self, url: URL):
+        self._guard(url).breaker.on_success()
+
+    def on_abort(self, url: URL):
+        self._guard(url).breaker.on_abort()
+
+    def on_failure(self, url: URL):
+        guard = self._guard(url)
+        state = guard.breaker.state
+        guard.breaker.on_failure()
+
+        if state != CircuitBreaker.OPEN and guard.breaker.state == CircuitBreaker.OPEN:
+            self._logger.warning("Circuit of YouTrack '%s' is open", url.origin())
+
+    def should_retry(self, url: URL, attempt: int) -> bool:
+        if attempt + 1 >= self._settings.retry_attempts:
+            return False
+
+        guard = self._guard(url)
+        if not guard.budget.try_withdraw():
+            return False
+
+        guard.retries += 1
+        return True
+
+    def backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter"""
+        base = self._settings.retry_backoff_base
+        cap = self._settings.retry_backoff_max
+        return random.uniform(0, min(cap, base * 2 ** attempt))
+
+    def stats(self) -> dict:
+        return {host: guard.stats() for host, guard in self._hosts.items()}
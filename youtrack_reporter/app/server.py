@@ -1,16 +1,27 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING
-from unittest import result
+from typing import TYPE_CHECKING, List, Optional, Tuple, Union
 from aiohttp import web
-from mqtransport.src.base.app import MQApp
 
-from youtrack_reporter.app.youtrack import YouTrackAsyncAPI
-from youtrack_reporter.app.database.instance import db_init
-from youtrack_reporter.app.message_queue.instance import mq_init
+from youtrack_reporter.app import metrics
+from youtrack_reporter.app.database.cache import ConfigCache
+from youtrack_reporter.app.database.batching import IssueBatcher
 from youtrack_reporter.app.message_queue.state import MQAppState
-from youtrack_reporter.app.database.errors import DBRecordNotFoundError
+from youtrack_reporter.app.message_queue.coalescing import MaxValueCoalescer
+from youtrack_reporter.app.message_queue.scheduler import FairScheduler, LANE_DUPLICATE, LANE_UNIQUE
+from youtrack_reporter.app.message_queue.journal import UnsentMessagesJournal
+from youtrack_reporter.app.message_queue.revisions import RevisionIndex
+from youtrack_reporter.app.database.errors import (
+    DatabaseError,
+    DBRecordNotFoundError,
+    DBRevisionMismatchError,
+)
+from youtrack_reporter.app.etag import config_etag, etag_rev, none_match, parse_etags
 from youtrack_reporter.app.database.orm import ORMConfig
+from youtrack_reporter.app.startup import Readiness, gather_all
 
+import asyncio
+import base64
+import binascii
 import logging
 
 if TYPE_CHECKING:
@@ -37,10 +48,10 @@ def configure_web_server():
         )
     
     @routes.get("/metrics")
-    async def metrics(request: web.Request):
+    async def get_metrics(request: web.Request):
         return web.Response(
-            body="should be some metrics, i don't know exactly",
-            content_type="text/plain; version=0.0.4;",
+            text=metrics.REGISTRY.expose(),
+            headers={"Content-Type": f"{metrics.CONTENT_TYPE}; charset=utf-8"},
         )
     
     @routes.get("/docs")
@@ -50,13 +61,311 @@ def configure_web_server():
             content_type="text/plain; version=0.0.4;",
         )
 
+    @routes.get("/health/live")
+    async def health_live(request: web.Request):
+        readiness: Readiness = request.app["readiness"]
+        alive = readiness.is_alive
+        return web.json_response(
+            status=200 if alive else 503,
+            data=dict(
+                status="OK" if alive else "Failed",
+                error=None if alive else "Service initialization failed",
+                result=dict(),
+            ),
+        )
+
+    @routes.get("/health/ready")
+    async def health_ready(request: web.Request):
+        readiness: Readiness = request.app["readiness"]
+        report = readiness.report()
+
+        mq_app = request.app.get("mq")
+        if mq_app is not None:
+            # Replay doesn't affect readiness, but its progress is useful
+            report["unsent_journal"] = mq_app.state.unsent_journal.stats()
+
+        ready = readiness.is_ready
+        return web.json_response(
+            status=200 if ready else 503,
+            data=dict(
+                status="OK" if ready else "Failed",
+                error=None if ready else "Service is not ready",
+                result=report,
+            ),
+        )
+
+    @routes.get(r"/api/v1/stats")
+    async def get_stats(request: web.Request):
+        state: MQAppState = request.app['mq'].state
+        return web.json_response(
+            status=200,
+            data=dict(
+                status="OK",
+                error=None,
+                result=dict(
+                    config_cache=state.config_cache.stats(),
+                    issue_batcher=state.issue_batcher.stats(),
+                    youtrack=state.youtrack_api.stats(),
+                    duplicates=state.duplicates.stats(),
+                    scheduler=state.scheduler.stats(),
+                    unsent_journal=state.unsent_journal.stats(),
+                    revisions=state.revisions.stats(),
+                ),
+            ),
+        )
+
+    @routes.get(r"/api/v1/shards")
+    async def get_shards(request: web.Request):
+        state: MQAppState = request.app['mq'].state
+        shard_map = state.shard_map
+        return web.json_response(
+            status=200,
+            data=dict(
+                status="OK",
+                error=None,
+                result=dict(
+                    enabled=shard_map is not None,
+                    **(shard_map.stats() if shard_map is not None else {}),
+                ),
+            ),
+        )
+
+    def batch_item(code: int, error: Optional[str] = None, result: Optional[dict] = None):
+        return dict(
+            code=code,
+            status="OK" if error is None else "Failed",
+            error=error,
+            result=result or dict(),
+        )
+
+    def batch_failed(code: int, error: str):
+        return web.json_response(
+            status=code,
+            data=dict(
+                status="Failed",
+                error=error,
+                result=[],
+            ),
+        )
+
+    def batch_limit_error(request: web.Request, size: int) -> Optional[web.Response]:
+        limit = request.app['mq'].state.settings.server.batch_max_size
+        if size > limit:
+            return batch_failed(413, f"Too many items, limit is {limit}")
+        return None
+
+    async def read_batch_body(request: web.Request) -> Union[list, web.Response]:
+        if not request.can_read_body:
+            return batch_failed(422, "Request body must be provided")
+
+        body = await request.json()
+        if not isinstance(body, list):
+            return batch_failed(422, "Request body must be a list")
+
+        # Response is a mapping, so it's falsy and can't be used with `or`
+        error = batch_limit_error(request, len(body))
+        return body if error is None else error
+
+    def read_batch_ids(request: web.Request) -> Union[List[str], web.Response]:
+        ids = [i for i in request.query.get("ids", "").split(",") if i]
+        if not ids:
+            return batch_failed(422, "Config ids must be provided")
+
+        error = batch_limit_error(request, len(ids))
+        return ids if error is None else error
+
+    def parse_batch_config(item) -> ORMConfig:
+        if not isinstance(item, dict):
+            raise ValueError("Config must be an object")
+        return ORMConfig(**item)
+
+    # Batch routes are registered before `{id}` ones, which would match them
+    @routes.get(r"/api/v1/integrations/batch")
+    async def get_configs(request: web.Request):
+        state: MQAppState = request.app['mq'].state
+
+        ids = read_batch_ids(request)
+        if isinstance(ids, web.Response):
+            return ids
+
+        configs = await state.db.configs.get_many(ids)
+
+        results = []
+        for config_id in ids:
+            config = configs.get(config_id)
+            if config is not None:
+                results.append(batch_item(200, result=config.dict(exclude={'project_id'})))
+            else:
+                results.append(batch_item(404, "Not found"))
+
+        return web.json_response(
+            status=200,
+            data=dict(
+                status="OK",
+                error=None,
+                result=results,
+            ),
+        )
+
+    @routes.post(r"/api/v1/integrations/batch")
+    async def insert_configs(request: web.Request):
+        state: MQAppState = request.app['mq'].state
+
+        body = await read_batch_body(request)
+        if isinstance(body, web.Response):
+            return body
+
+        results: List[Optional[dict]] = [None] * len(body)
+        valid: List[Tuple[int, ORMConfig]] = []
+
+        for i, item in enumerate(body):
+            try:
+                config = parse_batch_config(item)
+            except (TypeError, ValueError) as e:
+                results[i] = batch_item(422, str(e))
+                continue
+
+            config.id = None
+            valid.append((i, config))
+
+        inserted = await state.db.configs.insert_many([config for _, config in valid])
+
+        configs: List[ORMConfig] = []
+        for (i, _), config in zip(valid, inserted):
+            if isinstance(config, DatabaseError):
+                results[i] = batch_item(500, str(config))
+                continue
+
+            configs.append(config)
+            state.revisions.publish(config.id, config.update_rev)
+            results[i] = batch_item(202, result=dict(id=config.id))
+
+        await state.producers.verify_youtrack.produce_many([
+            dict(config_id=config.id, update_rev=config.update_rev)
+            for config in configs
+        ])
+
+        return web.json_response(
+            status=202,
+            data=dict(
+                status="OK",
+                error=None,
+                result=results,
+            ),
+        )
+
+    @routes.put(r"/api/v1/integrations/batch")
+    async def update_configs(request: web.Request):
+        state: MQAppState = request.app['mq'].state
+
+        body = await read_batch_body(request)
+        if isinstance(body, web.Response):
+            return body
+
+        results: List[Optional[dict]] = [None] * len(body)
+        valid: List[Tuple[int, ORMConfig]] = []
+
+        for i, item in enumerate(body):
+            try:
+                config = parse_batch_config(item)
+            except (TypeError, ValueError) as e:
+                results[i] = batch_item(422, str(e))
+                continue
+
+            if config.id is None:
+                results[i] = batch_item(422, "Config id must be provided")
+                continue
+
+            valid.append((i, config))
+
+        updated = await state.db.configs.update_many([config for _, config in valid])
+
+        verified = []
+        for i, config in valid:
+            try:
+                old_config, new_config = updated[config.id]
+            except KeyError:
+                results[i] = batch_item(404, "Record not found")
+                continue
+
+            state.config_cache.invalidate(config.id)
+            # Cancels verification of replaced revision
+            state.revisions.publish(config.id, new_config.update_rev, old_config.update_rev)
+            verified.append(new_config)
+
+            results[i] = batch_item(202, result=dict(
+                old=old_config.dict(exclude={'id', 'update_rev', 'project_id'}),
+                new=new_config.dict(exclude={'id', 'update_rev', 'project_id'}),
+            ))
+
+        await state.producers.verify_youtrack.produce_many([
+            dict(config_id=config.id, update_rev=config.update_rev)
+            for config in verified
+        ])
+
+        return web.json_response(
+            status=202,
+            data=dict(
+                status="OK",
+                error=None,
+                result=results,
+            ),
+        )
+
+    @routes.delete(r"/api/v1/integrations/batch")
+    async def delete_configs(request: web.Request):
+        state: MQAppState = request.app['mq'].state
+
+        ids = read_batch_ids(request)
+        if isinstance(ids, web.Response):
+            return ids
+
+        missing = set(await state.db.configs.delete_many(ids))
+
+        results = []
+        for config_id in ids:
+            if config_id in missing:
+                results.append(batch_item(404, "Record not found"))
+                continue
+
+            state.config_cache.invalidate(config_id)
+            state.revisions.forget(config_id)
+            results.append(batch_item(204))
+
+        return web.json_response(
+            status=200,
+            data=dict(
+                status="OK",
+                error=None,
+                result=results,
+            ),
+        )
+
     @routes.get(r"/api/v1/integrations/{id}")
     async def get_config(request: web.Request):
         req_id = request.match_info["id"]
         state: MQAppState = request.app['mq'].state
         
-        config: ORMConfig = await state.db.configs.get(req_id)
+        # Conditional request for unchanged config is answered from
+        # cache without database. Full response is always read from
+        # database, because cache may miss updates made by other replicas
+        headers = {}
+        if_none_match = request.headers.get("If-None-Match")
+        try:
+            if if_none_match is None:
+                config: ORMConfig = await state.db.configs.get(req_id)
+                state.config_cache.put(config)
+            else:
+                config = await state.config_cache.get(req_id)
+        except DBRecordNotFoundError:
+            config = None
+
         if config:
+            etag = config_etag(config.update_rev)
+            headers["ETag"] = etag
+            if not none_match(if_none_match, etag):
+                return web.Response(status=304, headers=headers)
+
             code = 200
             error = None
             result = config.dict(exclude={'project_id'})
@@ -69,6 +378,7 @@ def configure_web_server():
         status = "OK" if error is None else "Failed"
         return web.json_response(
             status=code,
+            headers=headers,
             data=dict(
                 status=status,
                 error=error,
@@ -76,6 +386,106 @@ def configure_web_server():
             ),
         )
 
+    async def if_match_rev(request: web.Request, config_id: str) -> Optional[str]:
+
+        """
+        Revision which config must have according to `If-Match`.
+        None if any revision is allowed. Raises `DBRevisionMismatchError`
+        if none of listed tags can match
+        """
+
+        header = request.headers.get("If-Match")
+        if header is None:
+            return None
+
+        tags = parse_etags(header)
+        if tags is None:
+            return None
+
+        revs = {rev for rev in map(etag_rev, tags) if rev is not None}
+        if len(revs) == 1:
+            return revs.pop()
+
+        if revs:
+            # Rarely several tags are given: find the actual one
+            state: MQAppState = request.app['mq'].state
+            config: ORMConfig = await state.db.configs.get(config_id)
+            if config.update_rev in revs:
+                return config.update_rev
+
+        raise DBRevisionMismatchError()
+
+    # Fields of config which can be returned by API
+    CONFIG_FIELDS = ("id", "update_rev", "url", "token", "project")
+
+    def encode_cursor(config_id: str) -> str:
+        return base64.urlsafe_b64encode(config_id.encode()).decode()
+
+    def decode_cursor(cursor: str) -> str:
+        try:
+            return base64.urlsafe_b64decode(cursor.encode()).decode()
+        except (binascii.Error, UnicodeError) as e:
+            raise ValueError("Invalid cursor") from e
+
+    def list_failed(code: int, error: str):
+        return web.json_response(
+            status=code,
+            data=dict(
+                status="Failed",
+                error=error,
+                result=dict(),
+            ),
+        )
+
+    @routes.get(r"/api/v1/integrations")
+    async def list_configs(request: web.Request):
+        state: MQAppState = request.app['mq'].state
+        settings = state.settings.server
+        query = request.query
+
+        try:
+            limit = int(query.get("limit", settings.page_size))
+            after = decode_cursor(query["cursor"]) if "cursor" in query else None
+        except ValueError as e:
+            return list_failed(422, str(e))
+
+        if not 0 < limit <= settings.page_max_size:
+            return list_failed(422, f"Limit must be in range 1..{settings.page_max_size}")
+
+        fields = set(query["fields"].split(",")) if "fields" in query else set(CONFIG_FIELDS)
+        unknown = fields.difference(CONFIG_FIELDS)
+        if unknown:
+            return list_failed(422, f"Unknown fields: {', '.join(sorted(unknown))}")
+
+        # One more config tells whether there is next page
+        try:
+            configs = await state.db.configs.get_page(
+                limit + 1,
+                after=after,
+                url=query.get("url"),
+                project=query.get("project"),
+            )
+        except DBRecordNotFoundError:
+            # Cursor doesn't contain valid config id
+            return list_failed(422, "Invalid cursor")
+
+        next_cursor = None
+        if len(configs) > limit:
+            configs = configs[:limit]
+            next_cursor = encode_cursor(configs[-1].id)
+
+        return web.json_response(
+            status=200,
+            data=dict(
+                status="OK",
+                error=None,
+                result=dict(
+                    items=[config.dict(include=fields) for config in configs],
+                    next_cursor=next_cursor,
+                ),
+            ),
+        )
+
     @routes.post(r"/api/v1/integrations")
     async def insert_config(request: web.Request):
         state: MQAppState = request.app['mq'].state
@@ -89,6 +499,7 @@ def configure_web_server():
             if config.id is None:
                 raise
             
+            state.revisions.publish(config.id, config.update_rev)
             await state.producers.verify_youtrack.produce(
                 config_id=config.id,
                 update_rev=config.update_rev,
@@ -120,13 +531,18 @@ def configure_web_server():
         state: MQAppState = request.app['mq'].state
 
         result = dict()
+        headers = {}
 
         if request.can_read_body:
             body = await request.json()
             config: ORMConfig = ORMConfig(**body)
             config.id = config_id
             try:
-                (old_config, new_config) = await state.db.configs.update(config)
+                expected_rev = await if_match_rev(request, config_id)
+                (old_config, new_config) = await state.db.configs.update(config, expected_rev)
+                state.config_cache.invalidate(config_id)
+                # Cancels verification of replaced revision
+                state.revisions.publish(config_id, new_config.update_rev, old_config.update_rev)
 
                 result['old'] = old_config.dict(exclude={'id', 'update_rev', 'project_id'})
                 result['new'] = new_config.dict(exclude={'id', 'update_rev', 'project_id'})
@@ -136,11 +552,15 @@ def configure_web_server():
                     update_rev=config.update_rev,
                 )
 
+                headers["ETag"] = config_etag(new_config.update_rev)
                 code = 202
                 error = None
             except DBRecordNotFoundError:
                 code = 404
                 error = "Record not found"
+            except DBRevisionMismatchError:
+                code = 412
+                error = "Record was modified"
         else:
             code = 422
             error = "Request body must be provided"
@@ -148,6 +568,7 @@ def configure_web_server():
         status = "OK" if error is None else "Failed"
         return web.json_response(
             status=code,
+            headers=headers,
             data=dict(
                 status=status,
                 error=error,
@@ -161,12 +582,18 @@ def configure_web_server():
         state: MQAppState = request.app['mq'].state
 
         try:
-            await state.db.configs.delete(config_id)
+            expected_rev = await if_match_rev(request, config_id)
+            await state.db.configs.delete(config_id, expected_rev)
+            state.config_cache.invalidate(config_id)
+            state.revisions.forget(config_id)
             code = 204
             error = None
         except DBRecordNotFoundError:
             code = 404
             error = "Record not found"
+        except DBRevisionMismatchError:
+            code = 412
+            error = "Record was modified"
         
         status = "OK" if error is None else "Failed"
         return web.json_response(
@@ -180,6 +607,18 @@ def configure_web_server():
 
     @web.middleware
     async def unhandled_exception_middleware(request: web.Request, handler):
+
+        # Components are initialized after server is started
+        if request.path.startswith("/api/") and "mq" not in request.app:
+            return web.json_response(
+                status=503,
+                data=dict(
+                    status="Failed",
+                    error="Service is not ready",
+                    result=dict(),
+                ),
+            )
+
         try:
             return await handler(request)
         #except web.HTTPException: # HTTPNotFound
@@ -221,31 +660,150 @@ def run(settings: AppSettings):
     app = configure_web_server()
     logger = logging.getLogger("main")
 
-    async def server_init(app: web.Application):
+    readiness = Readiness()
+    app["readiness"] = readiness
+
+    # Modules of message queue, database drivers and YouTrack client
+    # are heavy, so they are imported during initialization, when
+    # server is already accepting health checks
+
+    async def init_mq():
+        from youtrack_reporter.app.message_queue.instance import mq_init
+
         logger.info("Configuring message queue...")
-        mq_app: MQApp = await mq_init(settings)
+        async with readiness.track("message_queue"):
+            mq_app = await mq_init(settings)
         logger.info("Configuring message queue... OK")
+        return mq_app
 
-        state: MQAppState = mq_app.state
-        state.settings = settings
+    async def init_db():
+        from youtrack_reporter.app.database.instance import db_init
 
         logger.info("Configuring database...")
-        state.db = await db_init(settings)
+        async with readiness.track("database"):
+            db = await db_init(settings)
         logger.info("Configuring database... OK")
+        return db
 
-        logger.info("Loading MQ unsent messages...")
-        messages = await state.db.unsent_mq.load_unsent_messages()
-        mq_app.import_unsent_messages(messages)
-        logger.info("Loading MQ unsent messages... OK")
+    async def init_mq_and_db():
 
-        state.youtrack_api = YouTrackAsyncAPI()
+        # Message queue and database don't depend on each other
+        mq_task = asyncio.ensure_future(init_mq())
+        db_task = asyncio.ensure_future(init_db())
+
+        try:
+            return await gather_all(mq_task, db_task)
+        except:
+            # Release the one, which succeeded
+            if not mq_task.cancelled() and mq_task.exception() is None:
+                await mq_task.result().shutdown()
+            if not db_task.cancelled() and db_task.exception() is None:
+                await db_task.result().close()
+            raise
+
+    async def server_init(app: web.Application):
+        mq_app, db = await init_mq_and_db()
+        try:
+            await init_state(mq_app, db)
+        except:
+            await mq_app.shutdown()
+            await db.close()
+            youtrack_api = getattr(mq_app.state, "youtrack_api", None)
+            if youtrack_api is not None:
+                await youtrack_api.__aexit__()
+            raise
 
-        await mq_app.start()
         app['mq'] = mq_app
 
+    async def init_state(mq_app: MQApp, db):
+        from youtrack_reporter.app.youtrack import YouTrackAsyncAPI
+
+        state: MQAppState = mq_app.state
+        state.settings = settings
+        state.db = db
+
+        state.config_cache = ConfigCache(state.db.configs, settings.cache)
+        state.revisions = RevisionIndex(settings.cache.revision_max_size)
+        state.issue_batcher = IssueBatcher(
+            state.db.issues,
+            settings.database.batch_delay,
+            settings.database.batch_max_size,
+        )
+
+        # Unsent messages are replayed in background after start
+        state.unsent_journal = UnsentMessagesJournal(
+            state.db.unsent_mq,
+            settings.message_queue.journal_interval,
+            settings.message_queue.replay_batch_size,
+        )
+
+        async with readiness.track("youtrack"):
+            state.youtrack_api = YouTrackAsyncAPI(settings)
+
+        state.duplicates = MaxValueCoalescer(settings.reporter.duplicates_window)
+        state.scheduler = FairScheduler(
+            settings.reporter.max_concurrency,
+            settings.reporter.max_concurrency_per_integration,
+            weights={
+                LANE_UNIQUE: settings.reporter.unique_weight,
+                LANE_DUPLICATE: settings.reporter.duplicate_weight,
+            },
+            slo={
+                LANE_UNIQUE: settings.reporter.unique_slo,
+                LANE_DUPLICATE: settings.reporter.duplicate_slo,
+            },
+        )
+
+        def collect_metrics():
+            # Cache counts lookups itself, so counter catches up with it
+            for result, total in (("hit", state.config_cache.hits), ("miss", state.config_cache.misses)):
+                lookups = metrics.CONFIG_CACHE_LOOKUPS.labels(result)
+                lookups.inc(total - lookups.value)
+            scheduler = state.scheduler.stats()
+            metrics.SCHEDULED_REPORTS.labels("queued").set(scheduler["queued"])
+            metrics.SCHEDULED_REPORTS.labels("in_flight").set(scheduler["in_flight"])
+            for lane, lane_stats in scheduler["lanes"].items():
+                metrics.LANE_REPORTS.labels(lane, "queued").set(lane_stats["queued"])
+                metrics.LANE_REPORTS.labels(lane, "in_flight").set(lane_stats["in_flight"])
+
+        metrics.REGISTRY.add_collector(collect_metrics)
+
+        async with readiness.track("consumers"):
+            await mq_app.start()
+
+        state.unsent_journal.start(mq_app)
+
+    async def init_in_background(app: web.Application):
+        try:
+            await server_init(app)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Liveness probe fails, so that service is restarted
+            logger.exception("Failed to initialize service")
+            readiness.set_failed()
+
+    async def server_start(app: web.Application):
+        # Listener is bound only after startup handlers are done.
+        # So components are initialized in background, and probes
+        # can watch their progress meanwhile
+        app["init"] = asyncio.ensure_future(init_in_background(app))
+
     async def server_exit(app):
-        mq_app: MQApp = app["mq"]
+        readiness.set_shutting_down()
+
+        init_task: asyncio.Task = app["init"]
+        if not init_task.done():
+            init_task.cancel()
+        await asyncio.gather(init_task, return_exceptions=True)
+
+        # Components failed to start were released by initialization
+        mq_app: Optional[MQApp] = app.get("mq")
+        if mq_app is None:
+            return
+
         state: MQAppState = mq_app.state
+        await state.unsent_journal.stop()
 
         logger.info("Closing message queue...")
         timeout = settings.environment.shutdown_timeout
@@ -253,8 +811,7 @@ def run(settings: AppSettings):
         logger.info("Closing message queue... OK")
 
         logger.info("Saving MQ unsent messages...")
-        messages = mq_app.export_unsent_messages()
-        await state.db.unsent_mq.save_unsent_messages(messages)
+        await state.unsent_journal.sync(mq_app)
         logger.info("Saving MQ unsent messages... OK")
 
         logger.info("Closing database...")
@@ -268,7 +825,7 @@ def run(settings: AppSettings):
     host = settings.server.host
     port = settings.server.port
 
-    app.on_startup.append(server_init)
+    app.on_startup.append(server_start)
     app.on_shutdown.append(server_exit)
 
     web.run_app(app, host=host, port=port, access_log=None)
\ No newline at end of file
@@ -14,6 +14,9 @@ class ServerSettings(BaseSettings):
 
     host: str
     port: str
+    batch_max_size: int = 500
+    page_size: int = 100
+    page_max_size: int = 1000
 
     class Config:
         env_prefix = "SERVER_"
@@ -24,11 +27,30 @@ class ShutdownSettings(BaseSettings):
         env_prefix = "SHUTDOWN_"
 
 class DatabaseSettings(BaseSettings):
-    engine: str = Field(regex=r"^arangodb$")
-    url: AnyHttpUrl
-    username: str
-    password: str
-    name: str
+    engine: str = Field(regex=r"^(arangodb|memory|sqlite)$")
+    url: Optional[AnyHttpUrl]
+    username: Optional[str]
+    password: Optional[str]
+    name: Optional[str]
+    snapshot_path: Optional[str]
+    snapshot_interval: float = 60
+    path: Optional[str]
+    busy_timeout: float = 5
+    batch_delay: float = 0.005
+    batch_max_size: int = 100
+
+    @root_validator
+    def check_connection_settings(cls, values):
+        if values.get("engine") == "arangodb":
+            missing = [
+                name for name in ("url", "username", "password", "name")
+                if not values.get(name)
+            ]
+            if missing:
+                raise ValueError(f"Missing settings for ArangoDB: {missing}")
+        if values.get("engine") == "sqlite" and not values.get("path"):
+            raise ValueError("Missing database file path for SQLite")
+        return values
 
     class Config:
         env_prefix = "DB_"
@@ -36,6 +58,9 @@ class DatabaseSettings(BaseSettings):
 class MessageQueues(BaseSettings):
     youtrack_reporter_internal: str
     youtrack_reporter: str
+    # Optional queue with duplicate crashes only. Keeps unique
+    # crashes from waiting behind a storm of duplicates
+    youtrack_reporter_duplicates: Optional[str]
     api_gateway: str
     dlq: str
 
@@ -50,6 +75,11 @@ class MessageQueueSettings(BaseSettings):
     username: str
     password: str
     region: str
+    # Unsent messages are synced to database every that many seconds,
+    # so they survive crash of the process. Sync reads them from running
+    # MQ app. 0 disables it: messages are saved only at clean shutdown
+    journal_interval: float = 5
+    replay_batch_size: int = 500
 
     class Config:
         env_prefix = "MQ_"
@@ -59,12 +89,90 @@ class CollectionSettings(BaseSettings):
     issues: str = "Issues"
     unsent_messages: str = "UnsentMessages"
 
+class CacheSettings(BaseSettings):
+    config_max_size: int = 1024
+    config_ttl: float = 60
+    project_id_max_size: int = 1024
+    project_id_ttl: float = 600
+    verification_max_size: int = 1024
+    verification_ttl: float = 3600
+    revision_max_size: int = 65536
+
+    class Config:
+        env_prefix = "CACHE_"
+
+class YouTrackSettings(BaseSettings):
+    connections_limit: int = 100
+    connections_limit_per_host: int = 10
+    dns_cache_ttl: int = 300
+    keepalive: bool = True
+    keepalive_timeout: float = 30
+    connect_timeout: float = 10
+    request_timeout: float = 60
+    # Requests per second to each YouTrack instance. 0 disables limiting
+    rate_limit: float = 0
+    rate_limit_burst: int = 20
+    rate_limit_min: float = 0.2
+    rate_limit_decrease: float = 0.5
+    rate_limit_recovery: float = 0.05
+    retry_attempts: int = 3
+    retry_backoff_base: float = 0.5
+    retry_backoff_max: float = 10
+    retry_budget_ratio: float = 0.2
+    circuit_failure_threshold: int = 5
+    circuit_reset_timeout: float = 30
+    # read: check token and project access without writes,
+    # probe: also create and delete test issue
+    verify_mode: str = Field("read", regex=r"^(read|probe)$")
+
+    class Config:
+        env_prefix = "YOUTRACK_"
+
+class ReporterSettings(BaseSettings):
+    duplicates_window: float = 1.0
+    max_concurrency: int = 64
+    max_concurrency_per_integration: int = 8
+    reservation_lease: float = 300
+    # Attempts to store created issue and delay (seconds) before
+    # the first retry. Delay is doubled after each attempt
+    commit_attempts: int = 5
+    commit_backoff: float = 0.5
+    # Share of scheduler slots given to each lane when both are busy
+    unique_weight: int = 4
+    duplicate_weight: int = 1
+    # Latency targets (seconds) of lanes
+    unique_slo: float = 30
+    duplicate_slo: float = 300
+    # Upload long crash output as gzip attachment,
+    # keeping only its beginning in description
+    attach_crash_output: bool = False
+    crash_output_summary_size: int = 2000
+
+    class Config:
+        env_prefix = "REPORTER_"
+
+class ShardingSettings(BaseSettings):
+    enabled: bool = False
+    shards: int = 16
+    virtual_nodes: int = 64
+    replica: int = 0
+    replicas: int = 1
+    # Comma separated shard numbers. Overrides shards assigned to replica
+    owned_shards: Optional[str]
+
+    class Config:
+        env_prefix = "SHARDING_"
+
 class AppSettings(BaseModel):
     server: ServerSettings
     database: DatabaseSettings
     collections: CollectionSettings
     message_queue: MessageQueueSettings
     environment: EnvironmentSettings
+    cache: CacheSettings
+    youtrack: YouTrackSettings
+    reporter: ReporterSettings
+    sharding: ShardingSettings
 
 def load_app_settings():
     return AppSettings(
@@ -72,5 +180,9 @@ def load_app_settings():
         database=DatabaseSettings(),
         collections=CollectionSettings(),
         message_queue=MessageQueueSettings(queues=MessageQueues()),
-        environment=EnvironmentSettings()
+        environment=EnvironmentSettings(),
+        cache=CacheSettings(),
+        youtrack=YouTrackSettings(),
+        reporter=ReporterSettings(),
+        sharding=ShardingSettings(),
     )
\ No newline at end of file
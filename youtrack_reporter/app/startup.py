@@ -0,0 +1,125 @@
+from __future__ import annotations
+from typing import Any, Awaitable, Dict, List, Optional
+from contextlib import asynccontextmanager
+
+import asyncio
+import logging
+import time
+
+
+async def gather_all(*aws: Awaitable) -> List[Any]:
+
+    """
+    Run awaitables concurrently and wait for all of them,
+    even if some fail. Raises the first error occurred.
+    """
+
+    results = await asyncio.gather(*aws, return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+
+    return results
+
+
+class _Component:
+    state: str
+    required: bool
+    started_at: Optional[float]
+    duration: Optional[float]
+    error: Optional[str]
+
+    def __init__(self, required: bool):
+        self.state = "starting"
+        self.required = required
+        self.started_at = time.monotonic()
+        self.duration = None
+        self.error = None
+
+    def report(self) -> Dict[str, Any]:
+        duration = self.duration
+        if duration is None:
+            duration = time.monotonic() - self.started_at
+
+        return dict(
+            state=self.state,
+            required=self.required,
+            duration=round(duration, 3),
+            error=self.error,
+        )
+
+
+class Readiness:
+
+    """
+    Tracks initialization of service components. Service is ready
+    when all required components are ready and it's not shutting down.
+    Components which are not required may continue in background.
+    Service is not alive once its initialization has failed.
+    """
+
+    _logger: logging.Logger
+    _components: Dict[str, _Component]
+    _started_at: float
+    _shutting_down: bool
+    _failed: bool
+
+    def __init__(self):
+        self._logger = logging.getLogger("startup")
+        self._components = {}
+        self._started_at = time.monotonic()
+        self._shutting_down = False
+        self._failed = False
+
+    @asynccontextmanager
+    async def track(self, name: str, required: bool = True):
+        component = self._components[name] = _Component(required)
+        try:
+            yield
+        except BaseException as e:
+            component.state = "failed"
+            component.error = str(e) or type(e).__name__
+            raise
+        else:
+            component.state = "ready"
+        finally:
+            component.duration = time.monotonic() - component.started_at
+            self._logger.info(
+                "Component '%s' is %s in %.3fs",
+                name,
+                component.state,
+                component.duration,
+            )
+
+    def set_shutting_down(self):
+        self._shutting_down = True
+
+    def set_failed(self):
+        self._failed = True
+
+    @property
+    def is_alive(self) -> bool:
+        return not self._failed
+
+    @property
+    def is_ready(self) -> bool:
+        if self._shutting_down or self._failed or not self._components:
+            return False
+
+        return all(
+            component.state == "ready"
+            for component in self._components.values()
+            if component.required
+        )
+
+    def report(self) -> Dict[str, Any]:
+        return dict(
+            ready=self.is_ready,
+            alive=self.is_alive,
+            shutting_down=self._shutting_down,
+            uptime=round(time.monotonic() - self._started_at, 3),
+            components={
+                name: component.report()
+                for name, component in self._components.items()
+            },
+        )
@@ -1,15 +1,27 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING, Dict, List
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from contextlib import asynccontextmanager
 from pydantic import BaseModel
 import pydantic
 from .errors import *
+from .memo import AsyncMemo
+from .connector import ConnectionPool
+from .ratelimit import RateLimiter
+from .resilience import Resilience
+from . import metrics
+from .settings import CacheSettings, YouTrackSettings
 from logging import Logger
 
+import asyncio
+import hashlib
+import time
 import logging
 import aiohttp
+import yarl
 
 if TYPE_CHECKING:
     from app.database.orm import ORMConfig
+    from .settings import AppSettings
 
 class YTProject(BaseModel):
     id: str
@@ -18,20 +30,50 @@ class YTProject(BaseModel):
 class YTIssue(BaseModel):
     id: str
 
+class YTUser(BaseModel):
+    id: str
+    login: Optional[str]
+    banned: bool = False
+
+class YTAttachment(BaseModel):
+    id: str
+    name: Optional[str]
+
+def credentials_key(config: ORMConfig) -> Tuple[str, str, str]:
+    """Identifies YouTrack project and credentials used to access it"""
+    token_hash = hashlib.sha256(config.token.encode()).hexdigest()
+    return (str(config.url), token_hash, config.project)
+
 class YouTrackAsyncAPI:
     _logger: Logger
+    _project_ids: AsyncMemo
+    _verifications: AsyncMemo
+    _verify_mode: str
+    _pool: ConnectionPool
+    _limiter: RateLimiter
+    _resilience: Resilience
 
     client: aiohttp.ClientSession
     config: ORMConfig
     headers: Dict[str, str]
 
-    def __init__(self):
+    def __init__(self, settings: Optional[AppSettings] = None):
         self._logger = logging.getLogger("YouTrack")
         self.headers = {
             "Accept": "application/json",
             "Content-Type": "application/json",
         }
-        self.client = aiohttp.ClientSession(headers=self.headers)
+
+        youtrack = settings.youtrack if settings else YouTrackSettings()
+        self._pool = ConnectionPool(youtrack)
+        self.client = self._pool.create_session(self.headers)
+        self._limiter = RateLimiter(youtrack)
+        self._resilience = Resilience(youtrack)
+        self._verify_mode = youtrack.verify_mode
+
+        cache = settings.cache if settings else CacheSettings()
+        self._project_ids = AsyncMemo(cache.project_id_ttl, cache.project_id_max_size)
+        self._verifications = AsyncMemo(cache.verification_ttl, cache.verification_max_size)
 
     async def __aenter__(self):
         return self
@@ -40,6 +82,75 @@ class YouTrackAsyncAPI:
         if self.client:
             await self.client.close()
 
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    SAFE_RETRY_STATUSES = (429, 503)
+
+    @asynccontextmanager
+    async def _request(self, operation: str, method: str, url: str, idempotent: bool = True, **kwargs):
+
+        """
+        Send request to YouTrack respecting rate limit of its instance.
+        Transient failures are retried with backoff. Non-idempotent requests
+        are retried only if it is known that they were not processed.
+        Raises `CircuitOpenError` if instance is considered unavailable
+        """
+
+        start = time.perf_counter()
+        try:
+            resp = await self._send(method, yarl.URL(url), idempotent, **kwargs)
+        except BaseException as e:
+            metrics.YOUTRACK_REQUESTS.labels(operation, type(e).__name__).inc()
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            metrics.YOUTRACK_REQUEST_DURATION.labels(operation).observe(duration)
+
+        metrics.YOUTRACK_REQUESTS.labels(operation, resp.status).inc()
+
+        try:
+            yield resp
+        finally:
+            resp.release()
+
+    async def _send(self, method: str, url: yarl.URL, idempotent: bool, **kwargs):
+        retry_statuses = self.RETRY_STATUSES if idempotent else self.SAFE_RETRY_STATUSES
+        attempt = 0
+
+        while True:
+            self._resilience.before_request(url, attempt)
+
+            try:
+                await self._limiter.acquire(url)
+                resp = await self.client.request(method, url, **kwargs)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self._resilience.on_failure(url)
+                not_sent = isinstance(e, aiohttp.ClientConnectorError)
+                if (idempotent or not_sent) and self._resilience.should_retry(url, attempt):
+                    self._logger.warning(f"Request failed: {method} {url}, reason - {e!r}. Retrying...")
+                    await asyncio.sleep(self._resilience.backoff(attempt))
+                    attempt += 1
+                    continue
+                raise YouTrackConnectionError(str(e) or type(e).__name__) from e
+            except BaseException:
+                self._resilience.on_abort(url)
+                raise
+
+            self._limiter.feedback(url, resp.status, resp.headers.get("Retry-After"))
+
+            if resp.status >= 500:
+                self._resilience.on_failure(url)
+            else:
+                self._resilience.on_success(url)
+
+            if resp.status in retry_statuses and self._resilience.should_retry(url, attempt):
+                self._logger.warning(f"Request failed: {method} {url}, status - {resp.status}. Retrying...")
+                resp.release()
+                await asyncio.sleep(self._resilience.backoff(attempt))
+                attempt += 1
+                continue
+
+            return resp
+
     async def get_project_id(self, config: ORMConfig) -> str:
 
         params = {"query": config.project, "fields": "id,name"}
@@ -48,7 +159,7 @@ class YouTrackAsyncAPI:
 
         self._logger.debug(f"Request info: url={url}, params={params}, method = GET")
 
-        async with self.client.get(url=url, params=params, headers=auth_header) as resp:
+        async with self._request("get_project_id", "GET", url, params=params, headers=auth_header) as resp:
             if resp.status != 200:
                 self._logger.error(f"Server response code is not OK: {resp.status}; resp.text = {await resp.text()}")
                 raise ResponseStatusError(resp.status)
@@ -81,29 +192,97 @@ class YouTrackAsyncAPI:
             except pydantic.ValidationError as e:
                 self._logger.error(f"Response can't be parsed to pydantic model object: {await resp.text()}")
                 raise ResponseParseError(f"Pydantic model parsing failed")
-                
 
-    async def validate_credentials(self, config: ORMConfig) -> ORMConfig:
-        url = f"{config.url}/api/admin/projects"
+    async def resolve_project_id(self, config: ORMConfig) -> str:
+        """Same as `get_project_id`, but result is memoized"""
+        key = credentials_key(config)
+        return await self._project_ids.get(key, lambda: self.get_project_id(config))
+
+    def invalidate_project_id(self, config: ORMConfig):
+        self._project_ids.invalidate(credentials_key(config))
+
+    def stats(self) -> Dict[str, dict]:
+        return dict(
+            project_ids=self._project_ids.stats(),
+            verifications=self._verifications.stats(),
+            connection_pool=self._pool.stats(),
+            rate_limits=self._limiter.stats(),
+            circuits=self._resilience.stats(),
+        )
+
+    async def get_current_user(self, config: ORMConfig) -> YTUser:
+        params = {"fields": "id,login,banned"}
+        url = f"{config.url}/api/users/me"
         auth_header = {"Authorization": f"Bearer {config.token}"}
-        self._logger.debug(f"Request info: url={url}, auth={auth_header}, method = GET")
 
-        try:
-            config.project_id = await self.get_project_id(config)
-            self._logger.debug(f"Project was found, id = {config.project_id}")
-            issue = await self.create_issue(config, "test issue", "test issue")
+        self._logger.debug(f"Request info: url={url}, params={params}, method = GET")
+
+        async with self._request("get_current_user", "GET", url, params=params, headers=auth_header) as resp:
+            if resp.status != 200:
+                self._logger.error(f"Server response code is not OK: {resp.status}; resp.text = {await resp.text()}")
+                raise ResponseStatusError(resp.status)
+
+            try:
+                json = await resp.json()
+            except ValueError as e:
+                self._logger.error(f"Asyncio lib failed to parse resp as json: {await resp.text()}")
+                raise ResponseParseError("JSON parsing failed")
+
+            if not isinstance(json, dict):
+                self._logger.error(f"Failed to parse response. Reason - wrong json format: {await resp.text()}")
+                raise ResponseParseError("JSON was not parsed correctly")
+
+            try:
+                return YTUser.parse_obj(json)
+            except pydantic.ValidationError as e:
+                self._logger.error(f"Response can't be parsed to pydantic model object: {await resp.text()}")
+                raise ResponseParseError(f"Pydantic model parsing failed")
+
+    async def _verify(self, config: ORMConfig) -> str:
+
+        """
+        Check that credentials give access to project. Returns project id.
+        In `read` mode only reads are made: token must belong to active user,
+        who can see the project. In `probe` mode test issue is also created
+        and deleted, which proves permission to create issues
+        """
+
+        user = await self.get_current_user(config)
+        if user.banned:
+            raise UserBanned(user.login or user.id)
+
+        project_id = await self.resolve_project_id(config)
+        self._logger.debug(f"Project was found, id = {project_id}")
+
+        if self._verify_mode == "probe":
+            probe = config.copy(update={"project_id": project_id})
+            issue = await self.create_issue(probe, "test issue", "test issue")
             self._logger.debug(f"Issue {issue} was created")
-            await self.delete_issue(config, issue)
-        except YouTrackError as e:
-            raise e
+            await self.delete_issue(probe, issue)
+
+        return project_id
+
+    async def validate_credentials(self, config: ORMConfig) -> ORMConfig:
+
+        """
+        Verify credentials of config and set its project id. Successful
+        verifications are cached by credentials, so editing other fields
+        of config doesn't touch YouTrack
+        """
 
+        key = credentials_key(config)
+        config.project_id = await self._verifications.get(key, lambda: self._verify(config))
         return config
 
+    def invalidate_verification(self, config: ORMConfig):
+        self._verifications.invalidate(credentials_key(config))
+        self._project_ids.invalidate(credentials_key(config))
+
     async def create_issue(self, config: ORMConfig, summary: str, description: str) -> YTIssue:
         try:
             # May be unnecessary check, should examine
             if config.project_id is None:
-                config.project_id = await self.get_project_id(config)
+                config.project_id = await self.resolve_project_id(config)
             
             data = {
                 "project": {"id": config.project_id},
@@ -114,7 +293,10 @@ class YouTrackAsyncAPI:
             auth_header = {"Authorization": f"Bearer {config.token}"}
             
             self._logger.debug(f"Request info: url={url}, json={data}, method = POST")
-            async with self.client.post(url=url, json=data, headers=auth_header) as resp:
+            async with self._request("create_issue", "POST", url, idempotent=False, json=data, headers=auth_header) as resp:
+                if resp.status in (401, 403):
+                    # Cached verification is no longer valid
+                    self.invalidate_verification(config)
                 if resp.status != 200:
                     self._logger.error(f"Response status in not OK: {resp.status}; resp.text = {await resp.text()}")
                     raise ResponseStatusError(resp.status)
@@ -150,7 +332,7 @@ class YouTrackAsyncAPI:
             auth_header = {"Authorization": f"Bearer {config.token}"}
 
             self._logger.debug(f"Request info: url={url}, json={data}, method = POST")
-            async with self.client.post(url=url, json=data, headers=auth_header) as resp:
+            async with self._request("update_issue", "POST", url, json=data, headers=auth_header) as resp:
                 if resp.status != 200:
                     self._logger.error(f"Response status in not OK: {resp.status}; resp.text = {await resp.text()}")
                     raise ResponseStatusError(resp.status)
@@ -175,6 +357,66 @@ class YouTrackAsyncAPI:
             self._logger.error(f"Failed to update issue. Config: {config.dict(exclude={'token'})}, issue: {issue.dict()}")
             raise e
 
+    async def add_attachment(
+        self,
+        config: ORMConfig,
+        issue: YTIssue,
+        filename: str,
+        data: bytes,
+        content_type: str = "application/octet-stream",
+    ) -> YTAttachment:
+
+        """
+        Upload file to issue as multipart form. Body is built
+        from memory once, so it can be resent on retry
+        """
+
+        try:
+            writer = aiohttp.MultipartWriter("form-data")
+            part = writer.append(data, {aiohttp.hdrs.CONTENT_TYPE: content_type})
+            part.set_content_disposition("form-data", name="file", filename=filename)
+
+            params = {"fields": "id,name"}
+            url = f"{config.url}/api/issues/{issue.id}/attachments"
+            headers = {
+                "Authorization": f"Bearer {config.token}",
+                # Session sends JSON by default
+                aiohttp.hdrs.CONTENT_TYPE: writer.headers[aiohttp.hdrs.CONTENT_TYPE],
+            }
+
+            self._logger.debug(f"Request info: url={url}, file={filename}, size={len(data)}, method = POST")
+            async with self._request(
+                "add_attachment", "POST", url,
+                idempotent=False, params=params, data=writer, headers=headers,
+            ) as resp:
+                if resp.status != 200:
+                    self._logger.error(f"Response status in not OK: {resp.status}; resp.text = {await resp.text()}")
+                    raise ResponseStatusError(resp.status)
+
+                try:
+                    json = await resp.json()
+                except ValueError as e:
+                    self._logger.error(f"Asyncio lib failed to parse resp as json: {await resp.text()}")
+                    raise ResponseParseError("JSON parsing failed")
+
+                # Single file is uploaded, but YouTrack returns list of attachments
+                if isinstance(json, list) and len(json) == 1:
+                    json = json[0]
+
+                if not isinstance(json, dict):
+                    self._logger.error(f"Failed to parse response. Reason - wrong json format: {await resp.text()}")
+                    raise ResponseParseError("JSON was not parsed correctly")
+
+                try:
+                    return YTAttachment.parse_obj(json)
+                except pydantic.ValidationError as e:
+                    self._logger.error(f"Response can't be parsed to pydantic model object: {await resp.text()}")
+                    raise ResponseParseError(f"Pydantic model parsing failed")
+
+        except YouTrackError as e:
+            self._logger.error(f"Failed to add attachment. Config: {config.dict(exclude={'token'})}, issue: {issue.dict()}")
+            raise e
+
     async def get_issue_description(self, config: ORMConfig, issue: YTIssue) -> str:
         try:
             params = {"fields": "description"}
@@ -183,7 +425,7 @@ class YouTrackAsyncAPI:
 
             self._logger.debug(f"Request info: url={url}, method = GET")
 
-            async with self.client.get(url=url, params=params, headers=auth_header) as resp:
+            async with self._request("get_issue_description", "GET", url, params=params, headers=auth_header) as resp:
                 if resp.status != 200:
                     self._logger.error(f"Server response code is not OK: {resp.status}; resp.text = {await resp.text()}")
                     raise ResponseStatusError(resp.status)
@@ -206,6 +448,7 @@ class YouTrackAsyncAPI:
 
         except YouTrackError as e:
             self._logger.error(f"Failed to get issue description. Config: {config.dict(exclude={'token'})}")
+            raise e
 
 
     async def delete_issue(self, config: ORMConfig, issue: YTIssue) -> None:
@@ -213,7 +456,7 @@ class YouTrackAsyncAPI:
         auth_header = {"Authorization": f"Bearer {config.token}"}
         
         self._logger.debug(f"Request info: url={url}, method = DELETE")
-        async with self.client.delete(url=url, headers=auth_header) as resp:
+        async with self._request("delete_issue", "DELETE", url, headers=auth_header) as resp:
             if resp.status != 200:
                 self._logger.error(f"Error while deleting issue. Server response code is not OK: {resp.status}; resp.text = {await resp.text()}")
                 raise ResponseStatusError(resp.status)
\ No newline at end of file